@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Currency Rate Backfill
+Finds business days missing from data/currency_rates and fetches them through
+the Frankfurter time-series endpoint in parallel chunks
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date as date_cls, datetime, timedelta
+
+import requests
+
+from fetch_currency_rates import API_URL, CURRENCIES, write_latest_csv, write_snapshots, writes_views
+from history_store import merge_history_csv, open_store
+from http_fetch import make_session
+from manifest import Transaction
+
+STATE_FILE = "data/currency_rates/backfill_state.json"
+
+# Frankfurter thins out long time series, so keep each request well under a quarter
+DEFAULT_CHUNK_DAYS = 60
+DEFAULT_WORKERS = 4
+
+def load_closed_dates(path=STATE_FILE):
+    """Dates previously requested that ECB did not publish (holidays)"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        return set(json.load(f).get('closed_dates', []))
+
+def save_closed_dates(closed, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'closed_dates': sorted(closed)}, f, indent=2)
+
+def find_missing_dates(start, end, stored_dates, closed_dates=()):
+    """Return weekdays between start and end (inclusive) that have no snapshot"""
+
+    have = set(stored_dates) | set(closed_dates)
+    missing = []
+    day = date_cls.fromisoformat(start)
+    last = date_cls.fromisoformat(end)
+    while day <= last:
+        iso = day.isoformat()
+        if day.weekday() < 5 and iso not in have:
+            missing.append(iso)
+        day += timedelta(days=1)
+    return missing
+
+def chunk_ranges(dates, chunk_days=DEFAULT_CHUNK_DAYS):
+    """
+    Group sorted ISO dates into (start, end) ranges
+    A new range starts at a gap longer than a weekend or when a range would exceed chunk_days
+    """
+    ranges = []
+    for iso in dates:
+        day = date_cls.fromisoformat(iso)
+        if ranges:
+            first, prev = ranges[-1]
+            if (day - prev).days <= 3 and (day - first).days < chunk_days:
+                ranges[-1] = (first, day)
+                continue
+        ranges.append((day, day))
+    return [(a.isoformat(), b.isoformat()) for a, b in ranges]
+
+def fetch_range(session, start, end, base_url=API_URL, symbols=CURRENCIES, timeout=30):
+    """Fetch one time-series range; returns (base, {date: rates})"""
+
+    url = f"{base_url}/{start}..{end}"
+    params = {'base': 'USD', 'symbols': ','.join(symbols)}
+    response = session.get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    return data.get('base', 'USD'), data.get('rates', {})
+
+def backfill(start, end, base_url=API_URL, workers=DEFAULT_WORKERS,
+             chunk_days=DEFAULT_CHUNK_DAYS, dry_run=False):
+    """
+    Fetch and store every missing business day between start and end
+    Returns the number of days written
+    """
+
+    store = open_store()
+    closed = load_closed_dates()
+    missing = find_missing_dates(start, end, store.dates, closed)
+
+    if not missing:
+        print(f"✅ No missing dates between {start} and {end}")
+        return 0
+
+    ranges = chunk_ranges(missing, chunk_days)
+    print(f"🔍 {len(missing)} missing business days in {len(ranges)} request(s)")
+
+    if dry_run:
+        for a, b in ranges:
+            print(f"  {a}..{b}")
+        return 0
+
+    fetched = {}
+    base_currency = 'USD'
+    failed = 0
+
+    with make_session(pool_size=workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_range, session, a, b, base_url): (a, b) for a, b in ranges}
+        for future in as_completed(futures):
+            a, b = futures[future]
+            try:
+                base_currency, rates = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"❌ {a}..{b}: {e}")
+                failed += 1
+                continue
+            print(f"📥 {a}..{b}: {len(rates)} day(s)")
+            fetched.update(rates)
+
+    # Only keep days we asked for; the API also returns the last business day
+    # before a range that starts on a holiday
+    wanted = set(missing)
+    timestamp = datetime.now().isoformat()
+    snapshots = [
+        {'date': d, 'timestamp': timestamp, 'base_currency': base_currency, 'rates': fetched[d]}
+        for d in sorted(fetched) if d in wanted
+    ]
+
+    # Bulk write: per-day snapshots, then history.csv and the store in one pass each,
+    # committed as one transaction
+    os.makedirs('data/currency_rates', exist_ok=True)
+    if snapshots:
+        latest_before = store.latest_date
+        with Transaction(f"backfill {snapshots[0]['date']}..{snapshots[-1]['date']}") as txn:
+            write_snapshots(snapshots, txn=txn)
+            if writes_views():
+                merge_history_csv(snapshots, txn=txn)
+                if latest_before is None or snapshots[-1]['date'] > latest_before:
+                    write_latest_csv(snapshots[-1], txn)
+            store.merge({s['date']: s['rates'] for s in snapshots}, base_currency, txn=txn)
+
+    # Remember holidays so the next backfill does not ask for them again
+    if not failed:
+        returned = {s['date'] for s in snapshots}
+        save_closed_dates(closed | (wanted - returned))
+
+    print(f"💾 Wrote {len(snapshots)} day(s); {len(wanted) - len(snapshots)} had no ECB publication")
+    if failed:
+        print(f"⚠️ {failed} range(s) failed - rerun to retry them")
+
+    return len(snapshots)
+
+def main():
+    """Main execution function"""
+
+    parser = argparse.ArgumentParser(description="Backfill missing currency rate snapshots")
+    parser.add_argument('--start', help="First date to check (default: first stored date)")
+    parser.add_argument('--end', help="Last date to check (default: yesterday)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument('--base-url', default=API_URL, help="API root, e.g. a local stub server")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the ranges to fetch")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔁 Currency Rate Backfill")
+    print("="*60 + "\n")
+
+    start = args.start
+    if start is None:
+        store = open_store()
+        if len(store) == 0:
+            print("❌ No stored snapshots - pass --start")
+            return 1
+        start = store.dates[0]
+    end = args.end or (date_cls.today() - timedelta(days=1)).isoformat()
+
+    backfill(start, end, args.base_url, args.workers, args.chunk_days, args.dry_run)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
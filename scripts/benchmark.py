@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Builds synthetic multi-year, many-currency datasets in a temporary directory
+and times each hot path against them: fetch (stub HTTP server), save, history
+reads and summaries. Wall time and peak memory are written as JSON, and a
+previous result file can be given as a baseline to flag regressions.
+
+Startup is checked too: each light entry point is imported in a fresh
+interpreter under -X importtime and must stay within STARTUP_BUDGET_MS without
+pulling in a heavy dependency, and the no-op commodity/food runs are timed.
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date as date_cls, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_SIZES = "2x16,10x50,20x200"
+DEFAULT_TOLERANCE = 0.25
+# Stages faster than this are too noisy to compare against a baseline
+NOISE_FLOOR_SECONDS = 0.02
+
+# Entry points whose import must stay cheap: they run on every (often no-op) daily run
+LIGHT_ENTRY_POINTS = ['cli', 'run_pipeline', 'fetch_commodity_prices', 'fetch_food_prices',
+                      'release_schedule', 'http_fetch', 'currency_providers', 'metrics']
+HEAVY_MODULES = ('requests', 'urllib3', 'numpy', 'openpyxl', 'bs4', 'pyarrow', 'zstandard')
+STARTUP_BUDGET_MS = 40.0
+
+REAL_CODES = ['EUR', 'GBP', 'JPY', 'CNY', 'INR', 'BRL', 'MXN', 'ZAR', 'NGN', 'EGP', 'KES', 'IDR',
+              'PHP', 'VND', 'THB', 'TRY', 'ARS', 'COP', 'PKR', 'BDT', 'CHF', 'CAD', 'AUD', 'NZD']
+
+def parse_sizes(text):
+    """'2x16,10x50' -> [(2, 16), (10, 50)] as (years, currencies)"""
+    sizes = []
+    for part in text.split(','):
+        years, currencies = part.lower().split('x')
+        sizes.append((int(years), int(currencies)))
+    return sizes
+
+def currency_codes(count):
+    codes = REAL_CODES[:count]
+    i = 0
+    while len(codes) < count:
+        code = 'X' + chr(65 + i // 26 % 26) + chr(65 + i % 26)
+        if code not in codes:
+            codes.append(code)
+        i += 1
+    return codes
+
+def business_days(end, count):
+    days = []
+    day = end
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    return days[::-1]
+
+def next_business_day(iso):
+    day = date_cls.fromisoformat(iso) + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day.isoformat()
+
+def synthetic_matrix(rows, columns, seed=0):
+    """Geometric random walk rates with a few missing values, like real history"""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.5, 20000, columns)
+    walk = np.cumsum(rng.normal(0, 0.005, (rows, columns)), axis=0)
+    matrix = start * np.exp(walk)
+    matrix[rng.random((rows, columns)) < 0.002] = np.nan
+    return np.round(matrix, 6)
+
+def build_dataset(root, years, currencies, seed=0):
+    """
+    Write a synthetic data/ tree under root: history store, history.csv,
+    packed snapshot archives and latest.csv. Returns the dataset description.
+    """
+
+    from history_store import HISTORY_CSV, HistoryStore, STORE_DIR, _write_history_rows
+    from snapshot_archive import ARCHIVE_DIR, upsert_archive
+    from fetch_currency_rates import write_latest_csv
+
+    codes = currency_codes(currencies)
+    dates = business_days(date_cls(2026, 6, 30), years * 260)
+    matrix = synthetic_matrix(len(dates), len(codes), seed)
+    timestamp = datetime(2026, 7, 1).isoformat()
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        os.makedirs('data/currency_rates', exist_ok=True)
+        records = {d: {c: float(v) for c, v in zip(codes, row) if not np.isnan(v)}
+                   for d, row in zip(dates, matrix)}
+        HistoryStore(STORE_DIR).write_all(records, 'USD')
+        _write_history_rows(HISTORY_CSV, (
+            [d, timestamp, c, rate] for d in dates for c, rate in sorted(records[d].items())))
+        snapshots = [{'date': d, 'timestamp': timestamp, 'base_currency': 'USD', 'rates': records[d]}
+                     for d in dates]
+        upsert_archive(snapshots, ARCHIVE_DIR)
+        write_latest_csv(snapshots[-1])
+        history_bytes = os.path.getsize(HISTORY_CSV)
+        rows = sum(len(r) for r in records.values())
+    finally:
+        os.chdir(cwd)
+
+    return {
+        'years': years,
+        'currencies': currencies,
+        'days': len(dates),
+        'history_rows': rows,
+        'history_csv_bytes': history_bytes,
+        'last_date': dates[-1],
+        'codes': codes,
+        'last_rates': matrix[-1],
+    }
+
+# ----------------------------------------------------------------------
+# Stub Frankfurter server
+# ----------------------------------------------------------------------
+
+def start_stub_server(payload):
+    """Serve payload as /v1/latest (with an ETag) and its codes as /v1/currencies"""
+
+    body = json.dumps(payload).encode()
+    listing = json.dumps({code: code for code in payload['rates']}).encode()
+    etag = '"%x"' % (hash(body) & 0xffffffff)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0].endswith('/currencies'):
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(listing)))
+                self.end_headers()
+                self.wfile.write(listing)
+                return
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+def measure(results, name, func, *args):
+    """Run func once with stdout silenced; record wall time and peak traced memory"""
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results[name] = {'seconds': round(elapsed, 6), 'peak_bytes': peak}
+    return value
+
+def open_indexed_store(store_dir):
+    """Open the history store and load its date index"""
+    from history_store import HistoryStore
+    store = HistoryStore(store_dir)
+    len(store)
+    return store
+
+def read_history_csv(path):
+    """The legacy read path: parse every row of history.csv"""
+    rows = 0
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            float(row['Rate_to_USD'])
+            rows += 1
+    return rows
+
+def benchmark_size(years, currencies, formats, seed=0):
+    """Build one synthetic dataset and time every stage against it"""
+
+    import fetch_currency_rates
+    import http_fetch
+    from currency_analytics import generate_currency_analytics
+    from currency_providers import make_providers
+    from generate_summary import empty_state, generate_currency_summary, generate_overall_summary
+    from history_store import HISTORY_CSV, STORE_DIR
+
+    root = tempfile.mkdtemp(prefix='devecon-bench-')
+    cwd = os.getcwd()
+    saved_env = os.environ.get('CURRENCY_SNAPSHOT_FORMATS')
+    server = None
+    stages = {}
+
+    try:
+        build_started = time.perf_counter()
+        dataset = build_dataset(root, years, currencies, seed)
+        build_seconds = time.perf_counter() - build_started
+
+        new_date = next_business_day(dataset['last_date'])
+        payload = {
+            'amount': 1.0,
+            'base': 'USD',
+            'date': new_date,
+            'rates': {c: round(float(r) * 1.001, 6) for c, r in zip(dataset['codes'], dataset['last_rates'])
+                      if not np.isnan(r)},
+        }
+        server, base_url = start_stub_server(payload)
+
+        os.chdir(root)
+        os.environ['CURRENCY_SNAPSHOT_FORMATS'] = formats
+        http_fetch._session = None
+
+        providers = make_providers({'frankfurter': base_url, 'open_er_api': 'off', 'currency_api': 'off'})
+        data = measure(stages, 'fetch', fetch_currency_rates.fetch_currency_rates, providers)
+        measure(stages, 'fetch_revalidated', fetch_currency_rates.fetch_currency_rates, providers)
+
+        store = measure(stages, 'open_store', open_indexed_store, STORE_DIR)
+        measure(stages, 'save_new_day', fetch_currency_rates.save_data, data, store)
+        measure(stages, 'save_unchanged', fetch_currency_rates.save_data, data, store)
+
+        measure(stages, 'history_read_store', store.read_range)
+        measure(stages, 'history_read_last_90d', store.read_range,
+                (date_cls.fromisoformat(new_date) - timedelta(days=90)).isoformat())
+        measure(stages, 'history_read_csv', read_history_csv, HISTORY_CSV)
+
+        state = empty_state()
+        measure(stages, 'currency_summary_full', generate_currency_summary, store, state)
+        measure(stages, 'currency_summary_incremental', generate_currency_summary, store, state)
+        measure(stages, 'overall_summary', generate_overall_summary, state)
+        measure(stages, 'currency_analytics', generate_currency_analytics, store)
+    finally:
+        os.chdir(cwd)
+        if saved_env is None:
+            os.environ.pop('CURRENCY_SNAPSHOT_FORMATS', None)
+        else:
+            os.environ['CURRENCY_SNAPSHOT_FORMATS'] = saved_env
+        if server:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        'years': years,
+        'currencies': currencies,
+        'days': dataset['days'],
+        'history_rows': dataset['history_rows'],
+        'history_csv_bytes': dataset['history_csv_bytes'],
+        'build_seconds': round(build_seconds, 3),
+        'stages': stages,
+    }
+
+# ----------------------------------------------------------------------
+# Startup
+# ----------------------------------------------------------------------
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def import_profile(module):
+    """Cumulative import time (ms) of a module in a fresh interpreter and the heavy modules it loads"""
+
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                          cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1]}")
+
+    cumulative_us = None
+    heavy = set()
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name.split('.')[0] in HEAVY_MODULES:
+            heavy.add(name.split('.')[0])
+        if name == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, sorted(heavy)
+
+def time_noop_runs(repeat=3):
+    """Best-of wall time of the commodity and food scripts when no release is due"""
+
+    root = tempfile.mkdtemp(prefix='bench_noop_')
+    env = dict(os.environ, PYTHONPATH=SCRIPTS_DIR)
+    try:
+        subprocess.run([sys.executable, '-c',
+                        "import release_schedule as r\n"
+                        "for s in (r.PINK_SHEET, r.FAO_FOOD_PRICE_INDEX): r.record_fetch(s, r.is_due(s)[1])"],
+                       cwd=root, env=env, check=True, capture_output=True)
+        timings = {}
+        for script in ('fetch_commodity_prices', 'fetch_food_prices'):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, f"{script}.py")],
+                               cwd=root, env=env, check=True, capture_output=True)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[script] = round(best, 4)
+        # Interpreter start-up alone, for reference
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        timings['python_startup'] = round(time.perf_counter() - started, 4)
+        return timings
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def benchmark_startup(budget_ms=STARTUP_BUDGET_MS):
+    imports = {}
+    for module in LIGHT_ENTRY_POINTS:
+        ms, heavy = import_profile(module)
+        imports[module] = {'import_ms': round(ms, 2), 'heavy_modules': heavy,
+                           'within_budget': ms <= budget_ms and not heavy}
+    return {'budget_ms': budget_ms, 'imports': imports, 'noop_runs_seconds': time_noop_runs()}
+
+def print_startup(startup):
+    print(f"\n🚀 Startup (budget {startup['budget_ms']:.0f} ms, no {', '.join(HEAVY_MODULES)})")
+    print(f"  {'Entry point':<30}{'Import ms':>10}  Heavy modules")
+    for module, info in startup['imports'].items():
+        mark = '' if info['within_budget'] else '  ❌'
+        print(f"  {module:<30}{info['import_ms']:>10.1f}  {', '.join(info['heavy_modules']) or '-'}{mark}")
+    print(f"  {'No-op run':<30}{'Wall ms':>10}")
+    for script, seconds in startup['noop_runs_seconds'].items():
+        print(f"  {script:<30}{seconds * 1000:>10.1f}")
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a list of (size, stage, baseline_s, current_s) that got slower than tolerance allows"""
+
+    previous = {(r['years'], r['currencies']): r['stages'] for r in baseline.get('sizes', [])}
+    regressions = []
+    for result in results['sizes']:
+        old = previous.get((result['years'], result['currencies']))
+        if not old:
+            continue
+        for stage, timing in result['stages'].items():
+            if stage not in old:
+                continue
+            before, now = old[stage]['seconds'], timing['seconds']
+            if now > NOISE_FLOOR_SECONDS and now > before * (1 + tolerance):
+                regressions.append((f"{result['years']}x{result['currencies']}", stage, before, now))
+    return regressions
+
+def print_results(results):
+    for result in results['sizes']:
+        print(f"\n📏 {result['years']} years x {result['currencies']} currencies "
+              f"({result['history_rows']:,} history rows, {result['history_csv_bytes'] / 1e6:.1f} MB csv, "
+              f"built in {result['build_seconds']:.1f}s)")
+        print(f"  {'Stage':<30}{'Seconds':>10}{'Peak MB':>10}")
+        for stage, timing in result['stages'].items():
+            print(f"  {stage:<30}{timing['seconds']:>10.4f}{timing['peak_bytes'] / 1e6:>10.2f}")
+    print(f"\n🧠 Process max RSS: {results['max_rss_bytes'] / 1e6:.1f} MB")
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, history reads and summaries")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="Comma-separated YEARSxCURRENCIES datasets (default: %(default)s)")
+    parser.add_argument('--formats', default='json,csv',
+                        help="Snapshot formats written by the save stage (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before a stage counts as a regression (default: %(default)s)")
+    parser.add_argument('--startup-budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help="Import time allowed per light entry point (default: %(default)s)")
+    parser.add_argument('--startup-only', action='store_true', help="Only run the startup checks")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print("="*60)
+    print("⏱️ Pipeline Benchmark")
+    print("="*60)
+
+    results = {
+        'generated': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'formats': args.formats,
+        'sizes': [],
+    }
+    print("🔧 Measuring startup...")
+    results['startup'] = benchmark_startup(args.startup_budget_ms)
+
+    for years, currencies in [] if args.startup_only else parse_sizes(args.sizes):
+        print(f"🔧 Benchmarking {years} years x {currencies} currencies...")
+        results['sizes'].append(benchmark_size(years, currencies, args.formats, args.seed))
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+    print_results(results)
+    print_startup(results['startup'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved: {args.output}")
+
+    over_budget = [m for m, info in results['startup']['imports'].items() if not info['within_budget']]
+    if over_budget:
+        print(f"\n🚨 Startup budget exceeded by: {', '.join(over_budget)}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n🚨 {len(regressions)} stage(s) slower than baseline by more than {args.tolerance:.0%}:")
+            for size, stage, before, now in regressions:
+                print(f"  {size} {stage}: {before:.4f}s -> {now:.4f}s")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Command Line Entry Point
+One front door for every script: `python scripts/cli.py <command> [args]`.
+Only the module behind the chosen command is imported, so listing commands or
+running a cheap one never loads requests, numpy or openpyxl. A missing
+optional dependency fails fast with an install hint instead of a traceback.
+"""
+
+import importlib
+import sys
+
+# command: (module, description)
+COMMANDS = {
+    'pipeline': ('run_pipeline', "Run the daily data pipeline in one process"),
+    'currency': ('fetch_currency_rates', "Fetch daily currency exchange rates"),
+    'watch': ('watch_rates', "Poll currency rates intraday and save them when they change"),
+    'commodity': ('fetch_commodity_prices', "World Bank commodity price checker"),
+    'food': ('fetch_food_prices', "FAO Food Price Index monitor"),
+    'summary': ('generate_summary', "Generate the daily summaries"),
+    'rebuild-summaries': ('rebuild_summaries', "Recompute historical daily summaries in parallel"),
+    'analytics': ('currency_analytics', "Rolling currency volatility analytics"),
+    'comovement': ('comovement', "Rolling correlations across currencies and commodities"),
+    'backfill': ('backfill_currency_rates', "Backfill missing currency rate snapshots"),
+    'providers': ('currency_providers', "Fetch and merge rates from every currency provider"),
+    'quality': ('data_quality', "Currency snapshot data quality checks"),
+    'cross-rates': ('cross_rates', "Cross rates from the USD-based history store"),
+    'convert': ('currency_conversion', "Convert amounts between currencies at historical rates"),
+    'export': ('export_data', "Export joined currency, commodity and food data"),
+    'serve': ('serve_data', "Serve the collected data as a local JSON API"),
+    'store': ('history_store', "Manage the currency history store"),
+    'archive': ('snapshot_archive', "Packed binary archives of daily currency snapshots"),
+    'partitions': ('partitions', "Git-friendly daily partitions and their derived views"),
+    'manifest': ('manifest', "Check files against the write manifest"),
+    'pink-sheet': ('pink_sheet', "Ingest the World Bank Pink Sheet monthly history"),
+    'fao': ('fao_food_index', "Extract the FAO Food Price Index series"),
+    'releases': ('release_schedule', "Show release schedule status"),
+    'cache': ('http_fetch', "Inspect or trim the HTTP response cache"),
+    'metrics': ('metrics', "Inspect run metrics and profiles"),
+    'benchmark': ('benchmark', "Benchmark ingestion, history reads and summaries"),
+}
+
+def print_commands():
+    print("usage: cli.py <command> [args]\n\ncommands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<20}{description}")
+
+def main(argv=None):
+    """Dispatch to the chosen command's main()"""
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print_commands()
+        return 0
+    if argv[0] not in COMMANDS:
+        print(f"❌ Unknown command {argv[0]!r}")
+        print_commands()
+        return 2
+
+    name, args = argv[0], argv[1:]
+    # Each script's argparse reads sys.argv, and its usage line shows the command
+    sys.argv = [f"cli.py {name}"] + args
+    try:
+        module = importlib.import_module(COMMANDS[name][0])
+        return module.main()
+    except ImportError as e:
+        print(f"❌ {e}")
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Currency and Commodity Co-movement
+Rolling correlation matrices across every currency, commodity and FAO index.
+Daily currency rates are resampled to months (monthly average, like the Pink
+Sheet and FAO figures, or month-end) and all series are turned into monthly
+log returns. Currency returns are of the currency's USD value (1 / rate), so
+a positive correlation with gold means the currency strengthens as gold rises.
+
+Every window's matrix is computed for all pairs at once with NumPy and cached
+in .cache/comovement under a hash of the window's data, so adding a month only
+computes the new window.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from history_store import open_store
+from metrics import instrumented
+
+CACHE_DIR = ".cache/comovement"
+DEFAULT_WINDOW = 12
+DEFAULT_TOP = 10
+
+def monthly_levels(days, matrix, basis='average'):
+    """
+    Resample a daily (days x columns) rate matrix to months
+    Returns (['YYYY-MM', ...], months x columns) with the mean of each month's
+    stored rates, or with basis='end' the last stored rate of the month
+    """
+
+    if len(days) == 0:
+        return [], np.empty((0, matrix.shape[1]))
+    months = np.asarray(days).astype('datetime64[D]').astype('datetime64[M]')
+    labels, starts = np.unique(months, return_index=True)
+    valid = ~np.isnan(matrix)
+    if basis == 'end':
+        rows = np.where(valid, np.arange(len(matrix))[:, None], -1)
+        last = np.maximum.reduceat(rows, starts, axis=0)
+        levels = np.where(last >= 0, matrix[np.clip(last, 0, None), np.arange(matrix.shape[1])], np.nan)
+    else:
+        totals = np.add.reduceat(np.where(valid, matrix, 0.0), starts, axis=0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            levels = totals / counts
+    return [str(m) for m in labels], levels
+
+def build_panel(store=None, basis='average', commodities=True, food=True):
+    """
+    Monthly levels of every series on one consecutive month axis
+    Returns (labels, months, levels, inverted) where inverted marks series
+    quoted per USD (currencies), whose returns are negated
+    """
+
+    from monthly_series import load_commodity_months, load_food_months
+
+    store = store if store is not None else open_store()
+    _, currencies, matrix = store.read_range()
+    currency_months, currency_levels = monthly_levels(store.days, matrix, basis)
+
+    columns = {}
+    for j, code in enumerate(currencies):
+        columns[code] = dict(zip(currency_months, currency_levels[:, j]))
+    sources = []
+    if commodities:
+        sources.append(('commodity', load_commodity_months()[0]))
+    if food:
+        sources.append(('food', load_food_months()[0]))
+    for prefix, by_month in sources:
+        for month, values in by_month.items():
+            for name, value in values.items():
+                if value is not None:
+                    columns.setdefault(f"{prefix}:{name}", {})[month] = float(value)
+
+    present = sorted({month for values in columns.values() for month in values})
+    if not present:
+        return [], [], np.empty((0, 0)), np.zeros(0, dtype=bool)
+    axis = np.arange(np.datetime64(present[0], 'M'), np.datetime64(present[-1], 'M') + 1)
+    months = [str(m) for m in axis]
+
+    labels = list(currencies) + sorted(label for label in columns if label not in currencies)
+    levels = np.array([[columns.get(label, {}).get(month, np.nan) for label in labels] for month in months])
+    inverted = np.array([label in currencies for label in labels])
+    return labels, months, levels, inverted
+
+def monthly_returns(levels, inverted):
+    """Month-over-month log returns; row t is the move into month t + 1"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(levels), axis=0)
+    returns[:, inverted] *= -1
+    return returns
+
+def correlation_matrices(windows, min_periods=3):
+    """
+    Pairwise-complete Pearson correlations for a stack of windows
+    windows has shape (K, W, N); returns (K, N, N). Each pair uses the months
+    where both series have a return; pairs with fewer than min_periods are NaN.
+    """
+
+    mask = ~np.isnan(windows)
+    x = np.where(mask, windows, 0.0)
+    m = mask.astype(np.float64)
+    xt = x.transpose(0, 2, 1)
+
+    n = m.transpose(0, 2, 1) @ m          # months where both i and j are present
+    sx = xt @ m                           # sum of x_i over those months
+    sxx = (xt * xt) @ m
+    sxy = xt @ x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sx.transpose(0, 2, 1) / n
+        var = sxx - sx * sx / n
+        corr = cov / np.sqrt(var * var.transpose(0, 2, 1))
+    corr[n < min_periods] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+def _window_key(window_returns):
+    return hashlib.sha256(np.ascontiguousarray(window_returns).tobytes()).hexdigest()[:16]
+
+def rolling_correlations(labels, months, returns, window=DEFAULT_WINDOW, min_periods=None,
+                         cache_dir=CACHE_DIR):
+    """
+    Correlation matrix for every trailing window of monthly returns
+    Returns (end_months, K x N x N) and the number of windows computed (not cached).
+    Cached windows are keyed by their data, so a revised month only recomputes
+    the windows that contain it.
+    """
+
+    min_periods = min_periods or max(3, window * 2 // 3)
+    if len(returns) < window:
+        return [], np.empty((0, len(labels), len(labels))), 0
+    windows = sliding_window_view(returns, window, axis=0).transpose(0, 2, 1)
+    end_months = months[window:]
+
+    directory = None
+    if cache_dir:
+        signature = hashlib.sha256('\n'.join(labels).encode()).hexdigest()[:12]
+        directory = os.path.join(cache_dir, f"w{window}-p{min_periods}-{signature}")
+        os.makedirs(directory, exist_ok=True)
+
+    result = np.empty((len(windows), len(labels), len(labels)))
+    missing = []
+    paths = []
+    for k, month in enumerate(end_months):
+        path = os.path.join(directory, f"{month}-{_window_key(windows[k])}.npy") if directory else None
+        paths.append(path)
+        if path and os.path.exists(path):
+            result[k] = np.load(path)
+        else:
+            missing.append(k)
+
+    if missing:
+        result[missing] = correlation_matrices(windows[missing], min_periods)
+        for k in missing:
+            if directory:
+                # Drop the entry for this month computed from older data
+                for name in os.listdir(directory):
+                    if name.startswith(end_months[k] + '-'):
+                        os.remove(os.path.join(directory, name))
+                np.save(paths[k], result[k])
+    return end_months, result, len(missing)
+
+def top_pairs(labels, corr, count=DEFAULT_TOP):
+    """Strongest currency-versus-commodity/food pairs in one matrix, by |correlation|"""
+    currency = np.array([':' not in label for label in labels])
+    i, j = np.nonzero(currency[:, None] & ~currency[None, :] & ~np.isnan(corr))
+    order = np.argsort(-np.abs(corr[i, j]))[:count]
+    return [(labels[i[k]], labels[j[k]], float(corr[i[k], j[k]])) for k in order]
+
+def _clean(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 6)
+
+@instrumented
+def generate_comovement(store=None, window=DEFAULT_WINDOW, basis='average', min_periods=None,
+                        top=DEFAULT_TOP, cache_dir=CACHE_DIR, pair=None):
+    """Compute rolling co-movement matrices and save the latest one to data/summaries"""
+
+    print("\n" + "="*60)
+    print("🔗 CURRENCY / COMMODITY CO-MOVEMENT")
+    print("="*60)
+
+    labels, months, levels, inverted = build_panel(store, basis)
+    unknown = [name for name in pair or [] if name not in labels]
+    if unknown:
+        print(f"❌ Unknown series: {', '.join(unknown)} (currency codes, commodity:<name> or food:<index>)")
+        return None
+    returns = monthly_returns(levels, inverted) if len(months) > 1 else np.empty((0, len(labels)))
+    # One cache per basis, so switching between them does not evict the other
+    end_months, matrices, computed = rolling_correlations(labels, months, returns, window, min_periods,
+                                                          os.path.join(cache_dir, basis) if cache_dir else None)
+    if not end_months:
+        print(f"⚠️ Need more than {window} months of data for a {window}-month window "
+              f"({len(months)} month(s) available)")
+        return None
+
+    print(f"📅 {months[0]} to {months[-1]}: {len(labels)} series, {len(end_months)} window(s) "
+          f"of {window} months ({computed} computed, {len(end_months) - computed} cached)")
+
+    if pair:
+        a, b = (labels.index(code) for code in pair)
+        print(f"\n📈 Rolling {window}-month correlation {pair[0]} vs {pair[1]}:")
+        for month, value in zip(end_months, matrices[:, a, b]):
+            print(f"  {month}: " + ("   n/a" if np.isnan(value) else f"{value:+.3f}"))
+
+    latest = matrices[-1]
+    strongest = top_pairs(labels, latest, top)
+    if strongest:
+        print(f"\n🔝 Strongest co-movements, window ending {end_months[-1]}:")
+        for currency, series, value in strongest:
+            print(f"  {currency:<5} {series:<35} {value:+.3f}")
+    else:
+        print("\n⚠️ No currency-commodity pair has enough overlapping months yet")
+
+    record = {
+        'generated': datetime.now().isoformat(),
+        'as_of': end_months[-1],
+        'window_months': window,
+        'basis': basis,
+        'series': labels,
+        'correlation': {a: {b: _clean(latest[i, j]) for j, b in enumerate(labels)}
+                        for i, a in enumerate(labels)},
+        'top_pairs': [{'currency': c, 'series': s, 'correlation': round(v, 6)} for c, s, v in strongest],
+    }
+    os.makedirs('data/summaries', exist_ok=True)
+    output_file = f"data/summaries/comovement_{end_months[-1]}.json"
+    with open(output_file, 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"\n💾 Co-movement saved: {output_file}")
+    return record
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Rolling correlations across currencies and commodities")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Window in months (default: %(default)s)")
+    parser.add_argument('--basis', choices=('average', 'end'), default='average',
+                        help="Resample currencies by monthly average or month-end rate")
+    parser.add_argument('--min-periods', type=int, help="Fewest overlapping months per pair (default: 2/3 of the window)")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    parser.add_argument('--pair', nargs=2, metavar=('A', 'B'),
+                        help="Print one pair's rolling correlation, e.g. ZAR commodity:gold")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every window")
+    args = parser.parse_args()
+
+    record = generate_comovement(window=args.window, basis=args.basis, min_periods=args.min_periods,
+                                 top=args.top, cache_dir=None if args.no_cache else CACHE_DIR,
+                                 pair=args.pair)
+    return 0 if record else 1
+
+if __name__ == "__main__":
+    exit(main())
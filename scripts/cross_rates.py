@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Cross-Rate Calculator
+Builds full N x N cross-rate matrices from the USD-based history store
+Pairs are quoted BASE/QUOTE = units of QUOTE per 1 unit of BASE
+"""
+
+import argparse
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from history_store import STORE_DIR, HistoryStore, open_store
+
+CROSS_DIR = "data/cross_rates"
+CROSS_DTYPE = np.dtype('<f4')
+
+def with_base(currencies, matrix, base='USD'):
+    """Add the base currency as a column of ones if the store does not carry it"""
+    if base in currencies:
+        return list(currencies), matrix
+    ones = np.ones(matrix.shape[:-1] + (1,), dtype=matrix.dtype)
+    return list(currencies) + [base], np.concatenate([matrix, ones], axis=-1)
+
+def cross_matrix(rates):
+    """
+    Cross rates from base-currency rates in one vectorized step
+    rates has shape (..., N) in units per base; the result has shape (..., N, N)
+    with result[..., i, j] = units of currency j per 1 unit of currency i
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rates[..., None, :] / rates[..., :, None]
+
+class CrossRates:
+    """Cross-rate lookups over the history store with an LRU cache of recent dates"""
+
+    def __init__(self, store=None, cache_size=64):
+        self.store = store if store is not None else open_store()
+        self.base = self.store.meta.get('base_currency', 'USD')
+        self.currencies = self.store.currencies
+        if self.base not in self.currencies:
+            self.currencies.append(self.base)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._index = {code: i for i, code in enumerate(self.currencies)}
+
+    def position(self, code):
+        """Row/column of a currency in the cross matrices"""
+        if code not in self._index:
+            raise KeyError(f"Unknown currency: {code}")
+        return self._index[code]
+
+    def matrix(self, date):
+        """N x N cross matrix for one date (cached)"""
+        if date in self._cache:
+            self._cache.move_to_end(date)
+            return self._cache[date]
+
+        row = self.store.row_index(date)
+        if row is None:
+            raise KeyError(f"No rates stored for {date}")
+        _, _, rates = self.store.read_range(date, date)
+        _, rates = with_base(self.store.currencies, rates[0], self.base)
+        result = cross_matrix(rates)
+
+        self._cache[date] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def matrices(self, start=None, end=None):
+        """Cross matrices for every stored date in a range: (dates, T x N x N array)"""
+        dates, _, rates = self.store.read_range(start, end)
+        _, rates = with_base(self.store.currencies, rates, self.base)
+        return dates, cross_matrix(rates)
+
+    def pair(self, base, quote, date=None):
+        """One cross rate, e.g. pair('INR', 'BRL') = BRL per INR on the latest date"""
+        date = date or self.store.latest_date
+        return float(self.matrix(date)[self.position(base), self.position(quote)])
+
+    def pair_series(self, base, quote, start=None, end=None):
+        """A cross-rate time series without building full matrices"""
+        dates, _, rates = self.store.read_range(start, end)
+        _, rates = with_base(self.store.currencies, rates, self.base)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            series = rates[:, self.position(quote)] / rates[:, self.position(base)]
+        return dates, series
+
+# ----------------------------------------------------------------------
+# Compact binary persistence
+# ----------------------------------------------------------------------
+
+def persist_cross_matrices(start=None, end=None, out_dir=CROSS_DIR, store=None):
+    """
+    Write daily cross matrices as one float32 .npy per year plus a JSON index
+    Each file loads with mmap, so a single day is one slice, not a full read.
+    Every year touched by start..end is rewritten in full.
+    """
+
+    calc = CrossRates(store)
+    dates = calc.store.dates
+    if start:
+        dates = [d for d in dates if d >= start]
+    if end:
+        dates = [d for d in dates if d <= end]
+    os.makedirs(out_dir, exist_ok=True)
+
+    years = sorted({d[:4] for d in dates})
+    for year in years:
+        year_dates, matrices = calc.matrices(f"{year}-01-01", f"{year}-12-31")
+        np.save(os.path.join(out_dir, f"cross_{year}.npy"), matrices.astype(CROSS_DTYPE))
+        with open(os.path.join(out_dir, f"cross_{year}.json"), 'w') as f:
+            json.dump({'dates': year_dates, 'currencies': calc.currencies}, f)
+    return years
+
+def load_persisted_pair(base, quote, date, out_dir=CROSS_DIR):
+    """Read one cross rate from the persisted binary matrices"""
+    index_path = os.path.join(out_dir, f"cross_{date[:4]}.json")
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    matrices = np.load(os.path.join(out_dir, f"cross_{date[:4]}.npy"), mmap_mode='r')
+    row = index['dates'].index(date)
+    currencies = index['currencies']
+    return float(matrices[row, currencies.index(base), currencies.index(quote)])
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Cross rates from the USD-based history store")
+    parser.add_argument('--store', default=STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    pair = sub.add_parser('pair', help="Print a cross rate (units of QUOTE per BASE)")
+    pair.add_argument('base')
+    pair.add_argument('quote')
+    pair.add_argument('--start')
+    pair.add_argument('--end')
+
+    matrix = sub.add_parser('matrix', help="Print the cross matrix for a date")
+    matrix.add_argument('--date')
+    matrix.add_argument('--currencies', help="Comma-separated subset to show")
+
+    persist = sub.add_parser('persist', help="Write binary daily cross matrices")
+    persist.add_argument('--start')
+    persist.add_argument('--end')
+    persist.add_argument('--out', default=CROSS_DIR)
+
+    args = parser.parse_args()
+    calc = CrossRates(HistoryStore(args.store) if os.path.exists(args.store) else None)
+
+    if args.command == 'pair':
+        if args.start or args.end:
+            dates, series = calc.pair_series(args.base, args.quote, args.start, args.end)
+            print(f"Date,{args.base}/{args.quote}")
+            for d, v in zip(dates, series):
+                print(f"{d},{'' if np.isnan(v) else repr(float(v))}")
+        else:
+            date = calc.store.latest_date
+            print(f"{args.base}/{args.quote} on {date}: {calc.pair(args.base, args.quote, date):.6f}")
+        return 0
+
+    if args.command == 'matrix':
+        date = args.date or calc.store.latest_date
+        full = calc.matrix(date)
+        codes = args.currencies.split(',') if args.currencies else calc.currencies
+        idx = [calc.position(c) for c in codes]
+        print(f"📅 Cross rates on {date} (row = base, column = quote)")
+        print(" " * 5 + "".join(f"{c:>12}" for c in codes))
+        for c, i in zip(codes, idx):
+            print(f"{c:<5}" + "".join(f"{full[i, j]:>12.6g}" for j in idx))
+        return 0
+
+    years = persist_cross_matrices(args.start, args.end, args.out, calc.store)
+    print(f"💾 Wrote cross matrices for {', '.join(years) or 'no dates'} to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
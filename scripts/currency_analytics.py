@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Currency Volatility Analytics
+Rolling returns, volatility, drawdown and spike detection for every currency
+at once, computed with NumPy over the date x currency history matrix
+"""
+
+import argparse
+import json
+import os
+import warnings
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from history_store import day_to_date, open_store
+from metrics import instrumented
+
+DEFAULT_WINDOWS = (5, 20, 60)
+DEFAULT_Z_THRESHOLD = 3.0
+TRADING_DAYS = 252
+
+def log_returns(matrix):
+    """Daily log returns; row t is the move from t-1 to t (NaN where either side is missing)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(matrix), axis=0)
+
+def rolling_stats(returns, window):
+    """
+    Rolling mean and sample std of returns over a trailing window, for all columns
+    Returns two arrays shaped (rows - window + 1, columns); windows with fewer
+    than two observations are NaN
+    """
+    if len(returns) < window:
+        empty = np.full((0, returns.shape[1]), np.nan)
+        return empty, empty
+    windows = sliding_window_view(returns, window, axis=0)
+    counts = np.sum(~np.isnan(windows), axis=-1)
+    # nanmean/nanstd warn on all-NaN windows; those are masked below anyway
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(windows, axis=-1)
+        std = np.nanstd(windows, axis=-1, ddof=1)
+    std[counts < 2] = np.nan
+    return mean, std
+
+def max_drawdown(matrix):
+    """
+    Largest peak-to-trough fall in each currency's USD value over the matrix
+    Rates are quoted per USD, so a currency's value is 1 / rate
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 1.0 / matrix
+        peak = np.fmax.accumulate(value, axis=0)
+        drawdown = value / peak - 1.0
+    # fmin skips missing days; a column with no data stays NaN
+    return np.fmin.reduce(drawdown, axis=0)
+
+def compute_analytics(matrix, windows=DEFAULT_WINDOWS, z_threshold=DEFAULT_Z_THRESHOLD):
+    """
+    Compute analytics for every column of a rate matrix
+    Returns a dict of 1-D arrays (one value per currency) keyed by metric name
+    """
+
+    returns = log_returns(matrix)
+    latest = matrix[-1]
+    result = {'latest_rate': latest, 'max_drawdown': max_drawdown(matrix)}
+
+    for window in windows:
+        if len(matrix) > window:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[f'return_{window}d'] = latest / matrix[-1 - window] - 1.0
+        else:
+            result[f'return_{window}d'] = np.full(matrix.shape[1], np.nan)
+        _, std = rolling_stats(returns[-window:], window)
+        vol = std[-1] if len(std) else np.full(matrix.shape[1], np.nan)
+        result[f'volatility_{window}d'] = vol
+        result[f'annualized_volatility_{window}d'] = vol * np.sqrt(TRADING_DAYS)
+
+    # Spike: today's return against the mean/std of the preceding window
+    window = max(windows)
+    if len(returns) > window:
+        mean, std = rolling_stats(returns[-1 - window:-1], window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (returns[-1] - mean[-1]) / std[-1]
+    else:
+        z = np.full(matrix.shape[1], np.nan)
+    result['zscore'] = z
+    result['spike'] = np.abs(z) > z_threshold
+
+    return result
+
+def _clean(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    value = float(value)
+    return None if np.isnan(value) or np.isinf(value) else round(value, 8)
+
+@instrumented
+def generate_currency_analytics(store=None, windows=DEFAULT_WINDOWS,
+                                z_threshold=DEFAULT_Z_THRESHOLD, lookback=365):
+    """Compute rolling analytics from the history store and save them to data/summaries"""
+
+    print("\n" + "="*60)
+    print("📉 CURRENCY VOLATILITY ANALYTICS")
+    print("="*60)
+
+    if store is None:
+        store = open_store()
+
+    if len(store) < 2:
+        print("⚠️ Not enough currency history for analytics yet")
+        return None
+
+    # Only the trailing lookback rows are read from the store
+    start_row = max(0, len(store) - max(lookback, max(windows) + 2))
+    start_date = day_to_date(store.days[start_row])
+    dates, currencies, matrix = store.read_range(start=start_date)
+
+    metrics = compute_analytics(matrix, windows, z_threshold)
+
+    per_currency = {
+        code: {name: _clean(values[i]) for name, values in metrics.items()}
+        for i, code in enumerate(currencies)
+    }
+    spikes = [code for code in currencies if per_currency[code]['spike']]
+
+    analytics = {
+        'generated': datetime.now().isoformat(),
+        'as_of': dates[-1],
+        'period_start': dates[0],
+        'base_currency': store.meta['base_currency'],
+        'windows': list(windows),
+        'z_threshold': z_threshold,
+        'currencies': per_currency,
+        'spikes': spikes,
+    }
+
+    os.makedirs('data/summaries', exist_ok=True)
+    analytics_file = f"data/summaries/currency_analytics_{dates[-1]}.json"
+    with open(analytics_file, 'w') as f:
+        json.dump(analytics, f, indent=2)
+
+    window = max(windows)
+    print(f"📅 {dates[0]} to {dates[-1]} ({len(dates)} days, {len(currencies)} currencies)")
+    print(f"\n📊 Annualized {window}-day volatility:")
+    print("-"*60)
+    ranked = sorted(currencies, key=lambda c: -(per_currency[c][f'annualized_volatility_{window}d'] or 0))
+    for code in ranked:
+        vol = per_currency[code][f'annualized_volatility_{window}d']
+        dd = per_currency[code]['max_drawdown']
+        if vol is not None and dd is not None:
+            print(f"  {code}: {vol:7.2%}   max drawdown {dd:7.2%}")
+
+    if spikes:
+        print(f"\n🚨 Spikes (|z| > {z_threshold}): " + ", ".join(
+            f"{code} (z={per_currency[code]['zscore']:.1f})" for code in spikes))
+    else:
+        print(f"\n✅ No spikes beyond {z_threshold} standard deviations")
+
+    print(f"\n💾 Analytics saved: {analytics_file}")
+    return analytics
+
+def main():
+    """Main execution function"""
+
+    parser = argparse.ArgumentParser(description="Rolling currency volatility analytics")
+    parser.add_argument('--windows', default=','.join(map(str, DEFAULT_WINDOWS)),
+                        help="Comma-separated rolling windows in trading days")
+    parser.add_argument('--z-threshold', type=float, default=DEFAULT_Z_THRESHOLD)
+    parser.add_argument('--lookback', type=int, default=365,
+                        help="Trading days of history to read (drawdown period)")
+    args = parser.parse_args()
+
+    windows = tuple(sorted(int(w) for w in args.windows.split(',')))
+    generate_currency_analytics(windows=windows, z_threshold=args.z_threshold, lookback=args.lookback)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
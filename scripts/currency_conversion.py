@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Currency Conversion Engine
+Converts arrays of (date, amount, from, to) at each day's rate in one
+vectorized pass over the USD-based history store. Dates are located with a
+searchsorted lookup on the store's day index; days without a stored rate
+(weekends, holidays, gaps) are filled by policy:
+
+  previous     - the last stored rate on or before the date (previous business day)
+  interpolate  - linear in time between the stored rates either side, when
+                 they are at most max_gap_days apart
+  exact        - only stored days; anything else is NaN
+
+Also turns the monthly commodity prices and FAO indices into local-currency series.
+"""
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from cross_rates import with_base
+from history_store import open_store
+
+FILL_POLICIES = ('previous', 'interpolate', 'exact')
+# A filled rate older than this many days is treated as missing
+DEFAULT_MAX_GAP_DAYS = 7
+
+def to_days(dates):
+    """ISO date strings, datetime64 values or day numbers -> int64 days since 1970-01-01"""
+    values = np.asarray(dates)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    return values.astype('datetime64[D]').astype(np.int64)
+
+class Converter:
+    """Vectorized conversions between any two currencies in the history store"""
+
+    def __init__(self, store=None, fill='previous', max_gap_days=DEFAULT_MAX_GAP_DAYS):
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy {fill}; choose from {', '.join(FILL_POLICIES)}")
+        self.store = store if store is not None else open_store()
+        self.fill = fill
+        self.max_gap_days = max_gap_days
+
+        base = self.store.meta.get('base_currency', 'USD')
+        _, _, rates = self.store.read_range()
+        self.currencies, self.rates = with_base(self.store.currencies, rates, base)
+        self.days = self.store.days.astype(np.int64)
+        self._index = {code: i for i, code in enumerate(self.currencies)}
+
+        # Per column: the last stored row at or before each row, and the next one
+        # at or after it (-1 / len when there is none). Built once, so each lookup
+        # is a searchsorted plus fancy indexing.
+        rows = len(self.days)
+        valid = ~np.isnan(self.rates)
+        positions = np.arange(rows)[:, None]
+        self._prev_valid = np.maximum.accumulate(np.where(valid, positions, -1), axis=0)
+        self._next_valid = np.minimum.accumulate(np.where(valid, positions, rows)[::-1], axis=0)[::-1]
+
+    def positions(self, codes):
+        """Column of each currency code (array-like or scalar)"""
+        codes = np.asarray(codes)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        unknown = [str(c) for c in unique if c not in self._index]
+        if unknown:
+            raise KeyError(f"Unknown currencies: {', '.join(unknown)}")
+        return np.array([self._index[c] for c in unique], dtype=np.intp)[inverse].reshape(codes.shape)
+
+    def rates_at(self, days, columns):
+        """Units per base currency for each (day, column) pair, filled by the policy"""
+
+        days, columns = np.broadcast_arrays(np.asarray(days, dtype=np.int64), columns)
+        rows = len(self.days)
+        result = np.full(days.shape, np.nan)
+        if rows == 0:
+            return result
+
+        # Last stored row on or before each day
+        pos = np.searchsorted(self.days, days, side='right') - 1
+        pos_c = np.clip(pos, 0, rows - 1)
+
+        if self.fill == 'exact':
+            hit = (pos >= 0) & (self.days[pos_c] == days)
+            return np.where(hit, self.rates[pos_c, columns], np.nan)
+
+        left = np.where(pos >= 0, self._prev_valid[pos_c, columns], -1)
+        has_left = left >= 0
+        left_c = np.clip(left, 0, rows - 1)
+        left_day = self.days[left_c]
+        result = np.where(has_left, self.rates[left_c, columns], np.nan)
+        if self.max_gap_days is not None:
+            result[has_left & (days - left_day > self.max_gap_days)] = np.nan
+
+        if self.fill == 'interpolate':
+            after = np.clip(pos + 1, 0, rows - 1)
+            right = np.where(pos + 1 < rows, self._next_valid[after, columns], rows)
+            has_right = right < rows
+            right_c = np.clip(right, 0, rows - 1)
+            right_day = self.days[right_c]
+            between = has_left & has_right & (left_day < days)
+            if self.max_gap_days is not None:
+                # Only bridge short gaps; across a longer one the previous-rate fill applies
+                between &= (right_day - left_day) <= self.max_gap_days
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weight = (days - left_day) / (right_day - left_day)
+                interpolated = self.rates[left_c, columns] + weight * (
+                    self.rates[right_c, columns] - self.rates[left_c, columns])
+            result = np.where(between, interpolated, result)
+        return result
+
+    def convert(self, dates, amounts, from_codes, to_codes):
+        """
+        Convert amounts from one currency to another at each date's rate
+        Every argument may be an array or a scalar (broadcast); returns float64
+        with NaN where either rate is unavailable under the fill policy
+        """
+        days = to_days(dates)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        source = self.rates_at(days, self.positions(from_codes))
+        target = self.rates_at(days, self.positions(to_codes))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return amounts / source * target
+
+    def monthly_rates(self, months, code, basis='average'):
+        """
+        One rate per YYYY-MM month for a currency
+        average - mean of the rates stored within the month (the Pink Sheet and
+                  FAO figures are monthly averages); end - the rate on the
+                  month's last day under the fill policy
+        """
+        month_ids = np.asarray(months, dtype='datetime64[M]')
+        column = self.positions(code)
+        if basis == 'end':
+            last_days = ((month_ids + 1).astype('datetime64[D]') - 1).astype(np.int64)
+            return self.rates_at(last_days, column)
+
+        stored = self.days.astype('datetime64[D]').astype('datetime64[M]')
+        values = self.rates[:, column]
+        keep = ~np.isnan(values)
+        slots = np.searchsorted(month_ids, stored[keep])
+        slots_c = np.clip(slots, 0, max(len(month_ids) - 1, 0))
+        matched = (slots < len(month_ids)) & (month_ids[slots_c] == stored[keep])
+        totals = np.bincount(slots[matched], weights=values[keep][matched], minlength=len(month_ids))
+        counts = np.bincount(slots[matched], minlength=len(month_ids))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return totals / counts
+
+# ----------------------------------------------------------------------
+# Local-currency monthly series
+# ----------------------------------------------------------------------
+
+def local_unit(unit, code):
+    """('$/mt', 'NGN') -> (1.0, 'NGN/mt'); US cents become whole local units"""
+    if unit and unit.startswith('¢'):
+        return 0.01, code + unit[1:]
+    if unit and unit.startswith('$'):
+        return 1.0, code + unit[1:]
+    return 1.0, unit
+
+def monthly_local_series(currencies, converter=None, basis='average', include_food=True):
+    """
+    Monthly commodity prices (and FAO indices) expressed in local currencies
+    Returns a list of dicts: month, series, currency, usd_value, rate, local_value, unit.
+    FAO indices are unit-less, so they are rebased: the local index equals the
+    USD index in the first month with a rate and moves with the currency after.
+    """
+
+    from monthly_series import load_commodity_months, load_food_months
+
+    converter = converter or Converter()
+    prices, info = load_commodity_months()
+    food = load_food_months()[0] if include_food else {}
+    months = sorted(set(prices) | set(food))
+    if not months:
+        return []
+
+    records = []
+    for code in currencies:
+        rates = converter.monthly_rates(months, code, basis)
+        rate_of = dict(zip(months, rates))
+        first_rate = next((r for r in rates if not np.isnan(r)), np.nan)
+
+        for month in months:
+            rate = rate_of[month]
+            for name, value in sorted(prices.get(month, {}).items()):
+                if value is None:
+                    continue
+                factor, unit = local_unit(info.get(name, {}).get('unit'), code)
+                records.append({'month': month, 'series': f"commodity_{name}", 'currency': code,
+                                'usd_value': value, 'rate': rate,
+                                'local_value': value * factor * rate, 'unit': unit})
+            for name, value in sorted(food.get(month, {}).items()):
+                if value is None:
+                    continue
+                records.append({'month': month, 'series': f"food_{name}", 'currency': code,
+                                'usd_value': value, 'rate': rate,
+                                'local_value': value * rate / first_rate, 'unit': 'index (rebased)'})
+    return records
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def read_conversion_rows(stream):
+    """CSV with date, amount, from, to columns -> (fieldnames, rows, column arrays)"""
+    reader = csv.DictReader(stream)
+    rows = list(reader)
+    columns = {key: np.array([row[key] for row in rows]) for key in ('date', 'amount', 'from', 'to')}
+    return reader.fieldnames, rows, columns
+
+def run_command(args, converter):
+    """Run one subcommand; unknown currency codes raise KeyError"""
+
+    if args.command == 'convert':
+        date = args.date or converter.store.latest_date
+        value = converter.convert(date, args.amount, args.source, args.target)
+        print(f"{args.amount:g} {args.source} = {float(value):.6f} {args.target} on {date} ({args.fill})")
+        return 0 if not np.isnan(value) else 1
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        writer = csv.writer(out)
+        if args.command == 'batch':
+            source = sys.stdin if args.input == '-' else open(args.input, 'r', newline='')
+            with source:
+                fieldnames, rows, columns = read_conversion_rows(source)
+            converted = converter.convert(columns['date'], columns['amount'].astype(np.float64),
+                                          columns['from'], columns['to'])
+            writer.writerow(fieldnames + ['converted'])
+            for row, value in zip(rows, converted):
+                writer.writerow([row[key] for key in fieldnames] + ['' if np.isnan(value) else repr(float(value))])
+            missing = int(np.isnan(converted).sum())
+        else:
+            records = monthly_local_series(args.currencies.split(','), converter, args.basis, not args.no_food)
+            fields = ['month', 'series', 'currency', 'usd_value', 'rate', 'local_value', 'unit']
+            writer.writerow(fields)
+            for record in records:
+                writer.writerow(['' if isinstance(record[k], float) and np.isnan(record[k]) else record[k]
+                                 for k in fields])
+            missing = sum(1 for r in records if np.isnan(r['local_value']))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if missing:
+        print(f"⚠️ {missing} row(s) had no rate under the '{args.fill}' fill policy", file=sys.stderr)
+    return 0
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Convert amounts between currencies at historical rates")
+    parser.add_argument('--fill', choices=FILL_POLICIES, default='previous')
+    parser.add_argument('--max-gap-days', type=int, default=DEFAULT_MAX_GAP_DAYS,
+                        help="Treat a filled rate older than this as missing (default: %(default)s)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    batch = sub.add_parser('batch', help="Convert a CSV of date,amount,from,to rows")
+    batch.add_argument('input', help="Input CSV ('-' for stdin)")
+    batch.add_argument('--output', '-o', default='-')
+
+    one = sub.add_parser('convert', help="Convert one amount")
+    one.add_argument('amount', type=float)
+    one.add_argument('source')
+    one.add_argument('target')
+    one.add_argument('--date', help="Date (default: latest stored)")
+
+    monthly = sub.add_parser('monthly', help="Commodity and FAO series in local currencies")
+    monthly.add_argument('--currencies', required=True, help="Comma-separated codes, e.g. ZAR,INR")
+    monthly.add_argument('--basis', choices=('average', 'end'), default='average')
+    monthly.add_argument('--no-food', action='store_true')
+    monthly.add_argument('--output', '-o', default='-')
+
+    args = parser.parse_args()
+    converter = Converter(fill=args.fill, max_gap_days=args.max_gap_days)
+    try:
+        return run_command(args, converter)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader (e.g. head) closed stdout early
+        sys.stderr.close()
+        return 0
+
+if __name__ == "__main__":
+    exit(main())
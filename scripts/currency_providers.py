@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Currency Rate Providers
+Queries several USD-based rate sources concurrently and merges them per
+currency by provider priority, recording which provider supplied each rate.
+The snapshot date is the highest-priority provider's. A fallback dated after
+it is asked for that date where the source keeps dated rates; otherwise its
+latest rates fill missing currencies only if at most MAX_FALLBACK_LEAD_DAYS
+newer (the 06:00 UTC run sees ECB's previous business day next to today's
+fallback rates), each keeping its own provenance date.
+Each provider's list of supported symbols is cached so a source is never
+asked for currencies it does not carry.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_cls, datetime, timezone
+
+from http_fetch import fetch
+
+CAPABILITY_FILE = ".cache/providers/capabilities.json"
+CAPABILITY_TTL = 7 * 24 * 3600
+# A fallback's latest rates may be this many days newer than the snapshot date
+MAX_FALLBACK_LEAD_DAYS = 1
+
+class Provider:
+    """A source of latest USD-based rates"""
+
+    name = None
+    default_url = None
+    # True if one request returns every symbol the source carries
+    returns_all = False
+    # True if the source serves rates for a given past date (on())
+    dated = False
+
+    def __init__(self, base_url=None, priority=0, timeout=15):
+        self.base_url = (base_url or self.default_url).rstrip('/')
+        self.priority = priority
+        self.timeout = timeout
+
+    def symbols(self):
+        """Symbols the source carries, or None if it has no listing endpoint"""
+        return None
+
+    def latest(self, symbols):
+        """Return (date, {code: rate per USD}) for the requested symbols"""
+        raise NotImplementedError
+
+    def on(self, date, symbols):
+        """Return (date, {code: rate per USD}) as published for a date"""
+        raise NotImplementedError
+
+class Frankfurter(Provider):
+    """ECB reference rates via the Frankfurter API"""
+
+    name = 'frankfurter'
+    default_url = "https://api.frankfurter.dev/v1"
+
+    def symbols(self):
+        response = fetch(f"{self.base_url}/currencies", ttl=CAPABILITY_TTL, timeout=self.timeout)
+        return set(response.json())
+
+    def latest(self, symbols):
+        # Always revalidate; an unchanged payload costs a 304 instead of a download
+        params = {'base': 'USD', 'symbols': ','.join(sorted(symbols))}
+        data = fetch(f"{self.base_url}/latest", params=params, ttl=0, timeout=self.timeout).json()
+        return data['date'], data['rates']
+
+class OpenExchangeRates(Provider):
+    """open.er-api.com: daily rates for ~160 currencies, no key required"""
+
+    name = 'open_er_api'
+    default_url = "https://open.er-api.com/v6"
+    returns_all = True
+
+    def latest(self, symbols):
+        # The source updates once a day; reuse the payload for an hour
+        data = fetch(f"{self.base_url}/latest/USD", ttl=3600, timeout=self.timeout).json()
+        if data.get('result') != 'success':
+            raise ValueError(f"{self.name} returned {data.get('result')}: {data.get('error-type')}")
+        date = datetime.fromtimestamp(data['time_last_update_unix'], timezone.utc).date().isoformat()
+        return date, data['rates']
+
+class CurrencyApi(Provider):
+    """
+    fawazahmed0/currency-api on the jsDelivr CDN: daily rates, lower-case codes
+    Every day is published as its own package version; {version} in the base
+    URL is 'latest' or a YYYY-MM-DD date
+    """
+
+    name = 'currency_api'
+    default_url = "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@{version}/v1"
+    returns_all = True
+    dated = True
+
+    def _url(self, version):
+        return self.base_url.replace('{version}', version)
+
+    def symbols(self):
+        response = fetch(f"{self._url('latest')}/currencies.json", ttl=CAPABILITY_TTL, timeout=self.timeout)
+        return {code.upper() for code in response.json()}
+
+    def _rates(self, version, ttl):
+        data = fetch(f"{self._url(version)}/currencies/usd.json", ttl=ttl, timeout=self.timeout).json()
+        return data['date'], {code.upper(): rate for code, rate in data['usd'].items()}
+
+    def latest(self, symbols):
+        return self._rates('latest', 3600)
+
+    def on(self, date, symbols):
+        # A published day never changes; keep it for a week
+        return self._rates(date, 7 * 24 * 3600)
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (Frankfurter, OpenExchangeRates, CurrencyApi)}
+DEFAULT_ORDER = ['frankfurter', 'open_er_api', 'currency_api']
+
+def make_providers(urls=None, order=DEFAULT_ORDER):
+    """
+    Build providers in priority order (first = highest)
+    urls maps provider name to a base URL override, e.g. a local stub server;
+    a provider mapped to None or 'off' is left out. currency_api URLs may hold
+    {version} to enable dated requests
+    """
+    urls = urls or {}
+    providers = []
+    for priority, name in enumerate(order):
+        url = urls.get(name, PROVIDER_CLASSES[name].default_url)
+        if url in (None, 'off'):
+            continue
+        providers.append(PROVIDER_CLASSES[name](url, priority))
+    return providers
+
+# ----------------------------------------------------------------------
+# Capability cache
+# ----------------------------------------------------------------------
+
+def load_capabilities(path=CAPABILITY_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_capabilities(capabilities, path=CAPABILITY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(capabilities, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def _cache_entry(provider, capabilities):
+    # Keyed by URL too, so a stub server never shares a listing with the real source
+    return capabilities.get(f"{provider.name} {provider.base_url}")
+
+def provider_symbols(provider, capabilities, now=None):
+    """Cached symbol list for a provider, refreshed after CAPABILITY_TTL; None if unknown"""
+
+    now = now or time.time()
+    entry = _cache_entry(provider, capabilities)
+    if entry and now - entry['checked_at'] < CAPABILITY_TTL:
+        return set(entry['symbols'])
+
+    try:
+        symbols = provider.symbols()
+    except Exception as e:
+        print(f"⚠️ {provider.name}: could not list symbols ({e})")
+        symbols = None
+    if symbols:
+        capabilities[f"{provider.name} {provider.base_url}"] = {
+            'checked_at': now, 'symbols': sorted(symbols)}
+        return symbols
+    return set(entry['symbols']) if entry else None
+
+# ----------------------------------------------------------------------
+# Fetch and merge
+# ----------------------------------------------------------------------
+
+def days_ahead(date, reference):
+    """Whole days from reference to date (negative if date is older)"""
+    return (date_cls.fromisoformat(date) - date_cls.fromisoformat(reference)).days
+
+def fetch_all(symbols, providers=None, base='USD', workers=4, capability_file=CAPABILITY_FILE):
+    """
+    Fetch the latest rates for symbols from every provider that carries any of them
+    Returns (date, rates, provenance, report):
+      date       - the date of the highest-priority provider that answered
+      rates      - {code: rate per base}, each from the highest-priority provider carrying it
+                   whose rates are at most MAX_FALLBACK_LEAD_DAYS newer than date
+      provenance - {code: {'provider', 'date'}}
+      report     - per provider: requested symbol count, returned count, date or error
+    """
+
+    providers = sorted(providers or make_providers(), key=lambda p: p.priority)
+    wanted = {code for code in symbols if code != base}
+    capabilities = load_capabilities(capability_file)
+
+    plans = {}
+    report = {}
+    for provider in providers:
+        carried = provider_symbols(provider, capabilities)
+        ask = wanted if carried is None else wanted & carried
+        if ask:
+            plans[provider.name] = (provider, ask)
+        else:
+            report[provider.name] = {'requested': 0, 'skipped': 'carries none of the symbols'}
+
+    def query(item, date=None):
+        provider, ask = item
+        try:
+            return (provider.latest(ask) if date is None else provider.on(date, ask)), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(plans)))) as pool:
+        results = dict(zip(plans, pool.map(query, plans.values())))
+
+    # The snapshot date is the first provider, by priority, that returned any wanted rate
+    date = None
+    for name, (result, _) in results.items():
+        if result is not None and set(result[1]) & plans[name][1]:
+            date = result[0]
+            break
+
+    # Fallbacks already past that date are asked for the date itself where they can be
+    ahead = [name for name, (result, _) in results.items()
+             if result is not None and date is not None and result[0] > date and plans[name][0].dated]
+    dated_errors = {}
+    if ahead:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ahead)))) as pool:
+            for name, (result, error) in zip(ahead, pool.map(lambda n: query(plans[n], date), ahead)):
+                if error is None:
+                    results[name] = (result, None)
+                else:
+                    # Not published yet: the latest rates still count if close enough
+                    dated_errors[name] = str(error)
+
+    rates, provenance = {}, {}
+    for provider in providers:
+        if provider.name not in plans:
+            continue
+        _, ask = plans[provider.name]
+        result, error = results[provider.name]
+        if error is not None:
+            report[provider.name] = {'requested': len(ask), 'error': str(error)}
+            continue
+
+        provider_date, provider_rates = result
+        if provider.returns_all and provider_rates:
+            # The full payload is the capability list; remember it for next time
+            capabilities[f"{provider.name} {provider.base_url}"] = {
+                'checked_at': time.time(), 'symbols': sorted(provider_rates)}
+
+        report[provider.name] = {'requested': len(ask), 'returned': len(set(provider_rates) & ask),
+                                 'used': 0, 'date': provider_date}
+        if provider.name in dated_errors:
+            report[provider.name]['dated_error'] = dated_errors[provider.name]
+        if date is not None and days_ahead(provider_date, date) > MAX_FALLBACK_LEAD_DAYS:
+            # Too far ahead: these rates belong to a later day
+            report[provider.name]['newer'] = True
+            continue
+
+        used = 0
+        for code in ask:
+            rate = provider_rates.get(code)
+            if rate is None or code in rates:
+                continue
+            rates[code] = rate
+            provenance[code] = {'provider': provider.name, 'date': provider_date}
+            used += 1
+        report[provider.name]['used'] = used
+
+    save_capabilities(capabilities, capability_file)
+    return date, dict(sorted(rates.items())), dict(sorted(provenance.items())), report
+
+def parse_provider_urls(values):
+    """['frankfurter=http://127.0.0.1:8001', 'currency_api=off'] -> dict"""
+    urls = {}
+    for value in values or []:
+        name, _, url = value.partition('=')
+        if name not in PROVIDER_CLASSES:
+            raise ValueError(f"Unknown provider {name}; choose from {', '.join(PROVIDER_CLASSES)}")
+        urls[name] = url
+    return urls
+
+def main():
+    """Command line entry point"""
+
+    from fetch_currency_rates import CURRENCIES
+
+    parser = argparse.ArgumentParser(description="Fetch and merge rates from every currency provider")
+    parser.add_argument('--provider', action='append', metavar='NAME=URL',
+                        help="Override a provider's base URL ('off' disables it); repeatable")
+    parser.add_argument('--symbols', help="Comma-separated codes (default: the tracked currencies)")
+    args = parser.parse_args()
+
+    symbols = args.symbols.split(',') if args.symbols else CURRENCIES
+    date, rates, provenance, report = fetch_all(symbols, make_providers(parse_provider_urls(args.provider)))
+
+    for name, info in report.items():
+        print(f"  {name}: {info}")
+    print(f"📅 {date}: {len(rates)} of {len([s for s in symbols if s != 'USD'])} currencies")
+    for code, rate in rates.items():
+        print(f"  {code}: {rate:<14g} {provenance[code]['provider']} ({provenance[code]['date']})")
+    missing = sorted(set(symbols) - set(rates) - {'USD'})
+    if missing:
+        print(f"⚠️ Not carried by any provider: {', '.join(missing)}")
+    return 0 if rates else 1
+
+if __name__ == "__main__":
+    exit(main())
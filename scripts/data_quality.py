@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Currency Data Quality Checks
+Validates each fetched snapshot before it is saved, against per-currency
+statistics of recent daily log returns kept in data/quality/state.json
+(exponentially weighted, so every check and update is O(currencies)):
+
+  jump     - |return - mean| above JUMP_SIGMAS standard deviations (e.g. a 10x scale error)
+  invalid  - a rate that is not a positive number
+  stale    - a rate unchanged for STALE_DAYS stored days
+  missing  - a currency present in recent snapshots but absent from this one
+
+Jumps and invalid rates fail the snapshot: it is written to
+data/quality/quarantine/ instead of being saved. Stale and missing rates are
+warnings. Each outcome is written to data/quality/report_<date>.json; a
+snapshot the store already holds unchanged is not checked or reported.
+The statistics only move once a snapshot has been saved (record_saved).
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime
+
+from manifest import atomic_write
+
+QUALITY_DIR = "data/quality"
+STATE_FILE = "data/quality/state.json"
+QUARANTINE_DIR = "data/quality/quarantine"
+
+JUMP_SIGMAS = 8.0
+STALE_DAYS = 5
+MIN_OBSERVATIONS = 10
+# Recent statistics: weight halves every HALF_LIFE_DAYS observations
+HALF_LIFE_DAYS = 30
+# Floor on sigma so very calm currencies don't flag ordinary moves
+MIN_SIGMA = 0.002
+SEED_DAYS = 90
+
+ALPHA = 1 - 0.5 ** (1 / HALF_LIFE_DAYS)
+
+FAILING_CHECKS = ('jump', 'invalid')
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+# ----------------------------------------------------------------------
+# Per-currency statistics
+# ----------------------------------------------------------------------
+
+def empty_state():
+    return {'last_date': None, 'currencies': {}}
+
+def fold_rate(stats, rate):
+    """Fold one day's rate into a currency's running statistics"""
+
+    last = stats.get('last_rate')
+    if last and rate > 0:
+        x = math.log(rate / last)
+        delta = x - stats['mean']
+        stats['mean'] += ALPHA * delta
+        stats['var'] = (1 - ALPHA) * (stats['var'] + ALPHA * delta * delta)
+        stats['n'] += 1
+    stats['unchanged'] = stats['unchanged'] + 1 if rate == last else 0
+    stats['last_rate'] = rate
+
+def fold_snapshot(state, date, rates):
+    for code, rate in rates.items():
+        stats = state['currencies'].setdefault(
+            code, {'n': 0, 'mean': 0.0, 'var': 0.0, 'unchanged': 0, 'last_rate': None})
+        fold_rate(stats, rate)
+    state['last_date'] = date
+
+def seed_state(store, days=SEED_DAYS):
+    """Build the statistics from the last days of the history store"""
+
+    state = empty_state()
+    if len(store) == 0:
+        return state
+    start = store.dates[max(0, len(store) - days)]
+    dates, currencies, matrix = store.read_range(start=start)
+    for date, row in zip(dates, matrix):
+        fold_snapshot(state, date, {c: float(v) for c, v in zip(currencies, row) if not math.isnan(v)})
+    return state
+
+def load_state(path=STATE_FILE, store=None):
+    """Load the cached statistics, seeding them from the history store the first time"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    if store is None:
+        from history_store import open_store
+        store = open_store()
+    return seed_state(store)
+
+# ----------------------------------------------------------------------
+# Checks
+# ----------------------------------------------------------------------
+
+def check_snapshot(state, rates, new_day=True):
+    """Return a list of issues ({'check', 'currency', 'severity', 'detail'}) for one snapshot"""
+
+    issues = []
+
+    def issue(check, code, detail):
+        severity = 'error' if check in FAILING_CHECKS else 'warning'
+        issues.append({'check': check, 'currency': code, 'severity': severity, 'detail': detail})
+
+    for code, rate in sorted(rates.items()):
+        if not isinstance(rate, (int, float)) or math.isnan(rate) or rate <= 0:
+            issue('invalid', code, f"rate {rate!r}")
+            continue
+        stats = state['currencies'].get(code)
+        if not stats or not stats['last_rate'] or not new_day:
+            continue
+
+        if stats['n'] >= MIN_OBSERVATIONS:
+            sigma = max(math.sqrt(stats['var']), MIN_SIGMA)
+            x = math.log(rate / stats['last_rate'])
+            z = (x - stats['mean']) / sigma
+            if abs(z) > JUMP_SIGMAS:
+                issue('jump', code, f"{stats['last_rate']:g} -> {rate:g} ({z:+.1f} sigma)")
+
+        if rate == stats['last_rate'] and stats['unchanged'] + 1 >= STALE_DAYS:
+            issue('stale', code, f"unchanged at {rate:g} for {stats['unchanged'] + 1} days")
+
+    for code in sorted(set(state['currencies']) - set(rates)):
+        issue('missing', code, "in recent snapshots but not in this one")
+
+    return issues
+
+def quarantine(data, issues, quarantine_dir=QUARANTINE_DIR):
+    path = os.path.join(quarantine_dir, f"{data['date']}.json")
+    _write_json(path, {'snapshot': data, 'issues': issues,
+                       'quarantined': datetime.now().isoformat()})
+    return path
+
+def validate_snapshot(data, state_path=STATE_FILE, quality_dir=QUALITY_DIR, store=None):
+    """
+    Check a fetched snapshot before it is saved
+    Returns (ok, report). A snapshot already stored unchanged passes with no
+    report file; otherwise a failing one is quarantined and the report is
+    written either way. The statistics are left alone until record_saved.
+    """
+
+    if store is None:
+        from history_store import open_store
+        store = open_store()
+    if store.is_unchanged(data['date'], data['rates']):
+        print(f"⏭️ Rates for {data['date']} already stored and unchanged - quality check skipped")
+        return True, {'date': data['date'], 'status': 'unchanged', 'issues': []}
+
+    state = load_state(state_path, store)
+    new_day = state['last_date'] is None or data['date'] > state['last_date']
+    issues = check_snapshot(state, data['rates'], new_day)
+    ok = not any(i['severity'] == 'error' for i in issues)
+
+    report = {
+        'date': data['date'],
+        'checked': datetime.now().isoformat(),
+        'status': 'passed' if ok else 'quarantined',
+        'currencies': len(data['rates']),
+        'issues': issues,
+    }
+    if ok:
+        # A later fetch of the same day passed; the earlier bad one is superseded
+        stale_quarantine = os.path.join(quality_dir, 'quarantine', f"{data['date']}.json")
+        if os.path.exists(stale_quarantine):
+            os.remove(stale_quarantine)
+    else:
+        report['quarantine_file'] = quarantine(data, issues, os.path.join(quality_dir, 'quarantine'))
+
+    report['report_file'] = os.path.join(quality_dir, f"report_{data['date']}.json")
+    _write_json(report['report_file'], report)
+    print_report(report)
+    return ok, report
+
+def record_saved(data, state_path=STATE_FILE, store=None):
+    """Fold a snapshot that has been saved into the statistics (newer days only)"""
+
+    state = load_state(state_path, store)
+    if state['last_date'] is None or data['date'] > state['last_date']:
+        fold_snapshot(state, data['date'], data['rates'])
+    elif os.path.exists(state_path):
+        return False
+    # Newly seeded statistics already cover the day; keep them
+    _write_json(state_path, state)
+    return True
+
+def print_report(report):
+    icon = '✅' if report['status'] == 'passed' else '🚫'
+    print(f"{icon} Data quality {report['status']} for {report['date']}: "
+          f"{len(report['issues'])} issue(s) across {report['currencies']} currencies")
+    for issue in report['issues']:
+        mark = '❌' if issue['severity'] == 'error' else '⚠️'
+        print(f"  {mark} {issue['check']} {issue['currency']}: {issue['detail']}")
+    if 'quarantine_file' in report:
+        print(f"  🗃️ Quarantined: {report['quarantine_file']}")
+
+def release(date, quality_dir=QUALITY_DIR):
+    """Save a quarantined snapshot after review; saving folds it into the statistics"""
+
+    from fetch_currency_rates import save_data
+
+    path = os.path.join(quality_dir, 'quarantine', f"{date}.json")
+    with open(path, 'r') as f:
+        data = json.load(f)['snapshot']
+    if not save_data(data):
+        return False
+    os.remove(path)
+    return True
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Currency snapshot data quality checks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    check = sub.add_parser('check', help="Check a snapshot JSON without saving it")
+    check.add_argument('path')
+    sub.add_parser('reseed', help="Rebuild the cached statistics from the history store")
+    sub.add_parser('list', help="List quarantined snapshots")
+    accept = sub.add_parser('release', help="Save a quarantined snapshot after review")
+    accept.add_argument('date')
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        with open(args.path, 'r') as f:
+            data = json.load(f)
+        state = load_state()
+        new_day = state['last_date'] is None or data['date'] > state['last_date']
+        issues = check_snapshot(state, data['rates'], new_day)
+        print_report({'date': data['date'], 'currencies': len(data['rates']), 'issues': issues,
+                      'status': 'failed' if any(i['severity'] == 'error' for i in issues) else 'passed'})
+        return 0
+
+    if args.command == 'reseed':
+        from history_store import open_store
+        state = seed_state(open_store())
+        _write_json(STATE_FILE, state)
+        print(f"🔄 Seeded statistics for {len(state['currencies'])} currencies up to {state['last_date']}")
+        return 0
+
+    if args.command == 'list':
+        quarantine_dir = os.path.join(QUALITY_DIR, 'quarantine')
+        names = sorted(os.listdir(quarantine_dir)) if os.path.isdir(quarantine_dir) else []
+        for name in names:
+            with open(os.path.join(quarantine_dir, name), 'r') as f:
+                entry = json.load(f)
+            checks = sorted({i['check'] for i in entry['issues'] if i['severity'] == 'error'})
+            print(f"  {name[:-5]}: {', '.join(checks)}")
+        print(f"🗃️ {len(names)} quarantined snapshot(s)")
+        return 0
+
+    return 0 if release(args.date) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Streaming Data Export
+Joins daily currency rates with the monthly commodity prices and FAO indices
+for a date range and streams the records as CSV, NDJSON or Parquet, optionally
+gzip- or zstd-compressed. Records are generated one at a time from year-sized
+slices of the history store, so memory stays bounded for any range.
+
+Monthly values are forward-filled onto daily dates: a date takes the value of
+its own month, or of the latest earlier month that has one.
+"""
+
+import argparse
+import bisect
+import contextlib
+import csv
+import gzip
+import io
+import json
+import math
+import sys
+
+from history_store import open_store
+from monthly_series import load_commodity_months, load_food_months
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+PARQUET_BATCH_ROWS = 10000
+
+class MonthlyFill:
+    """Forward-filled lookup of monthly series by daily date"""
+
+    def __init__(self, months, prefix):
+        self.columns = sorted({name for values in months.values() for name in values})
+        self.names = [prefix + name for name in self.columns]
+        self.months = sorted(months)
+        self.rows = []
+        carried = [None] * len(self.columns)
+        for month in self.months:
+            values = months[month]
+            carried = [values.get(name) if values.get(name) is not None else carried[i]
+                       for i, name in enumerate(self.columns)]
+            self.rows.append(carried)
+
+    def values(self, date):
+        """Values for the month of an ISO date (forward-filled), one per column"""
+        i = bisect.bisect_right(self.months, date[:7]) - 1
+        return self.rows[i] if i >= 0 else [None] * len(self.columns)
+
+def iter_records(start=None, end=None, currencies=None, store=None,
+                 include_commodities=True, include_food=True):
+    """
+    Yield the column names first, then one flat tuple per stored currency date
+    Currency rates are read from the history store one calendar year at a time
+    """
+
+    store = store if store is not None else open_store()
+    codes = [c for c in currencies if c in store.currencies] if currencies else store.currencies
+
+    fills = []
+    if include_commodities:
+        fills.append(MonthlyFill(load_commodity_months()[0], 'commodity_'))
+    if include_food:
+        fills.append(MonthlyFill(load_food_months()[0], 'food_'))
+
+    columns = ['date'] + list(codes) + [name for fill in fills for name in fill.names]
+    yield columns
+
+    dates = store.dates
+    if not dates:
+        return
+    first = max(start or dates[0], dates[0])
+    last = min(end or dates[-1], dates[-1])
+
+    for year in range(int(first[:4]), int(last[:4]) + 1):
+        chunk_start = max(first, f"{year}-01-01")
+        chunk_end = min(last, f"{year}-12-31")
+        chunk_dates, _, matrix = store.read_range(chunk_start, chunk_end, list(codes))
+        for date, row in zip(chunk_dates, matrix):
+            record = [date] + [None if math.isnan(v) else float(v) for v in row]
+            for fill in fills:
+                record.extend(fill.values(date))
+            yield tuple(record)
+
+# ----------------------------------------------------------------------
+# Writers
+# ----------------------------------------------------------------------
+
+def open_output(path, compression='none'):
+    """Binary output stream for a path ('-' is stdout) with optional compression"""
+
+    raw = sys.stdout.buffer if path == '-' else open(path, 'wb')
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6), raw
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression needs the zstandard package: pip install zstandard")
+        return zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=False), raw
+    return raw, raw
+
+def write_csv(records, stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(next(records))
+    count = 0
+    for record in records:
+        writer.writerow(['' if v is None else v for v in record])
+        count += 1
+    text.flush()
+    text.detach()
+    return count
+
+def write_ndjson(records, stream):
+    columns = next(records)
+    count = 0
+    for record in records:
+        stream.write(json.dumps(dict(zip(columns, record)), separators=(',', ':')).encode())
+        stream.write(b'\n')
+        count += 1
+    return count
+
+def write_parquet(records, path, compression='none'):
+    """Write row groups of PARQUET_BATCH_ROWS records; compression is applied per column chunk"""
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+    if path == '-':
+        raise ValueError("Parquet cannot be written to stdout")
+
+    columns = next(records)
+    schema = pa.schema([pa.field('date', pa.string())] + [pa.field(c, pa.float64()) for c in columns[1:]])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression=None if compression == 'none' else compression) as writer:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema))
+            count += len(batch)
+    return count
+
+def export(path, fmt='csv', compression='none', start=None, end=None, currencies=None,
+           include_commodities=True, include_food=True, store=None):
+    """Stream the joined records for a date range to path; returns the number of rows written"""
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; choose from {', '.join(FORMATS)}")
+    records = iter_records(start, end, currencies, store, include_commodities, include_food)
+
+    if fmt == 'parquet':
+        return write_parquet(records, path, compression)
+
+    stream, raw = open_output(path, compression)
+    try:
+        writer = write_csv if fmt == 'csv' else write_ndjson
+        return writer(records, stream)
+    finally:
+        if stream is not raw:
+            stream.close()
+        if raw is not sys.stdout.buffer:
+            raw.close()
+        else:
+            raw.flush()
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Export joined currency, commodity and food data")
+    parser.add_argument('--start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--compression', choices=COMPRESSIONS, default='none')
+    parser.add_argument('--currencies', help="Comma-separated currency codes (default: all)")
+    parser.add_argument('--no-commodities', action='store_true')
+    parser.add_argument('--no-food', action='store_true')
+    parser.add_argument('--output', '-o', default='-', help="Output file ('-' for stdout)")
+    args = parser.parse_args()
+
+    # Keep status lines (e.g. a first-time store build) out of stdout exports
+    with contextlib.redirect_stdout(sys.stderr):
+        store = open_store()
+
+    try:
+        rows = export(args.output, args.format, args.compression, args.start, args.end,
+                      args.currencies.split(',') if args.currencies else None,
+                      not args.no_commodities, not args.no_food, store)
+    except BrokenPipeError:
+        # The reader (e.g. head) closed stdout early
+        sys.stderr.close()
+        return 0
+    if args.output != '-':
+        print(f"💾 Exported {rows} rows to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+FAO Food Price Index Extractor
+Pulls the monthly overall index and its five sub-indices from the FAO data
+download (CSV or XLSX), falling back to the headline figures on the index page.
+Parsed results are cached by content hash so an unchanged download is never reparsed.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+FAO_PAGE_URL = "https://www.fao.org/worldfoodsituation/foodpricesindex/en/"
+FAO_CSV_URL = ("https://www.fao.org/docs/worldfoodsituationlibraries/default-document-library/"
+               "food_price_indices_data.csv")
+PARSE_CACHE_DIR = ".cache/parsed"
+PARSER_VERSION = 1
+
+# The download and the page both change monthly; revalidate twice a day
+DOWNLOAD_TTL = 12 * 3600
+
+INDICES = ['overall_index', 'cereals', 'vegetable_oils', 'dairy', 'meat', 'sugar']
+
+# Header spellings used by the FAO download, normalized
+HEADER_KEYS = {
+    'food price index': 'overall_index',
+    'ffpi': 'overall_index',
+    'cereals': 'cereals',
+    'cereals price index': 'cereals',
+    'oils': 'vegetable_oils',
+    'vegetable oils': 'vegetable_oils',
+    'vegetable oils price index': 'vegetable_oils',
+    'dairy': 'dairy',
+    'dairy price index': 'dairy',
+    'meat': 'meat',
+    'meat price index': 'meat',
+    'sugar': 'sugar',
+    'sugar price index': 'sugar',
+}
+
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+     'august', 'september', 'october', 'november', 'december'], 1)}
+
+def _normalize(header):
+    text = re.sub(r'\(.*?\)|\*', '', str(header or ''))
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def _month(value):
+    """Turn '1990-01', '1990-01-01', '01/1990', '1/1/1990' or a datetime into YYYY-MM"""
+    if hasattr(value, 'year') and hasattr(value, 'month'):
+        return f"{value.year:04d}-{value.month:02d}"
+    text = str(value or '').strip()
+    match = re.match(r'^(\d{4})-(\d{1,2})(?:-\d{1,2})?', text)
+    if match:
+        return f"{match.group(1)}-{int(match.group(2)):02d}"
+    match = re.match(r'^(?:\d{1,2}/)?(\d{1,2})/(\d{4})$', text)
+    if match:
+        return f"{match.group(2)}-{int(match.group(1)):02d}"
+    return None
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    try:
+        return round(float(str(value).replace(',', '').strip()), 2)
+    except ValueError:
+        return None
+
+# ----------------------------------------------------------------------
+# Parsers
+# ----------------------------------------------------------------------
+
+def parse_rows(rows):
+    """
+    Extract {YYYY-MM: {index: value}} from tabular rows (CSV or sheet)
+    Title and note rows before the header are skipped
+    """
+
+    series = {}
+    columns = None
+    for row in rows:
+        if columns is None:
+            found = {i: HEADER_KEYS[_normalize(cell)] for i, cell in enumerate(row)
+                     if _normalize(cell) in HEADER_KEYS}
+            if 'overall_index' in found.values() and len(found) >= 3:
+                columns = found
+            continue
+        if not row:
+            continue
+        month = _month(row[0])
+        if month is None:
+            continue
+        values = {}
+        for i, key in columns.items():
+            value = _number(row[i]) if i < len(row) and row[i] not in (None, '') else None
+            if value is not None:
+                values[key] = value
+        if values:
+            series[month] = values
+
+    if columns is None:
+        raise ValueError("Could not find the FAO index header row")
+    return series
+
+def parse_csv(content):
+    """Parse the FAO CSV download"""
+    text = content.decode('utf-8-sig', errors='replace') if isinstance(content, bytes) else content
+    return parse_rows(csv.reader(io.StringIO(text)))
+
+def parse_xlsx(content):
+    """Parse the FAO XLSX download, streaming rows from the first sheet"""
+    from pink_sheet import _open_workbook
+    workbook = _open_workbook(content)
+    try:
+        sheet = workbook.worksheets[0]
+        for candidate in workbook.worksheets:
+            if 'monthly' in candidate.title.lower():
+                sheet = candidate
+                break
+        return parse_rows(sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+class _PageScanner(HTMLParser):
+    """Single pass over the page collecting links and visible text; no tree is built"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+        self.text = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.text.append(data)
+
+HEADLINE = re.compile(
+    r'FAO Food Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points\s+in\s+([A-Z][a-z]+)\s+(\d{4})',
+    re.IGNORECASE)
+SUB_INDEX = {
+    'cereals': re.compile(r'Cereal Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points', re.IGNORECASE),
+    'vegetable_oils': re.compile(r'Vegetable Oil Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points', re.IGNORECASE),
+    'dairy': re.compile(r'Dairy Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points', re.IGNORECASE),
+    'meat': re.compile(r'Meat Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points', re.IGNORECASE),
+    'sugar': re.compile(r'Sugar Price Index[^.]{0,80}?averaged\s+([\d.]+)\s+points', re.IGNORECASE),
+}
+
+def scan_page(content):
+    """Return (download links, {YYYY-MM: {index: value}} from the headline text)"""
+    scanner = _PageScanner()
+    scanner.feed(content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content)
+    text = re.sub(r'\s+', ' ', ' '.join(scanner.text))
+
+    links = [href for href in scanner.links
+             if re.search(r'food_price_ind.*\.(csv|xlsx?)(\?|$)', href, re.IGNORECASE)]
+
+    series = {}
+    match = HEADLINE.search(text)
+    if match and match.group(2).lower() in MONTH_NAMES:
+        month = f"{match.group(3)}-{MONTH_NAMES[match.group(2).lower()]:02d}"
+        values = {'overall_index': float(match.group(1))}
+        for key, pattern in SUB_INDEX.items():
+            sub = pattern.search(text)
+            if sub:
+                values[key] = float(sub.group(1))
+        series[month] = values
+    return links, series
+
+# ----------------------------------------------------------------------
+# Content-hash parse cache
+# ----------------------------------------------------------------------
+
+def cached_parse(kind, content, parse, cache_dir=PARSE_CACHE_DIR):
+    """
+    Run parse(content) once per distinct content
+    The result is stored under the SHA-256 of the bytes; an unchanged download
+    is answered from disk. Only the latest result per kind is kept.
+    """
+
+    digest = hashlib.sha256(content).hexdigest()
+    path = os.path.join(cache_dir, f"{kind}-{digest[:32]}.json")
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            cached = json.load(f)
+        if cached.get('parser_version') == PARSER_VERSION:
+            return cached['result'], True
+
+    result = parse(content)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{kind}-") and name.endswith('.json'):
+            os.remove(os.path.join(cache_dir, name))
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'parser_version': PARSER_VERSION, 'sha256': digest, 'result': result}, f)
+    os.replace(path + '.tmp', path)
+    return result, False
+
+def _page_result(content):
+    links, series = scan_page(content)
+    return {'links': links, 'series': series}
+
+def _download_parser(url):
+    return parse_xlsx if re.search(r'\.xlsx?(\?|$)', url, re.IGNORECASE) else parse_csv
+
+# ----------------------------------------------------------------------
+# Extraction
+# ----------------------------------------------------------------------
+
+def extract_fao_series(page_url=FAO_PAGE_URL, download_url=None):
+    """
+    Fetch the FAO index and return (series, source_url)
+    series is {YYYY-MM: {index: value}} for every month available
+    """
+
+    from http_fetch import fetch
+
+    started = time.perf_counter()
+    candidates = [download_url] if download_url else []
+    page_series = {}
+
+    if not download_url:
+        try:
+            page = fetch(page_url, ttl=DOWNLOAD_TTL, timeout=15)
+            result, hit = cached_parse('fao-page', page.content, _page_result)
+            page_series = result['series']
+            candidates.extend(urljoin(page_url, href) for href in result['links'])
+            print(f"📄 FAO page {'unchanged, parse cached' if hit else 'parsed'} ({page.source})")
+        except Exception as e:
+            print(f"⚠️ Could not read FAO page: {e}")
+        candidates.append(FAO_CSV_URL)
+
+    for url in dict.fromkeys(candidates):
+        try:
+            response = fetch(url, ttl=DOWNLOAD_TTL, timeout=30)
+            series, hit = cached_parse('fao-data', response.content, _download_parser(url))
+        except Exception as e:
+            print(f"⚠️ FAO download failed ({url}): {e}")
+            continue
+        if series:
+            print(f"📊 {len(series)} months of FAO indices from the download "
+                  f"({'parse cached' if hit else 'parsed'} in {time.perf_counter() - started:.2f}s)")
+            # The page can announce a month before the download is refreshed
+            for month, values in page_series.items():
+                series.setdefault(month, values)
+            return series, url
+
+    if page_series:
+        print("📄 Using the headline figures from the FAO page")
+        return page_series, page_url
+    return {}, None
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Extract the FAO Food Price Index series")
+    parser.add_argument('--file', help="Parse a local FAO CSV/XLSX download instead of fetching")
+    parser.add_argument('--url', help="Download URL to use instead of discovering it from the page")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'rb') as f:
+            series = _download_parser(args.file)(f.read())
+    else:
+        series, _ = extract_fao_series(download_url=args.url)
+
+    if not series:
+        print("❌ No FAO index values found")
+        return 1
+    print("Month," + ",".join(INDICES))
+    for month in sorted(series)[-12:]:
+        print(month + "," + ",".join(str(series[month].get(key, '')) for key in INDICES))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
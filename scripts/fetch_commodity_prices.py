@@ -5,29 +5,47 @@ Checks for and downloads World Bank commodity price data (Pink Sheet)
 Focuses on commodities critical to development economics
 """
 
-import requests
+import argparse
 import json
 import csv
 from datetime import datetime
 import os
 
-def fetch_commodity_prices():
+from metrics import count, instrumented
+from pink_sheet import ingest_pink_sheet
+from release_schedule import PINK_SHEET, is_due, next_release, record_failure, record_fetch, skip_message
+
+SOURCE_NAME = PINK_SHEET
+TEMPLATE_CSV = "data/commodity_prices/template.csv"
+
+@instrumented
+def fetch_commodity_prices(excel_path=None):
     """
     Fetch commodity prices from World Bank Pink Sheet data
     Note: This data is updated monthly, typically on the first business day
+    
+    Parses the CMO monthly historical workbook (downloaded and cached, or a
+    local excel_path), rewrites the full history in data/commodity_prices/history.csv
+    and returns the latest month. Falls back to a manual-entry template if parsing fails.
     """
     
     print("🛢️ Checking World Bank commodity prices...")
     print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
-    # World Bank Pink Sheet URL (they provide Excel/CSV downloads)
-    # This is a simplified approach - in practice, you'd parse their Excel files
-    # For now, we'll create a structure to manually update or scrape
+    latest_month, latest_prices = None, {}
+    try:
+        latest_month, latest_prices, _ = ingest_pink_sheet(excel_path)
+    except OSError as e:
+        # requests' RequestException is an OSError, so this covers failed downloads too
+        print(f"⚠️ Could not download or read Pink Sheet workbook: {e}")
+    except Exception as e:
+        print(f"⚠️ Could not parse Pink Sheet workbook: {e}")
     
-    print("\n⚠️ Note: World Bank commodity data updates monthly")
-    print("📊 Data should be manually updated from:")
-    print("   https://www.worldbank.org/en/research/commodity-markets")
-    print("   or https://thedocs.worldbank.org/en/doc/5d903e848db1d1b83e0ec8f744e55570-0350012021/related/CMO-Pink-Sheet-[Month]-[Year].pdf")
+    if not latest_prices:
+        print("\n⚠️ Note: World Bank commodity data updates monthly")
+        print("📊 Data should be manually updated from:")
+        print("   https://www.worldbank.org/en/research/commodity-markets")
+        print("   or https://thedocs.worldbank.org/en/doc/5d903e848db1d1b83e0ec8f744e55570-0350012021/related/CMO-Pink-Sheet-[Month]-[Year].pdf")
     
     # Create placeholder structure
     commodity_data = {
@@ -69,23 +87,26 @@ def fetch_commodity_prices():
         }
     }
     
+    # Fill in the latest month parsed from the workbook
+    if latest_prices:
+        commodity_data['date'] = latest_month
+        commodity_data['note'] = 'Monthly averages parsed from CMO-Historical-Data-Monthly.xlsx'
+        for commodities in commodity_data['commodities'].values():
+            for commodity, details in commodities.items():
+                details['price'] = latest_prices.get(commodity)
+        print(f"✅ Latest Pink Sheet month: {latest_month} ({len(latest_prices)} prices)")
+    
     return commodity_data
 
-def save_commodity_data(data):
-    """Save commodity price data"""
-    
-    os.makedirs('data/commodity_prices', exist_ok=True)
-    
-    date = data['date']
-    
-    # Save as JSON
-    json_filename = f"data/commodity_prices/{date}.json"
-    with open(json_filename, 'w') as f:
-        json.dump(data, f, indent=2)
-    print(f"💾 Saved commodity data: {json_filename}")
+def has_prices(data):
+    """True if at least one commodity price was filled in"""
+    return any(details['price'] is not None
+               for commodities in data['commodities'].values()
+               for details in commodities.values())
+
+def write_template_csv(data, csv_filename=TEMPLATE_CSV):
+    """Write the manual-entry template for one month of commodity data"""
     
-    # Create a template CSV for manual updates
-    csv_filename = "data/commodity_prices/template.csv"
     with open(csv_filename, 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(['Date', 'Category', 'Commodity', 'Unit', 'Price', 'Source'])
@@ -93,14 +114,46 @@ def save_commodity_data(data):
         for category, commodities in data['commodities'].items():
             for commodity, details in commodities.items():
                 writer.writerow([
-                    date,
+                    data['date'],
                     category,
                     commodity,
                     details['unit'],
-                    details['price'] if details['price'] else 'UPDATE_ME',
+                    details['price'] if details['price'] is not None else 'UPDATE_ME',
                     'World Bank Pink Sheet'
                 ])
     
+    return csv_filename
+
+@instrumented
+def save_commodity_data(data):
+    """Save commodity price data"""
+    
+    os.makedirs('data/commodity_prices', exist_ok=True)
+    
+    date = data['date']
+    
+    # Save as JSON
+    json_filename = f"data/commodity_prices/{date}.json"
+    if not has_prices(data) and os.path.exists(json_filename):
+        # Nothing was parsed: keep the month file (and its template) as they are
+        print(f"⏭️ Nothing extracted - {json_filename} and the template left unchanged")
+        return False
+    with open(json_filename, 'w') as f:
+        json.dump(data, f, indent=2)
+    count('files_written')
+    print(f"💾 Saved commodity data: {json_filename}")
+    
+    # Only fall back to the manual-entry template when nothing was parsed
+    if has_prices(data):
+        return True
+    
+    # Create a template CSV for manual updates (a derived view in partition mode)
+    from partitions import enabled as partitions_enabled
+    if partitions_enabled():
+        print("📋 Manual-entry template is a derived view: python scripts/partitions.py views")
+        return True
+    csv_filename = write_template_csv(data)
+    
     print(f"📋 Created template: {csv_filename}")
     print("\n📝 Instructions:")
     print("1. Visit: https://www.worldbank.org/en/research/commodity-markets")
@@ -113,15 +166,32 @@ def save_commodity_data(data):
 def main():
     """Main execution function"""
     
+    parser = argparse.ArgumentParser(description="World Bank commodity price checker")
+    parser.add_argument('--force', action='store_true', help="Fetch even if no new release is due")
+    parser.add_argument('--excel', help="Parse a local CMO-Historical-Data-Monthly.xlsx instead of downloading")
+    args = parser.parse_args()
+    
     print("="*60)
     print("📊 World Bank Commodity Price Checker")
     print("="*60 + "\n")
     
-    data = fetch_commodity_prices()
+    # The Pink Sheet is released monthly; skip all work in between
+    due, release = is_due(SOURCE_NAME)
+    if not due and not args.force and not args.excel:
+        print(f"⏭️ {skip_message(SOURCE_NAME, release)} - next release {next_release(SOURCE_NAME)}")
+        return 0
+    
+    data = fetch_commodity_prices(args.excel)
     save_commodity_data(data)
     
-    print("\n✅ Commodity price template created!")
-    print("⚠️ Note: Requires manual data entry from World Bank source")
+    if has_prices(data):
+        record_fetch(SOURCE_NAME, release)
+        print("\n✅ Commodity prices updated from the Pink Sheet!")
+    else:
+        retry = record_failure(SOURCE_NAME, release)
+        print("\n✅ Commodity price template checked!")
+        print("⚠️ Note: Requires manual data entry from World Bank source")
+        print(f"🔁 Next download attempt from {retry}")
     
     return 0
 
@@ -2,15 +2,24 @@
 """
 Currency Exchange Rate Fetcher
 Fetches daily exchange rates for key developing economy currencies
-Data source: Frankfurter API (European Central Bank)
+Data sources: Frankfurter API (European Central Bank), with open.er-api.com
+and currency-api filling the currencies ECB does not publish
 """
 
-import requests
+import argparse
 import json
 import csv
 from datetime import datetime
 import os
 
+from currency_providers import fetch_all, make_providers, parse_provider_urls
+from data_quality import record_saved, validate_snapshot
+from history_store import open_store, upsert_history_csv
+from manifest import Transaction, write_file
+from metrics import count, instrumented
+from partitions import PARTITION_DIR, write_partition
+from snapshot_archive import ARCHIVE_DIR, upsert_archive
+
 # Key currencies for development economics
 # Focus on major developing economies and trade currencies
 CURRENCIES = [
@@ -34,112 +43,200 @@ CURRENCIES = [
     'ARS',  # Argentine Peso - Latin America
     'COP',  # Colombian Peso - Latin America
     'PKR',  # Pakistani Rupee - South Asia
-    'BGD',  # Bangladeshi Taka - South Asia (using BGN as proxy, BGD not in standard ISO)
+    'BDT',  # Bangladeshi Taka - South Asia
     'CHF',  # Swiss Franc - safe haven
     'CAD',  # Canadian Dollar
     'AUD',  # Australian Dollar
     'NZD',  # New Zealand Dollar
 ]
 
-def fetch_currency_rates():
-    """Fetch latest currency exchange rates from Frankfurter API"""
+API_URL = "https://api.frankfurter.dev/v1"
+
+@instrumented
+def fetch_currency_rates(providers=None):
+    """
+    Fetch latest currency exchange rates from every provider
+    Frankfurter (ECB) has priority; other providers fill the currencies it lacks
+    """
     
     print("🌍 Fetching currency exchange rates...")
     print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
     try:
-        # Fetch latest rates with USD as base
-        url = "https://api.frankfurter.dev/v1/latest"
-        params = {
-            'base': 'USD',
-            'symbols': ','.join(CURRENCIES)
-        }
+        # Fetch latest rates with USD as base from all providers at once
+        if providers is None:
+            providers = make_providers({'frankfurter': API_URL})
+        date, rates, provenance, report = fetch_all(CURRENCIES, providers)
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        for name, info in report.items():
+            if 'error' in info:
+                print(f"⚠️ {name} failed: {info['error']}")
+            elif info.get('newer'):
+                print(f"⏭️ {name}: rates of {info['date']} are too far ahead of the snapshot date - not used")
+            elif 'used' in info:
+                print(f"🔌 {name}: {info['used']} of {info['requested']} requested rates used ({info['date']})")
         
-        data = response.json()
+        if not rates:
+            print("❌ No provider returned any rates")
+            return None
         
-        # Extract data
-        date = data['date']
-        base = data['base']
-        rates = data['rates']
+        missing = sorted(set(CURRENCIES) - set(rates) - {'USD'})
         
         print(f"✅ Successfully fetched rates for {date}")
-        print(f"📊 Base currency: {base}")
+        print(f"📊 Base currency: USD")
         print(f"💱 Rates retrieved: {len(rates)} currencies")
+        if missing:
+            print(f"⚠️ Not available from any provider: {', '.join(missing)}")
         
         return {
             'date': date,
             'timestamp': datetime.now().isoformat(),
-            'base_currency': base,
-            'rates': rates
+            'base_currency': 'USD',
+            'rates': rates,
+            'provenance': provenance,
         }
         
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error fetching currency rates: {e}")
-        return None
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return None
 
-def save_data(data):
-    """Save currency data to CSV and JSON formats"""
-    
-    if not data:
-        print("⚠️ No data to save")
-        return False
-    
-    # Create data directory if it doesn't exist
-    os.makedirs('data/currency_rates', exist_ok=True)
+def snapshot_formats():
+    """
+    Per-day snapshot formats to write: any of 'json', 'csv', 'archive', 'partition'
+    Set CURRENCY_SNAPSHOT_FORMATS to choose; by default daily partitions are used
+    once data/currency_rates/partitions exists, then packed archives once
+    data/currency_rates/archive exists, otherwise JSON and CSV files
+    """
+    value = os.environ.get('CURRENCY_SNAPSHOT_FORMATS')
+    if value:
+        return {f.strip() for f in value.split(',') if f.strip()}
+    if os.path.isdir(PARTITION_DIR):
+        return {'partition'}
+    return {'archive'} if os.path.isdir(ARCHIVE_DIR) else {'json', 'csv'}
+
+def writes_views(formats=None):
+    """False in partition mode, where latest.csv and history.csv are derived on demand"""
+    formats = snapshot_formats() if formats is None else formats
+    return 'partition' not in formats
+
+def write_snapshot_files(data, formats=None, txn=None):
+    """Write the per-day JSON and/or CSV snapshot for one day of rates"""
     
+    formats = snapshot_formats() if formats is None else formats
     date = data['date']
     timestamp = data['timestamp']
+    written = []
     
-    # Save as JSON
-    json_filename = f"data/currency_rates/{date}.json"
-    with open(json_filename, 'w') as f:
-        json.dump(data, f, indent=2)
-    print(f"💾 Saved JSON: {json_filename}")
+    if 'json' in formats:
+        json_filename = f"data/currency_rates/{date}.json"
+        with write_file(json_filename, txn) as f:
+            json.dump(data, f, indent=2)
+        written.append(json_filename)
+        count('files_written')
     
-    # Save as CSV
-    csv_filename = f"data/currency_rates/{date}.csv"
-    with open(csv_filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Date', 'Timestamp', 'Currency', 'Rate_to_USD'])
-        
-        for currency, rate in sorted(data['rates'].items()):
-            writer.writerow([date, timestamp, currency, rate])
+    if 'csv' in formats:
+        csv_filename = f"data/currency_rates/{date}.csv"
+        with write_file(csv_filename, txn, newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Date', 'Timestamp', 'Currency', 'Rate_to_USD'])
+            
+            for currency, rate in sorted(data['rates'].items()):
+                writer.writerow([date, timestamp, currency, rate])
+        written.append(csv_filename)
+        count('files_written')
+    
+    if 'partition' in formats:
+        written.append(write_partition(data, txn))
+        count('files_written')
     
-    print(f"💾 Saved CSV: {csv_filename}")
+    return written
+
+def write_snapshots(snapshots, formats=None, txn=None):
+    """Write snapshots in every configured format; archives are rewritten once per file"""
+    
+    formats = snapshot_formats() if formats is None else formats
+    written = []
+    for snapshot in snapshots:
+        written.extend(write_snapshot_files(snapshot, formats, txn))
+    if 'archive' in formats and snapshots:
+        # Archive files are replaced atomically on their own; the manifest only records them
+        archives = upsert_archive(snapshots)
+        if txn is not None:
+            txn.record(archives)
+        written.extend(archives)
+    return written
+
+def write_latest_csv(data, txn=None):
+    """Overwrite latest.csv with one day of rates"""
     
-    # Update latest.csv (overwrite with most recent data)
     latest_csv = "data/currency_rates/latest.csv"
-    with open(latest_csv, 'w', newline='') as f:
+    with write_file(latest_csv, txn, newline='') as f:
         writer = csv.writer(f)
         writer.writerow(['Date', 'Timestamp', 'Currency', 'Rate_to_USD'])
         
         for currency, rate in sorted(data['rates'].items()):
-            writer.writerow([date, timestamp, currency, rate])
+            writer.writerow([data['date'], data['timestamp'], currency, rate])
     
-    print(f"💾 Updated: {latest_csv}")
+    return latest_csv
+
+@instrumented
+def save_data(data, store=None):
+    """Save currency data to CSV and JSON formats"""
     
-    # Append to historical file
-    history_csv = "data/currency_rates/history.csv"
-    file_exists = os.path.exists(history_csv)
+    if not data:
+        print("⚠️ No data to save")
+        return False
     
-    with open(history_csv, 'a', newline='') as f:
-        writer = csv.writer(f)
+    # Create data directory if it doesn't exist
+    os.makedirs('data/currency_rates', exist_ok=True)
+    
+    date = data['date']
+    timestamp = data['timestamp']
+    
+    # Weekend and holiday reruns get the same ECB date back from Frankfurter;
+    # skip them before doing any file I/O
+    if store is None:
+        store = open_store()
+    if store.is_unchanged(date, data['rates']):
+        print(f"⏭️ Rates for {date} already stored and unchanged - nothing to write")
+        return True
+    
+    is_new_day = store.row_index(date) is None
+    is_latest = store.latest_date is None or date >= store.latest_date
+    
+    # Snapshot, latest.csv, history.csv and the history store are committed
+    # together: each file is staged first and a crash mid-commit is rolled
+    # forward on the next run. In partition mode the day's partition and the
+    # store are the only files written.
+    views = writes_views()
+    with Transaction(f"currency {date}") as txn:
+        # Save the per-day snapshot (JSON/CSV files, packed archive or partition)
+        for filename in write_snapshots([data], txn=txn):
+            print(f"💾 Saved: {filename}")
         
-        # Write header if file is new
-        if not file_exists:
-            writer.writerow(['Date', 'Timestamp', 'Currency', 'Rate_to_USD'])
+        # Update latest.csv (overwrite with most recent data)
+        if views and is_latest:
+            latest_csv = write_latest_csv(data, txn)
+            print(f"💾 Updated: {latest_csv}")
         
-        # Append all rates
-        for currency, rate in sorted(data['rates'].items()):
-            writer.writerow([date, timestamp, currency, rate])
+        # Upsert into historical file, replacing any earlier rows for this date
+        history_csv = "data/currency_rates/history.csv"
+        if views:
+            upsert_history_csv(date, timestamp, data['rates'], replace=not is_new_day, txn=txn)
+        
+        # Upsert into the indexed history store
+        status = store.upsert(date, data['rates'], data['base_currency'], txn)
     
-    print(f"📊 Appended to historical data: {history_csv}")
+    if not views:
+        print("📊 history.csv and latest.csv are derived views: python scripts/partitions.py views")
+    elif is_new_day:
+        print(f"📊 Appended to historical data: {history_csv}")
+    else:
+        print(f"📊 Replaced {date} in historical data: {history_csv}")
+    print(f"🗄️ History store {status}: {store.store_dir} ({len(store)} days)")
+    
+    # The quality statistics only learn from rates that were actually saved
+    record_saved(data, store=store)
     
     return True
 
@@ -179,16 +276,30 @@ def generate_summary(data):
 def main():
     """Main execution function"""
     
+    parser = argparse.ArgumentParser(description="Fetch daily currency exchange rates")
+    parser.add_argument('--provider', action='append', metavar='NAME=URL',
+                        help="Override a provider's base URL, e.g. a local stub ('off' disables it)")
+    args = parser.parse_args()
+    
     print("="*60)
     print("💰 Daily Currency Exchange Rate Fetcher")
     print("="*60 + "\n")
     
     # Fetch data
-    data = fetch_currency_rates()
+    urls = {'frankfurter': API_URL}
+    urls.update(parse_provider_urls(args.provider))
+    data = fetch_currency_rates(make_providers(urls))
     
     if data:
+        # Check against recent statistics before anything is written
+        store = open_store()
+        passed, _ = validate_snapshot(data, store=store)
+        if not passed:
+            print("🚫 Snapshot quarantined - not saved")
+            return 1
+        
         # Save data
-        if save_data(data):
+        if save_data(data, store):
             # Generate summary
             generate_summary(data)
             print("✅ Currency rate update completed successfully!")
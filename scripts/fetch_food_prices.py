@@ -5,81 +5,126 @@ Monitors and logs the FAO Food Price Index
 Updates monthly on the first Thursday of each month
 """
 
-import requests
+import argparse
 import json
 import csv
 from datetime import datetime
 import os
-import re
-from bs4 import BeautifulSoup
 
+from fao_food_index import FAO_PAGE_URL, INDICES, extract_fao_series
+from metrics import count, instrumented
+from release_schedule import FAO_FOOD_PRICE_INDEX, is_due, next_release, record_failure, record_fetch, skip_message
+
+SOURCE_NAME = FAO_FOOD_PRICE_INDEX
+
+INDEX_UNITS = {
+    'overall_index': 'points (2014-2016=100)',
+    'cereals': 'points',
+    'vegetable_oils': 'points',
+    'dairy': 'points',
+    'meat': 'points',
+    'sugar': 'points',
+}
+
+@instrumented
 def fetch_fao_food_price_index():
     """
-    Attempt to fetch FAO Food Price Index
+    Fetch the FAO Food Price Index
     The official data is on: https://www.fao.org/worldfoodsituation/foodpricesindex/en/
+    The returned dict carries the latest month; 'series' holds every month parsed
     """
     
     print("🌾 Checking FAO Food Price Index...")
     print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
-    url = "https://www.fao.org/worldfoodsituation/foodpricesindex/en/"
+    url = FAO_PAGE_URL
     
     try:
         print(f"🔍 Fetching data from: {url}")
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        
-        # Parse the page to extract the latest index value
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # The FAO page structure may vary, this is a general approach
-        print("📄 Page retrieved successfully")
-        print("⚠️ Note: FAO data parsing requires page structure analysis")
-        print("💡 Suggestion: Check page source and update parser accordingly")
-        
-        # Create data structure
-        fao_data = {
-            'timestamp': datetime.now().isoformat(),
-            'date': datetime.now().strftime('%Y-%m'),
-            'source': 'FAO Food Price Index',
-            'url': url,
-            'update_schedule': 'First Thursday of each month',
-            'indices': {
-                'overall_index': {'value': None, 'unit': 'points (2014-2016=100)'},
-                'cereals': {'value': None, 'unit': 'points'},
-                'vegetable_oils': {'value': None, 'unit': 'points'},
-                'dairy': {'value': None, 'unit': 'points'},
-                'meat': {'value': None, 'unit': 'points'},
-                'sugar': {'value': None, 'unit': 'points'},
-            },
-            'note': 'Values need to be manually updated from FAO website'
-        }
-        
-        return fao_data
-        
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Could not fetch FAO page: {e}")
+        series, source_url = extract_fao_series(url)
+    except Exception as e:
+        print(f"⚠️ Could not extract FAO data: {e}")
+        series, source_url = {}, None
+    
+    # Create data structure
+    fao_data = {
+        'timestamp': datetime.now().isoformat(),
+        'date': datetime.now().strftime('%Y-%m'),
+        'source': 'FAO Food Price Index',
+        'url': url,
+        'update_schedule': 'First Thursday of each month',
+        'indices': {key: {'value': None, 'unit': unit} for key, unit in INDEX_UNITS.items()},
+        'note': 'Values need to be manually updated from FAO website',
+        'series': series,
+    }
+    
+    if series:
+        latest_month = max(series)
+        fao_data['date'] = latest_month
+        fao_data['data_url'] = source_url
+        for key, value in series[latest_month].items():
+            fao_data['indices'][key]['value'] = value
+        fao_data['note'] = f"Monthly values extracted from {source_url}"
+        print(f"✅ Latest FAO month: {latest_month} (overall {series[latest_month].get('overall_index')})")
+    else:
         print("💡 Creating template for manual update")
-        
-        fao_data = {
-            'timestamp': datetime.now().isoformat(),
-            'date': datetime.now().strftime('%Y-%m'),
-            'source': 'FAO Food Price Index',
-            'url': url,
-            'update_schedule': 'First Thursday of each month',
-            'indices': {
-                'overall_index': {'value': None, 'unit': 'points (2014-2016=100)'},
-                'cereals': {'value': None, 'unit': 'points'},
-                'vegetable_oils': {'value': None, 'unit': 'points'},
-                'dairy': {'value': None, 'unit': 'points'},
-                'meat': {'value': None, 'unit': 'points'},
-                'sugar': {'value': None, 'unit': 'points'},
-            },
-            'note': 'Values need to be manually updated from FAO website'
-        }
-        
-        return fao_data
+    
+    return fao_data
+
+def has_values(data):
+    """True if the headline index was extracted"""
+    return data['indices']['overall_index']['value'] is not None
+
+FAO_INDEX_HEADER = [
+    'Date',
+    'Timestamp',
+    'Overall_Index',
+    'Cereals_Index',
+    'Vegetable_Oils_Index',
+    'Dairy_Index',
+    'Meat_Index',
+    'Sugar_Index',
+    'Source'
+]
+
+def merge_fao_index_rows(new_rows, csv_filename="data/food_prices/fao_index.csv"):
+    """
+    Merge rows into fao_index.csv in a single write, keeping one row per month
+    A month whose values are unchanged keeps its original timestamp
+    """
+    
+    rows = {}
+    if os.path.exists(csv_filename):
+        with open(csv_filename, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for existing in reader:
+                if existing:
+                    rows[existing[0]] = existing
+    
+    changed = 0
+    for row in new_rows:
+        existing = rows.get(row[0])
+        if existing and existing[2:] == [str(v) for v in row[2:]]:
+            continue
+        rows[row[0]] = row
+        changed += 1
+    
+    if changed:
+        with open(csv_filename + '.tmp', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FAO_INDEX_HEADER)
+            writer.writerows(rows[month] for month in sorted(rows))
+        os.replace(csv_filename + '.tmp', csv_filename)
+    return changed
+
+def fao_index_row(month, timestamp, values):
+    """One fao_index.csv row; missing values are marked for manual entry"""
+    return [month, timestamp] + [
+        values.get(key) if values.get(key) is not None else 'UPDATE_ME' for key in INDICES
+    ] + ['FAO']
 
+@instrumented
 def save_fao_data(data):
     """Save FAO Food Price Index data"""
     
@@ -87,81 +132,68 @@ def save_fao_data(data):
     
     date = data['date']
     
-    # Save as JSON
+    # Save as JSON (the full series goes to the CSV, not the monthly file)
     json_filename = f"data/food_prices/{date}.json"
+    if not has_values(data) and os.path.exists(json_filename):
+        # Nothing was extracted: keep the month file and any manually entered row
+        print(f"⏭️ Nothing extracted - {json_filename} and fao_index.csv left unchanged")
+        return False
     with open(json_filename, 'w') as f:
-        json.dump(data, f, indent=2)
+        json.dump({k: v for k, v in data.items() if k != 'series'}, f, indent=2)
+    count('files_written')
     print(f"💾 Saved FAO data: {json_filename}")
     
-    # Create CSV template
+    # Backfill every parsed month plus this month's row in one CSV write
     csv_filename = "data/food_prices/fao_index.csv"
-    file_exists = os.path.exists(csv_filename)
-    
-    with open(csv_filename, 'a', newline='') as f:
-        writer = csv.writer(f)
-        
-        # Write header if new file
-        if not file_exists:
-            writer.writerow([
-                'Date',
-                'Timestamp',
-                'Overall_Index',
-                'Cereals_Index',
-                'Vegetable_Oils_Index',
-                'Dairy_Index',
-                'Meat_Index',
-                'Sugar_Index',
-                'Source'
-            ])
-        
-        # Write data row
-        writer.writerow([
-            date,
-            data['timestamp'],
-            data['indices']['overall_index']['value'] or 'UPDATE_ME',
-            data['indices']['cereals']['value'] or 'UPDATE_ME',
-            data['indices']['vegetable_oils']['value'] or 'UPDATE_ME',
-            data['indices']['dairy']['value'] or 'UPDATE_ME',
-            data['indices']['meat']['value'] or 'UPDATE_ME',
-            data['indices']['sugar']['value'] or 'UPDATE_ME',
-            'FAO'
-        ])
-    
-    print(f"📊 Updated FAO index file: {csv_filename}")
-    
-    print("\n📝 Manual Update Instructions:")
-    print("1. Visit: https://www.fao.org/worldfoodsituation/foodpricesindex/en/")
-    print("2. Find the latest monthly index values")
-    print("3. Update fao_index.csv with current values")
-    print("4. The index is updated on the first Thursday of each month")
+    rows = [fao_index_row(month, data['timestamp'], values)
+            for month, values in sorted(data.get('series', {}).items())]
+    if not data.get('series'):
+        rows.append(fao_index_row(date, data['timestamp'],
+                                  {key: details['value'] for key, details in data['indices'].items()}))
+    changed = merge_fao_index_rows(rows, csv_filename)
+    count('rows_written', changed)
+    
+    print(f"📊 Updated FAO index file: {csv_filename} ({changed} months changed)")
+    
+    if not has_values(data):
+        print("\n📝 Manual Update Instructions:")
+        print("1. Visit: https://www.fao.org/worldfoodsituation/foodpricesindex/en/")
+        print("2. Find the latest monthly index values")
+        print("3. Update fao_index.csv with current values")
+        print("4. The index is updated on the first Thursday of each month")
     
     return True
 
 def main():
     """Main execution function"""
     
+    parser = argparse.ArgumentParser(description="FAO Food Price Index monitor")
+    parser.add_argument('--force', action='store_true', help="Fetch even if no new release is due")
+    args = parser.parse_args()
+    
     print("="*60)
     print("🌾 FAO Food Price Index Monitor")
     print("="*60 + "\n")
     
+    # The index is released monthly; skip all network and disk work in between
+    due, release = is_due(SOURCE_NAME)
+    if not due and not args.force:
+        print(f"⏭️ {skip_message(SOURCE_NAME, release)} - next release {next_release(SOURCE_NAME)}")
+        return 0
+    
     data = fetch_fao_food_price_index()
     save_fao_data(data)
     
-    print("\n✅ FAO Food Price Index template updated!")
-    print("⚠️ Note: Requires manual data entry from FAO source")
-    print("📅 Check on first Thursday of each month for new data")
+    if has_values(data):
+        record_fetch(SOURCE_NAME, release)
+        print("\n✅ FAO Food Price Index updated!")
+    else:
+        retry = record_failure(SOURCE_NAME, release)
+        print("\n✅ FAO Food Price Index template checked!")
+        print("⚠️ Note: Requires manual data entry from FAO source")
+        print(f"🔁 Next extraction attempt from {retry}")
     
     return 0
 
 if __name__ == "__main__":
-    # Install beautifulsoup4 if needed: pip install beautifulsoup4
-    try:
-        from bs4 import BeautifulSoup
-        exit(main())
-    except ImportError:
-        print("⚠️ beautifulsoup4 not installed")
-        print("Installing required package...")
-        import subprocess
-        subprocess.check_call(['pip', 'install', 'beautifulsoup4', '--break-system-packages'])
-        from bs4 import BeautifulSoup
-        exit(main())
+    exit(main())
@@ -4,60 +4,215 @@ Data Summary Generator
 Creates daily summaries and statistics from collected development economics data
 """
 
+import hashlib
 import json
-import csv
+import math
 import os
-from datetime import datetime, timedelta
-import glob
+import re
+from datetime import datetime
 
-def generate_currency_summary():
+from history_store import day_to_date, open_store
+from metrics import instrumented
+
+SUMMARY_STATE_FILE = "data/summaries/summary_state.json"
+# Directory listing counts keyed by mtime; local to a checkout, so kept out of git
+FILE_COUNT_CACHE = ".cache/summaries/file_counts.json"
+
+SNAPSHOT_NAME = re.compile(r'^\d{4}-\d{2}(-\d{2})?\.json$')
+
+# ----------------------------------------------------------------------
+# Persisted aggregate state
+# ----------------------------------------------------------------------
+
+def empty_state():
+    return {
+        'currency': {
+            'days': 0,
+            'values': 0,
+            'first_date': None,
+            'last_date': None,
+            'last_row': None,  # fingerprint of the stored rates for last_date
+            'last_rates': {},
+            'returns': {},   # per currency Welford state of daily log returns
+        },
+    }
+
+def load_summary_state(path=SUMMARY_STATE_FILE):
+    """Load the running summary aggregates, or a fresh state if there are none"""
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_summary_state(state, path=SUMMARY_STATE_FILE):
+    # Earlier versions kept the directory counts here
+    state.pop('file_counts', None)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def welford_update(stats, x):
+    """Fold one observation into a {'n', 'mean', 'm2'} running mean/variance"""
+    n = stats['n'] + 1
+    delta = x - stats['mean']
+    mean = stats['mean'] + delta / n
+    stats.update(n=n, mean=mean, m2=stats['m2'] + delta * (x - mean))
+
+def welford_std(stats):
+    return math.sqrt(stats['m2'] / (stats['n'] - 1)) if stats['n'] > 1 else None
+
+def fold_currency_day(cstate, date, rates):
+    """Fold one day of rates into the currency aggregates"""
+    
+    for code, rate in rates.items():
+        previous = cstate['last_rates'].get(code)
+        if previous and rate > 0:
+            stats = cstate['returns'].setdefault(code, {'n': 0, 'mean': 0.0, 'm2': 0.0})
+            welford_update(stats, math.log(rate / previous))
+        cstate['last_rates'][code] = rate
+    
+    cstate['days'] += 1
+    cstate['values'] += len(rates)
+    cstate['first_date'] = cstate['first_date'] or date
+    cstate['last_date'] = date
+
+def row_fingerprint(rates):
+    """Short hash of one day's {currency: rate}"""
+    return hashlib.sha256(json.dumps(rates, sort_keys=True).encode()).hexdigest()[:16]
+
+def update_currency_state(state, store):
+    """
+    Fold only the days added to the store since the last run
+    Falls back to a full recompute if the store no longer extends the state:
+    a backfill inserted older days, or the last summarized day was corrected
+    """
+    
+    cstate = state['currency']
+    last = cstate['last_date']
+    
+    if last is not None:
+        seen = store.row_index(last)
+        if (seen is None or seen + 1 != cstate['days']
+                or cstate.get('last_row') != row_fingerprint(store.read_day(last))):
+            print("🔄 History changed up to the last summarized day - recomputing aggregates")
+            state['currency'] = cstate = empty_state()['currency']
+            last = None
+    
+    start_row = 0 if last is None else store.row_index(last) + 1
+    if start_row >= len(store):
+        return 0
+    
+    dates, currencies, matrix = store.read_range(start=day_to_date(store.days[start_row]))
+    for date, row in zip(dates, matrix):
+        rates = {c: float(v) for c, v in zip(currencies, row) if not math.isnan(v)}
+        fold_currency_day(cstate, date, rates)
+    cstate['last_row'] = row_fingerprint(rates)
+    return len(dates)
+
+def load_file_counts(path=FILE_COUNT_CACHE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_file_counts(counts, path=FILE_COUNT_CACHE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(counts, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def count_snapshots(directory, counts):
+    """
+    Count per-period JSON files in a directory
+    The count is cached in counts against the directory's mtime, so unchanged
+    directories are never listed again
+    """
+    
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+    
+    cached = counts.get(directory)
+    if cached and cached['mtime_ns'] == mtime:
+        return cached['count']
+    
+    with os.scandir(directory) as entries:
+        count = sum(1 for entry in entries if SNAPSHOT_NAME.match(entry.name))
+    counts[directory] = {'mtime_ns': mtime, 'count': count}
+    return count
+
+# ----------------------------------------------------------------------
+# Summaries
+# ----------------------------------------------------------------------
+
+def summary_record(cstate, commodity_files, food_files, generated=None):
+    """The daily summary JSON for a currency state and monthly file counts"""
+    return {
+        'generated': generated or datetime.now().isoformat(),
+        'data_counts': {
+            'currency_snapshots': cstate['days'],
+            'commodity_records': commodity_files,
+            'food_price_records': food_files
+        },
+        'currency_history': {
+            'first_date': cstate['first_date'],
+            'last_date': cstate['last_date'],
+            'days': cstate['days'],
+            'data_points': cstate['values'],
+            'daily_log_returns': {
+                code: {'n': stats['n'], 'mean': stats['mean'], 'std': welford_std(stats)}
+                for code, stats in sorted(cstate['returns'].items())
+            },
+        },
+    }
+
+@instrumented
+def generate_currency_summary(store=None, state=None):
     """Generate summary of currency rate trends"""
     
     print("\n" + "="*60)
     print("💱 CURRENCY RATE SUMMARY")
     print("="*60)
     
-    # Check if we have historical data
-    history_file = "data/currency_rates/history.csv"
+    # Read from the indexed history store instead of rescanning history.csv;
+    # the pipeline runner passes in the store the fetch stage already opened
+    if store is None:
+        store = open_store()
     
-    if not os.path.exists(history_file):
-        print("⚠️ No historical currency data available yet")
-        return
-    
-    # Read historical data
-    with open(history_file, 'r') as f:
-        reader = csv.DictReader(f)
-        data = list(reader)
+    if state is None:
+        state = load_summary_state()
     
-    if not data:
-        print("⚠️ No currency data in history file")
+    if len(store) == 0:
+        print("⚠️ No historical currency data available yet")
         return
     
-    print(f"📊 Total data points: {len(data)}")
+    folded = update_currency_state(state, store)
+    cstate = state['currency']
+    latest_date, latest_rates = cstate['last_date'], cstate['last_rates']
     
-    # Get unique dates
-    dates = sorted(set(row['Date'] for row in data))
-    print(f"📅 Date range: {dates[0]} to {dates[-1]}")
-    print(f"📈 Days tracked: {len(dates)}")
+    print(f"📊 Total data points: {cstate['values']}")
+    print(f"📅 Date range: {cstate['first_date']} to {latest_date}")
+    print(f"📈 Days tracked: {cstate['days']} ({folded} new since last summary)")
     
     # Show latest rates for key currencies
-    latest_date = dates[-1]
-    latest_data = [row for row in data if row['Date'] == latest_date]
-    
     print(f"\n📍 Latest rates as of {latest_date}:")
     print("-"*60)
     
     key_currencies = ['CNY', 'INR', 'BRL', 'ZAR', 'IDR', 'MXN', 'NGN', 'TRY']
     
     for currency in key_currencies:
-        currency_data = [row for row in latest_data if row['Currency'] == currency]
-        if currency_data:
-            rate = float(currency_data[0]['Rate_to_USD'])
-            print(f"  {currency}: {rate:.4f}")
+        if currency in latest_rates:
+            stats = cstate['returns'].get(currency)
+            std = welford_std(stats) if stats else None
+            vol = f"  (daily σ {std:.4%})" if std is not None else ""
+            print(f"  {currency}: {latest_rates[currency]:.4f}{vol}")
     
     return True
 
-def generate_overall_summary():
+@instrumented
+def generate_overall_summary(state=None):
     """Generate overall project summary"""
     
     print("\n" + "="*60)
@@ -66,10 +221,16 @@ def generate_overall_summary():
     
     print(f"\n🕐 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
-    # Count data points
-    currency_files = len(glob.glob("data/currency_rates/*.json"))
-    commodity_files = len(glob.glob("data/commodity_prices/*.json"))
-    food_files = len(glob.glob("data/food_prices/*.json"))
+    if state is None:
+        state = load_summary_state()
+    
+    # Count data points: currency days come from the aggregates, the small
+    # monthly directories are only listed again when they change
+    currency_files = state['currency']['days']
+    counts = load_file_counts()
+    commodity_files = count_snapshots("data/commodity_prices", counts)
+    food_files = count_snapshots("data/food_prices", counts)
+    save_file_counts(counts)
     
     print(f"\n📁 Data Collection Status:")
     print(f"  💱 Currency rate snapshots: {currency_files}")
@@ -77,7 +238,7 @@ def generate_overall_summary():
     print(f"  🌾 Food price index records: {food_files}")
     
     # Check for latest data
-    if os.path.exists("data/currency_rates/latest.csv"):
+    if os.path.exists("data/currency_rates/latest.csv") or os.path.isdir("data/currency_rates/partitions"):
         print(f"\n✅ Latest currency data available")
     
     print("\n🌍 Impact Areas Being Monitored:")
@@ -92,14 +253,7 @@ def generate_overall_summary():
     print("  useful for research, policy analysis, and forecasting.")
     
     # Save summary to file
-    summary_data = {
-        'generated': datetime.now().isoformat(),
-        'data_counts': {
-            'currency_snapshots': currency_files,
-            'commodity_records': commodity_files,
-            'food_price_records': food_files
-        }
-    }
+    summary_data = summary_record(state['currency'], commodity_files, food_files)
     
     os.makedirs('data/summaries', exist_ok=True)
     summary_file = f"data/summaries/summary_{datetime.now().strftime('%Y-%m-%d')}.json"
@@ -118,8 +272,10 @@ def main():
     print("📊 Development Economics Data Summary Generator")
     print("="*60)
     
-    generate_currency_summary()
-    generate_overall_summary()
+    state = load_summary_state()
+    generate_currency_summary(state=state)
+    generate_overall_summary(state)
+    save_summary_state(state)
     
     print("\n" + "="*60)
     print("✅ Summary generation completed!")
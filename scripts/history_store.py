@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Currency History Store
+Keeps currency history as a compact date x currency float matrix on disk
+Rows are appended in O(1) and range reads only touch the rows they need.
+Every write goes through a manifest Transaction (the caller's, or its own),
+so the store files are staged, journaled and recorded like the snapshots.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date as date_cls
+
+import numpy as np
+
+from manifest import Transaction, write_file
+from metrics import count
+
+STORE_DIR = "data/currency_rates/store"
+SNAPSHOT_DIR = "data/currency_rates"
+
+META_FILE = "meta.json"
+DATES_FILE = "dates.i4"
+RATES_FILE = "rates.f8"
+
+DATE_DTYPE = np.dtype('<i4')   # days since 1970-01-01
+RATE_DTYPE = np.dtype('<f8')
+
+EPOCH_ORDINAL = date_cls(1970, 1, 1).toordinal()
+
+def date_to_day(date_str):
+    """Convert an ISO date string to days since the Unix epoch"""
+    return date_cls.fromisoformat(date_str).toordinal() - EPOCH_ORDINAL
+
+def day_to_date(day):
+    """Convert days since the Unix epoch back to an ISO date string"""
+    return date_cls.fromordinal(int(day) + EPOCH_ORDINAL).isoformat()
+
+class HistoryStore:
+    """
+    Date-indexed rate matrix backed by three files:
+      meta.json  - base currency and column order
+      dates.i4   - one int32 day number per row, ascending
+      rates.f8   - row-major float64 matrix, NaN where a rate is missing
+    """
+
+    def __init__(self, store_dir=STORE_DIR, manifest_file=None):
+        self.store_dir = store_dir
+        self.meta_path = os.path.join(store_dir, META_FILE)
+        self.dates_path = os.path.join(store_dir, DATES_FILE)
+        self.rates_path = os.path.join(store_dir, RATES_FILE)
+        # Next to the store's parent, i.e. data/currency_rates/manifest.json by default
+        self.manifest_file = manifest_file or os.path.join(
+            os.path.dirname(os.path.normpath(store_dir)), 'manifest.json')
+        self._meta = None
+        self._days = None
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def exists(self):
+        """Return True if the store has been created on disk"""
+        return os.path.exists(self.meta_path)
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            if self.exists():
+                with open(self.meta_path, 'r') as f:
+                    self._meta = json.load(f)
+            else:
+                self._meta = {'base_currency': 'USD', 'currencies': []}
+        return self._meta
+
+    @property
+    def currencies(self):
+        return list(self.meta['currencies'])
+
+    @property
+    def days(self):
+        """Day numbers of every stored row (small int32 array, cached)"""
+        if self._days is None:
+            if os.path.exists(self.dates_path):
+                days = np.fromfile(self.dates_path, dtype=DATE_DTYPE)
+                # A partially written row leaves the files out of step;
+                # only trust rows present in both
+                self._days = days[:self._rate_rows()]
+            else:
+                self._days = np.empty(0, dtype=DATE_DTYPE)
+        return self._days
+
+    @property
+    def dates(self):
+        return [day_to_date(d) for d in self.days]
+
+    @property
+    def latest_date(self):
+        return day_to_date(self.days[-1]) if len(self.days) else None
+
+    def __len__(self):
+        return len(self.days)
+
+    def _rate_rows(self):
+        width = len(self.meta['currencies'])
+        if not width or not os.path.exists(self.rates_path):
+            return 0
+        return os.path.getsize(self.rates_path) // (width * RATE_DTYPE.itemsize)
+
+    def _invalidate(self):
+        self._meta = None
+        self._days = None
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _matrix(self):
+        """Memory-map the rate matrix without reading it"""
+        rows = len(self.days)
+        if rows == 0:
+            return np.empty((0, len(self.currencies)), dtype=RATE_DTYPE)
+        return np.memmap(self.rates_path, dtype=RATE_DTYPE, mode='r',
+                         shape=(rows, len(self.currencies)))
+
+    def _row_bounds(self, start=None, end=None):
+        days = self.days
+        lo = 0 if start is None else int(np.searchsorted(days, date_to_day(start), 'left'))
+        hi = len(days) if end is None else int(np.searchsorted(days, date_to_day(end), 'right'))
+        return lo, hi
+
+    def _columns(self, currencies):
+        if currencies is None:
+            return self.currencies, None
+        known = self.currencies
+        selected = [c for c in currencies if c in known]
+        return selected, [known.index(c) for c in selected]
+
+    def read_range(self, start=None, end=None, currencies=None):
+        """
+        Read rates between two ISO dates (inclusive)
+        Returns (dates, currencies, matrix); only the requested rows are paged in
+        """
+        lo, hi = self._row_bounds(start, end)
+        columns, idx = self._columns(currencies)
+        block = self._matrix()[lo:hi]
+        block = np.array(block if idx is None else block[:, idx])
+        dates = [day_to_date(d) for d in self.days[lo:hi]]
+        return dates, columns, block
+
+    def read_day(self, date):
+        """Return {currency: rate} for a single date, or None if not stored"""
+        row = self.row_index(date)
+        if row is None:
+            return None
+        values = self._matrix()[row]
+        return {c: float(v) for c, v in zip(self.currencies, values) if not np.isnan(v)}
+
+    def read_latest(self):
+        """Return (date, {currency: rate}) for the most recent row"""
+        if len(self) == 0:
+            return None, {}
+        last = self.latest_date
+        return last, self.read_day(last)
+
+    def count_values(self):
+        """Number of non-missing rates in the store"""
+        return int(np.count_nonzero(~np.isnan(self._matrix())))
+
+    def row_index(self, date):
+        """Return the row number for a date, or None"""
+        day = date_to_day(date)
+        days = self.days
+        pos = int(np.searchsorted(days, day))
+        if pos < len(days) and days[pos] == day:
+            return pos
+        return None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _row_vector(self, rates, currencies):
+        row = np.full(len(currencies), np.nan, dtype=RATE_DTYPE)
+        for i, code in enumerate(currencies):
+            if code in rates and rates[code] is not None:
+                row[i] = rates[code]
+        return row
+
+    @contextmanager
+    def _transaction(self, txn, label):
+        """The caller's transaction, or a new one committed when the block ends"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        try:
+            if txn is not None:
+                txn.untracked([self.meta_path, self.dates_path, self.rates_path])
+                yield txn
+            else:
+                with Transaction(label, self.manifest_file) as own:
+                    own.untracked([self.meta_path, self.dates_path, self.rates_path])
+                    yield own
+        finally:
+            # Staged writes land on commit; reload the index lazily afterwards
+            self._invalidate()
+
+    def _write_meta(self, meta, txn):
+        with write_file(self.meta_path, txn) as f:
+            json.dump(meta, f, indent=2)
+
+    def is_unchanged(self, date, rates):
+        """Return True if the store already holds exactly these rates for a date"""
+        stored = self.read_day(date)
+        if stored is None:
+            return False
+        fresh = {c: float(v) for c, v in rates.items() if v is not None}
+        return stored == fresh
+
+    def upsert(self, date, rates, base_currency='USD', txn=None):
+        """
+        Insert or replace one day
+        The stored row becomes exactly these rates: currencies missing from the
+        payload are NaN for that date, matching history.csv's replace.
+        Returns 'unchanged', 'updated' or 'inserted'; unchanged days touch no files
+        """
+        if self.is_unchanged(date, rates):
+            return 'unchanged'
+        count('store_rows_written')
+
+        row = self.row_index(date)
+        if row is None:
+            self.append(date, rates, base_currency, txn)
+            return 'inserted'
+
+        if set(rates) - set(self.currencies):
+            # New column: rewrite, still replacing the whole day like the in-place path
+            self.merge({date: rates}, base_currency, replace=True, txn=txn)
+            return 'updated'
+
+        # Same columns: stage a copy of the matrix with the row replaced
+        matrix = np.array(self._matrix())
+        matrix[row] = self._row_vector(rates, self.currencies)
+        with self._transaction(txn, f"store {date}") as txn:
+            with write_file(self.rates_path, txn, 'wb') as f:
+                f.write(matrix.tobytes())
+        return 'updated'
+
+    def append(self, date, rates, base_currency='USD', txn=None):
+        """
+        Add one day of rates
+        Appending a newer date is O(1): one row is staged for each file.
+        An older date or a new currency column falls back to a rewrite.
+        """
+        new_codes = set(rates) - set(self.currencies)
+        days = self.days
+        day = date_to_day(date)
+
+        if new_codes or (len(days) and day <= days[-1]):
+            self.merge({date: rates}, base_currency, txn=txn)
+            return
+
+        row = self._row_vector(rates, self.currencies)
+        with self._transaction(txn, f"store {date}") as txn:
+            with txn.append(self.rates_path, 'wb') as f:
+                f.write(row.tobytes())
+            with txn.append(self.dates_path, 'wb') as f:
+                f.write(np.array([day], dtype=DATE_DTYPE).tobytes())
+
+    def to_records(self):
+        """Return the whole store as {date: {currency: rate}}"""
+        _, _, matrix = self.read_range()
+        currencies = self.currencies
+        return {d: {c: float(v) for c, v in zip(currencies, row) if not np.isnan(v)}
+                for d, row in zip(self.dates, matrix)}
+
+    def merge(self, records, base_currency='USD', replace=False, txn=None):
+        """
+        Merge many days into the store with a single rewrite
+        Rates are merged into any stored day; with replace each given day is replaced whole
+        """
+        merged = self.to_records()
+        for date, rates in records.items():
+            merged[date] = dict(rates) if replace else {**merged.get(date, {}), **rates}
+        self.write_all(merged, base_currency, txn)
+
+    def write_all(self, records, base_currency='USD', txn=None):
+        """Replace the store with {date: {currency: rate}} in one pass"""
+        currencies = sorted({c for rates in records.values() for c in rates})
+        dates = sorted(records)
+        matrix = np.full((len(dates), len(currencies)), np.nan, dtype=RATE_DTYPE)
+        for i, d in enumerate(dates):
+            matrix[i] = self._row_vector(records[d], currencies)
+
+        with self._transaction(txn, f"store rewrite ({len(dates)} days)") as txn:
+            self._write_meta({'base_currency': base_currency, 'currencies': currencies}, txn)
+            with write_file(self.rates_path, txn, 'wb') as f:
+                f.write(matrix.tobytes())
+            with write_file(self.dates_path, txn, 'wb') as f:
+                f.write(np.array([date_to_day(d) for d in dates], dtype=DATE_DTYPE).tobytes())
+
+# ----------------------------------------------------------------------
+# Rebuild from per-day snapshots
+# ----------------------------------------------------------------------
+
+def load_history_csv(path):
+    """
+    Read history.csv into {date: snapshot}
+    Later rows for the same (date, currency) win, like compact_history_csv
+    """
+    snapshots = {}
+    if not os.path.exists(path):
+        return snapshots
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            snapshot = snapshots.setdefault(row['Date'], {
+                'date': row['Date'], 'timestamp': row['Timestamp'], 'base_currency': 'USD', 'rates': {}})
+            snapshot['rates'][row['Currency']] = float(row['Rate_to_USD'])
+    return snapshots
+
+def load_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Read every snapshot into {date: {currency: rate}}
+    Packed archives (snapshot_dir/archive) are read first; daily partitions
+    (snapshot_dir/partitions), then per-day JSON and CSV files, override them
+    for the days they cover. history.csv fills days no snapshot covers.
+    """
+    from partitions import load_partitions
+    from snapshot_archive import load_archives, load_snapshot_files
+
+    snapshots = load_archives(os.path.join(snapshot_dir, 'archive'))
+    snapshots.update(load_partitions(os.path.join(snapshot_dir, 'partitions')))
+    snapshots.update(load_snapshot_files(snapshot_dir))
+    for date, snapshot in load_history_csv(os.path.join(snapshot_dir, 'history.csv')).items():
+        snapshots.setdefault(date, snapshot)
+
+    records = {date: snapshot['rates'] for date, snapshot in sorted(snapshots.items())}
+    base_currency = 'USD'
+    for snapshot in snapshots.values():
+        base_currency = snapshot.get('base_currency', base_currency)
+    return records, base_currency
+
+def rebuild_store(snapshot_dir=SNAPSHOT_DIR, store_dir=STORE_DIR):
+    """Rebuild the history store from archived and per-day snapshots and history.csv"""
+    records, base_currency = load_snapshots(snapshot_dir)
+    store = HistoryStore(store_dir)
+    store.write_all(records, base_currency)
+    return store
+
+def last_history_date(path):
+    """Date of the last row of history.csv, read from the file's tail"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        date = line.split(b',', 1)[0].decode(errors='replace')
+        if len(date) == 10 and date[4] == '-':
+            return date
+    return None
+
+def is_stale(store, snapshot_dir=SNAPSHOT_DIR):
+    """
+    True when history.csv changed after the store and ends on a day the store lacks
+    The store is not committed, so a pull only brings the new history.csv rows
+    """
+    history_csv = os.path.join(snapshot_dir, 'history.csv')
+    try:
+        if os.path.getmtime(history_csv) <= os.path.getmtime(store.meta_path):
+            return False
+    except OSError:
+        return False
+    last = last_history_date(history_csv)
+    return last is not None and store.row_index(last) is None
+
+def open_store(snapshot_dir=SNAPSHOT_DIR, store_dir=STORE_DIR):
+    """
+    Open the history store, building it from snapshots the first time or when it fell behind
+    In partition mode, partitions added or changed since the store was written are folded in
+    """
+    store = HistoryStore(store_dir)
+    partition_dir = os.path.join(snapshot_dir, 'partitions')
+    if not store.exists():
+        print(f"🔧 Building history store from snapshots in {snapshot_dir}")
+        store = rebuild_store(snapshot_dir, store_dir)
+    elif os.path.isdir(partition_dir):
+        from partitions import sync_partitions
+        synced = sync_partitions(store, partition_dir)
+        if synced:
+            print(f"🔧 Folded {synced} new or changed partition(s) into the history store")
+    elif is_stale(store, snapshot_dir):
+        print(f"🔧 History store is behind {snapshot_dir}/history.csv - rebuilding")
+        store = rebuild_store(snapshot_dir, store_dir)
+    return store
+
+# ----------------------------------------------------------------------
+# history.csv maintenance
+# ----------------------------------------------------------------------
+
+HISTORY_CSV = "data/currency_rates/history.csv"
+HISTORY_HEADER = ['Date', 'Timestamp', 'Currency', 'Rate_to_USD']
+
+def _write_history_rows(path, rows, txn=None):
+    with write_file(path, txn, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_HEADER)
+        writer.writerows(rows)
+
+def upsert_history_csv(date, timestamp, rates, replace=False, path=HISTORY_CSV, txn=None):
+    """
+    Add one day to history.csv
+    New days are appended; with replace=True any existing rows for the date are dropped first.
+    Inside a transaction (see manifest.py) the write is staged and committed with the others.
+    """
+    new_rows = [[date, timestamp, currency, rate] for currency, rate in sorted(rates.items())]
+    count('rows_written', len(new_rows))
+
+    if replace and os.path.exists(path):
+        with open(path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            rows = [row for row in reader if row and row[0] != date]
+        _write_history_rows(path, rows + new_rows, txn)
+        return
+
+    file_exists = os.path.exists(path)
+    with (txn.append(path, newline='') if txn is not None else open(path, 'a', newline='')) as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(HISTORY_HEADER)
+        writer.writerows(new_rows)
+
+def merge_history_csv(snapshots, path=HISTORY_CSV, txn=None):
+    """
+    Write many days into history.csv in one pass, keyed by (date, currency)
+    snapshots is a list of dicts with 'date', 'timestamp' and 'rates'
+    """
+    rows = {}
+    if os.path.exists(path):
+        with open(path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if row:
+                    rows[(row[0], row[2])] = row
+
+    for snapshot in snapshots:
+        for currency, rate in snapshot['rates'].items():
+            rows[(snapshot['date'], currency)] = [snapshot['date'], snapshot['timestamp'], currency, rate]
+        count('rows_written', len(snapshot['rates']))
+
+    _write_history_rows(path, [rows[key] for key in sorted(rows)], txn)
+
+def compact_history_csv(path=HISTORY_CSV):
+    """
+    Deduplicate history.csv by (date, currency), keeping the most recent fetch
+    Returns (rows_before, rows_after)
+    """
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        rows = [row for row in reader if row]
+
+    latest = {}
+    for row in rows:
+        key = (row[0], row[2])
+        if key not in latest or row[1] >= latest[key][1]:
+            latest[key] = row
+
+    compacted = [latest[key] for key in sorted(latest)]
+    _write_history_rows(path, compacted)
+    return len(rows), len(compacted)
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Manage the currency history store")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = sub.add_parser('rebuild', help="Rebuild the store from per-day snapshots")
+    rebuild.add_argument('--snapshots', default=SNAPSHOT_DIR)
+    rebuild.add_argument('--store', default=STORE_DIR)
+
+    show = sub.add_parser('show', help="Print rates for a date range")
+    show.add_argument('--start')
+    show.add_argument('--end')
+    show.add_argument('--currencies', help="Comma-separated currency codes")
+    show.add_argument('--store', default=STORE_DIR)
+
+    compact = sub.add_parser('compact-history', help="Deduplicate history.csv by (date, currency)")
+    compact.add_argument('--path', default=HISTORY_CSV)
+
+    args = parser.parse_args()
+
+    if args.command == 'compact-history':
+        if not os.path.exists(args.path):
+            print(f"⚠️ No history file at {args.path}")
+            return 1
+        before, after = compact_history_csv(args.path)
+        print(f"✅ Compacted {args.path}: {before} rows -> {after} rows ({before - after} duplicates removed)")
+        return 0
+
+    if args.command == 'rebuild':
+        store = rebuild_store(args.snapshots, args.store)
+        print(f"✅ Rebuilt {args.store}: {len(store)} days x {len(store.currencies)} currencies")
+        return 0
+
+    store = HistoryStore(args.store)
+    if not store.exists():
+        print(f"⚠️ No history store at {args.store} - run 'rebuild' first")
+        return 1
+
+    currencies = args.currencies.split(',') if args.currencies else None
+    dates, columns, matrix = store.read_range(args.start, args.end, currencies)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['Date'] + columns)
+    for d, row in zip(dates, matrix):
+        writer.writerow([d] + ['' if np.isnan(v) else repr(float(v)) for v in row])
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
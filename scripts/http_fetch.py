@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Fetch Layer
+One pooled keep-alive session for every fetcher, ETag/Last-Modified conditional
+requests, and a TTL-based on-disk response cache with size-bounded eviction
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+CACHE_DIR = ".cache/http"
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+USER_AGENT = "dev-economics-monitor/1.0"
+
+_session = None
+_session_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+def make_session(pool_size=8, retries=5, backoff=0.5):
+    """Create a pooled session that retries transient failures with exponential backoff"""
+
+    # requests/urllib3 are only loaded once something actually goes to the network
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session():
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+class CachedResponse:
+    """Minimal response object returned by fetch(), whether from the network or the cache"""
+
+    def __init__(self, url, status_code, content, headers, source):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        # 'network', 'revalidated' (304) or 'cache' (fresh, no request made)
+        self.source = source
+
+    @property
+    def from_cache(self):
+        return self.source != 'network'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get('Content-Type', '')
+        if 'charset=' in content_type:
+            return content_type.split('charset=')[-1].split(';')[0].strip()
+        return 'utf-8'
+
+    def json(self):
+        return json.loads(self.content)
+
+# ----------------------------------------------------------------------
+# On-disk cache
+# ----------------------------------------------------------------------
+
+def cache_key(url, params=None):
+    """Stable cache key for a URL and its query parameters"""
+    raw = url + '?' + '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _paths(key, cache_dir):
+    return os.path.join(cache_dir, key + '.meta.json'), os.path.join(cache_dir, key + '.body')
+
+def _read_entry(key, cache_dir):
+    meta_path, body_path = _paths(key, cache_dir)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    return meta, body
+
+def _write_entry(key, meta, body, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path, body_path = _paths(key, cache_dir)
+    if body is not None:
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(body)
+        os.replace(body_path + '.tmp', body_path)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def _touch(key, cache_dir):
+    meta_path, _ = _paths(key, cache_dir)
+    try:
+        os.utime(meta_path)
+    except OSError:
+        pass
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Drop least recently used entries until the cache fits in max_bytes"""
+
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.meta.json'):
+            continue
+        key = name[:-len('.meta.json')]
+        meta_path, body_path = _paths(key, cache_dir)
+        try:
+            size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+            used = os.path.getmtime(meta_path)
+        except OSError:
+            continue
+        entries.append((used, key, size))
+        total += size
+
+    removed = 0
+    for _, key, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in _paths(key, cache_dir):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+# ----------------------------------------------------------------------
+# Fetching
+# ----------------------------------------------------------------------
+
+def _retries(response):
+    """Number of retries urllib3 made for a response"""
+    retries = getattr(response.raw, 'retries', None)
+    return len(retries.history) if retries is not None else 0
+
+def _timed_get(session, url, **kwargs):
+    """session.get that records failed requests in the run metrics before re-raising"""
+    import requests
+    started = time.perf_counter()
+    try:
+        return session.get(url, **kwargs), time.perf_counter() - started
+    except requests.exceptions.RequestException as e:
+        metrics.record_request(url, time.perf_counter() - started, 0, 'error', error=type(e).__name__)
+        raise
+
+def fetch(url, params=None, ttl=0, timeout=15, cache=True, cache_dir=CACHE_DIR,
+          max_bytes=CACHE_MAX_BYTES, session=None):
+    """
+    GET a URL through the shared session and the response cache
+
+    ttl     - seconds a cached body is reused without any request; 0 always revalidates
+    cache   - False bypasses the cache entirely (pooling still applies)
+
+    Unchanged sources cost a 304 (or nothing inside the TTL). HTTP errors raise
+    requests.exceptions.RequestException like requests.get + raise_for_status.
+    """
+
+    session = session or get_session()
+
+    if not cache:
+        response, seconds = _timed_get(session, url, params=params, timeout=timeout)
+        metrics.record_request(url, seconds, len(response.content), 'network', _retries(response))
+        response.raise_for_status()
+        return CachedResponse(response.url, response.status_code, response.content,
+                              dict(response.headers), 'network')
+
+    key = cache_key(url, params)
+    with _cache_lock:
+        meta, body = _read_entry(key, cache_dir)
+
+    now = time.time()
+    if meta is not None and ttl and now - meta['fetched_at'] < ttl:
+        _touch(key, cache_dir)
+        metrics.record_request(url, 0.0, len(body), 'cache')
+        return CachedResponse(meta['url'], meta['status_code'], body, meta['headers'], 'cache')
+
+    headers = {}
+    if meta is not None:
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+
+    response, seconds = _timed_get(session, url, params=params, headers=headers, timeout=timeout)
+    revalidated = response.status_code == 304 and meta is not None
+    metrics.record_request(url, seconds, len(body) if revalidated else len(response.content),
+                           'revalidated' if revalidated else 'network', _retries(response))
+
+    if revalidated:
+        meta['fetched_at'] = now
+        with _cache_lock:
+            _write_entry(key, meta, None, cache_dir)
+        return CachedResponse(meta['url'], meta['status_code'], body, meta['headers'], 'revalidated')
+
+    response.raise_for_status()
+
+    kept = {name: response.headers[name]
+            for name in ('ETag', 'Last-Modified', 'Content-Type', 'Cache-Control')
+            if name in response.headers}
+    meta = {
+        'url': response.url,
+        'status_code': response.status_code,
+        'headers': kept,
+        'fetched_at': now,
+        'size': len(response.content),
+    }
+    with _cache_lock:
+        _write_entry(key, meta, response.content, cache_dir)
+        evict(cache_dir, max_bytes)
+
+    return CachedResponse(response.url, response.status_code, response.content, kept, 'network')
+
+def fetch_many(requests_list, workers=4, **kwargs):
+    """
+    Fetch several URLs concurrently over the shared session
+    requests_list is a list of (url, params) pairs; results keep the same order
+    and failed fetches are returned as the exception instead of raising
+    """
+
+    def one(item):
+        url, params = item
+        try:
+            return fetch(url, params, **kwargs)
+        except Exception as e:
+            import requests
+            if isinstance(e, requests.exceptions.RequestException):
+                return e
+            raise
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, requests_list))
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Inspect or trim the HTTP response cache")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('info', help="Show cache size and entries")
+    trim = sub.add_parser('evict', help="Evict entries down to a size limit")
+    trim.add_argument('--max-bytes', type=int, default=CACHE_MAX_BYTES)
+    args = parser.parse_args()
+
+    if args.command == 'evict':
+        removed = evict(CACHE_DIR, args.max_bytes)
+        print(f"🧹 Evicted {removed} cache entries")
+        return 0
+
+    if not os.path.isdir(CACHE_DIR):
+        print(f"⚠️ No cache at {CACHE_DIR}")
+        return 0
+
+    total = 0
+    for name in sorted(os.listdir(CACHE_DIR)):
+        if name.endswith('.meta.json'):
+            with open(os.path.join(CACHE_DIR, name), 'r') as f:
+                meta = json.load(f)
+            total += meta['size']
+            age = time.time() - meta['fetched_at']
+            print(f"  {meta['size']:>10,} B  {age / 3600:6.1f}h old  {meta['url']}")
+    print(f"📦 {total:,} bytes cached in {CACHE_DIR}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
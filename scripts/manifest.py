@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Write Manifest
+Crash-safe writes for the currency save path. A Transaction stages every file
+next to its target, writes a journal of the pending operations with content
+hashes, then applies them: replacements by rename, appends by re-writing the
+staged bytes at a recorded offset, so applying twice is harmless. A run that
+is interrupted after its journal was written is rolled forward on the next
+start; one interrupted before that leaves its targets untouched.
+
+Committed files are recorded in data/currency_rates/manifest.json with sha256
+and size. Checkout-specific data stays in the untracked manifest.json.local:
+each file's last seen mtime, so consumers only rehash files that changed since,
+and the entries for untracked files such as the history store.
+
+A transaction holds an exclusive lock (manifest.json.lock) from start to
+commit, so a second process (e.g. the watcher next to a cron run) waits
+instead of clearing files the first one has staged but not yet journaled.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+MANIFEST_FILE = "data/currency_rates/manifest.json"
+STAGE_SUFFIX = ".txn"
+LOCK_SUFFIX = ".lock"
+LOCAL_SUFFIX = ".local"
+RUN_HISTORY = 60
+
+_process_lock = threading.RLock()
+_lock_depth = {}
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@contextmanager
+def atomic_write(path, mode='w', newline=None):
+    """Write path through a temp file that replaces it only once fully written"""
+
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, mode, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _write_json(path, data):
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+# ----------------------------------------------------------------------
+# Manifest
+# ----------------------------------------------------------------------
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {'files': {}, 'runs': []}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_local(manifest_file=MANIFEST_FILE):
+    """The untracked side manifest: {'files': untracked entries, 'mtimes': {path: mtime_ns}}"""
+    path = manifest_file + LOCAL_SUFFIX
+    if not os.path.exists(path):
+        return {'files': {}, 'mtimes': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def manifest_files(manifest_file=MANIFEST_FILE, local=None):
+    """Every recorded file, tracked and untracked, as {path: entry}"""
+    local = load_local(manifest_file) if local is None else local
+    return {**load_manifest(manifest_file)['files'], **local['files']}
+
+def _file_entry(path, run, sha256=None):
+    return {'sha256': sha256 or file_sha256(path), 'size': os.path.getsize(path), 'run': run}
+
+def _record_run(manifest_file, journal, paths):
+    manifest = load_manifest(manifest_file)
+    local = load_local(manifest_file)
+    untracked = set(journal.get('local', []))
+    staged = {op['path']: op['sha256'] for op in journal['ops'] if op['op'] == 'replace'}
+    for path in paths:
+        if os.path.exists(path):
+            entry = _file_entry(path, journal['run'], staged.get(path))
+            if path in untracked:
+                local['files'][path] = entry
+                manifest['files'].pop(path, None)
+            else:
+                manifest['files'][path] = entry
+            local['mtimes'][path] = os.stat(path).st_mtime_ns
+
+    tracked = sorted(set(paths) - untracked)
+    if tracked:
+        manifest['runs'].append({'run': journal['run'], 'label': journal['label'],
+                                 'committed': datetime.now().isoformat(), 'files': tracked})
+        manifest['runs'] = manifest['runs'][-RUN_HISTORY:]
+        _write_json(manifest_file, manifest)
+    _write_json(manifest_file + LOCAL_SUFFIX, local)
+
+# ----------------------------------------------------------------------
+# Transactions
+# ----------------------------------------------------------------------
+
+@contextmanager
+def locked(manifest_file=MANIFEST_FILE):
+    """
+    Hold the write lock for a manifest; re-entrant within a process
+    Other processes block until it is released (no locking where fcntl is unavailable)
+    """
+
+    with _process_lock:
+        depth = _lock_depth.get(manifest_file, 0)
+        handle = None
+        if depth == 0:
+            try:
+                import fcntl
+            except ImportError:
+                fcntl = None
+            os.makedirs(os.path.dirname(manifest_file) or '.', exist_ok=True)
+            handle = open(manifest_file + LOCK_SUFFIX, 'a')
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+        _lock_depth[manifest_file] = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depth[manifest_file] = depth
+            if handle is not None:
+                # Closing the file releases the flock
+                handle.close()
+
+def _apply(op):
+    """Apply one journaled operation; safe to repeat after a crash"""
+
+    path, stage = op['path'], op['stage']
+    if not os.path.exists(stage):
+        # Applied before the crash; the stage file is removed last
+        return
+    if op['op'] == 'replace':
+        os.replace(stage, path)
+        return
+
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size < op['offset']:
+        raise ValueError(f"{path} is shorter than the journaled append offset {op['offset']}")
+    with open(stage, 'rb') as src, open(path, 'r+b' if os.path.exists(path) else 'wb') as dst:
+        dst.truncate(op['offset'])
+        dst.seek(op['offset'])
+        dst.write(src.read())
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.remove(stage)
+
+def recover(manifest_file=MANIFEST_FILE):
+    """
+    Roll forward a commit interrupted after its journal was written, or remove
+    files staged by a run that never reached its journal. Runs under the write
+    lock, so staged files of a live transaction are never touched. Returns
+    True if a journal was replayed.
+    """
+
+    with locked(manifest_file):
+        journal_file = manifest_file + '.journal'
+        if not os.path.exists(journal_file):
+            root = os.path.dirname(manifest_file) or '.'
+            for stage in glob.glob(os.path.join(root, '**', '*' + STAGE_SUFFIX), recursive=True):
+                os.remove(stage)
+            return False
+
+        with open(journal_file, 'r') as f:
+            journal = json.load(f)
+        print(f"🩹 Rolling forward interrupted write {journal['run']} ({journal['label']})")
+        for op in journal['ops']:
+            _apply(op)
+        _record_run(manifest_file, journal, [op['path'] for op in journal['ops']] + journal['recorded'])
+        os.remove(journal_file)
+        return True
+
+class Transaction:
+    """
+    A group of file writes committed together
+    Used as a context manager: writes are staged inside the block and applied
+    on a clean exit; an exception discards everything staged.
+    """
+
+    def __init__(self, label=None, manifest_file=MANIFEST_FILE):
+        self.label = label
+        self.manifest_file = manifest_file
+        self.journal_file = manifest_file + '.journal'
+        self.ops = []
+        self.recorded = []
+        self.local = set()
+        self._lock = None
+
+    def __enter__(self):
+        self._lock = locked(self.manifest_file)
+        self._lock.__enter__()
+        try:
+            recover(self.manifest_file)
+        except BaseException:
+            self._lock.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.abort()
+        finally:
+            self._lock.__exit__(None, None, None)
+        return False
+
+    def _add(self, op):
+        for old in self.ops:
+            if old['path'] == op['path'] and old['stage'] != op['stage'] and os.path.exists(old['stage']):
+                # A replacement staged after an append supersedes it
+                os.remove(old['stage'])
+        self.ops = [o for o in self.ops if o['path'] != op['path']] + [op]
+
+    @contextmanager
+    def _staged(self, stage, mode, newline):
+        try:
+            with open(stage, mode, newline=newline) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            if os.path.exists(stage):
+                os.remove(stage)
+            raise
+
+    @contextmanager
+    def open(self, path, mode='w', newline=None):
+        """Stage a full replacement of path"""
+        stage = path + STAGE_SUFFIX
+        with self._staged(stage, mode, newline) as f:
+            yield f
+        self._add({'op': 'replace', 'path': path, 'stage': stage, 'sha256': file_sha256(stage)})
+
+    @contextmanager
+    def append(self, path, mode='w', newline=None):
+        """
+        Stage text (or bytes, with mode 'wb') to append to path at its current end
+        Appending to the same path again extends the staged data
+        """
+        stage = path + '.append' + STAGE_SUFFIX
+        pending = next((o for o in self.ops if o['path'] == path), None)
+        if pending is not None and pending['op'] != 'append':
+            raise ValueError(f"{path} is already staged as a replacement in this transaction")
+        if pending is not None:
+            mode = mode.replace('w', 'a')
+        with self._staged(stage, mode, newline) as f:
+            yield f
+        offset = pending['offset'] if pending else (os.path.getsize(path) if os.path.exists(path) else 0)
+        self._add({'op': 'append', 'path': path, 'stage': stage, 'offset': offset,
+                   'sha256': file_sha256(stage)})
+
+    def record(self, paths):
+        """Add files that were already written atomically elsewhere to the manifest"""
+        self.recorded.extend(paths)
+
+    def untracked(self, paths):
+        """Mark paths kept out of git; they are recorded in the side manifest only"""
+        self.local.update(paths)
+
+    def commit(self):
+        if not self.ops and not self.recorded:
+            return
+        journal = {'run': datetime.now().strftime('%Y%m%dT%H%M%S') + f"-{os.getpid()}",
+                   'label': self.label, 'ops': self.ops, 'recorded': self.recorded,
+                   'local': sorted(self.local)}
+        # Writing the journal is the commit point: from here on the run is rolled forward
+        _write_json(self.journal_file, journal)
+        for op in self.ops:
+            _apply(op)
+        _record_run(self.manifest_file, journal, [op['path'] for op in self.ops] + self.recorded)
+        os.remove(self.journal_file)
+
+    def abort(self):
+        for op in self.ops:
+            if os.path.exists(op['stage']):
+                os.remove(op['stage'])
+        self.ops = []
+
+@contextmanager
+def write_file(path, txn=None, mode='w', newline=None):
+    """Replace path inside a transaction, or atomically on its own"""
+    opener = txn.open if txn is not None else atomic_write
+    with opener(path, mode, newline=newline) as f:
+        yield f
+
+# ----------------------------------------------------------------------
+# Consumers
+# ----------------------------------------------------------------------
+
+def changed_files(manifest_file=MANIFEST_FILE):
+    """Manifest paths whose size differs from what was committed, or whose mtime moved since last seen"""
+    local = load_local(manifest_file)
+    changed = []
+    for path, entry in manifest_files(manifest_file, local).items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            changed.append(path)
+            continue
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != local['mtimes'].get(path):
+            changed.append(path)
+    return sorted(changed)
+
+def verify(manifest_file=MANIFEST_FILE, full=False, update=True):
+    """
+    Check committed files against the manifest; returns {path: problem}
+    Files whose size and mtime still match are trusted unless full is set.
+    A file whose content is unchanged but whose mtime moved (e.g. after a git
+    checkout) gets its mtime refreshed in the side manifest so the next check
+    can skip it again.
+    """
+
+    local = load_local(manifest_file)
+    files = manifest_files(manifest_file, local)
+    paths = list(files) if full else changed_files(manifest_file)
+    problems = {}
+    refreshed = False
+    for path in paths:
+        entry = files[path]
+        if not os.path.exists(path):
+            problems[path] = 'missing'
+            continue
+        if file_sha256(path) != entry['sha256']:
+            problems[path] = 'content differs from manifest'
+            continue
+        mtime = os.stat(path).st_mtime_ns
+        if mtime != local['mtimes'].get(path):
+            local['mtimes'][path] = mtime
+            refreshed = True
+    if refreshed and update:
+        _write_json(manifest_file + LOCAL_SUFFIX, local)
+    return problems
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Check files against the write manifest")
+    parser.add_argument('--manifest', default=MANIFEST_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    check = sub.add_parser('verify', help="Rehash files changed since they were committed")
+    check.add_argument('--full', action='store_true', help="Rehash every file")
+    sub.add_parser('runs', help="List recent committed runs")
+    sub.add_parser('recover', help="Roll forward an interrupted write")
+    args = parser.parse_args()
+
+    if args.command == 'recover':
+        print("🩹 Recovered" if recover(args.manifest) else "✅ Nothing to recover")
+        return 0
+
+    manifest = load_manifest(args.manifest)
+    if args.command == 'runs':
+        for run in manifest['runs']:
+            print(f"  {run['run']:<24} {run['label'] or '':<28} {len(run['files'])} file(s)")
+        return 0
+
+    if os.path.exists(args.manifest + '.journal'):
+        print("⚠️ An interrupted write is pending - run: python scripts/manifest.py recover")
+    problems = verify(args.manifest, args.full)
+    for path, problem in sorted(problems.items()):
+        print(f"❌ {path}: {problem}")
+    files = manifest_files(args.manifest)
+    print(f"✅ {len(files) - len(problems)} of {len(files)} files match the manifest")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Records wall time, HTTP latency, response sizes, cache hits, retries and rows
+written for every instrumented fetch/save/generate call, writes one JSON file
+per run, and can dump a cProfile of any span for later inspection with pstats
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Local like the profiles: metrics are uploaded as a workflow artifact, not committed
+METRICS_DIR = ".cache/metrics"
+PROFILE_DIR = ".cache/profiles"
+
+_lock = threading.Lock()
+_local = threading.local()
+_run = {'started': datetime.now().isoformat(), 'clock': time.perf_counter(),
+        'spans': [], 'requests': [], 'totals': {}}
+_profile = {'names': set(), 'dir': PROFILE_DIR}
+
+def enable_profiling(names, profile_dir=PROFILE_DIR):
+    """Profile spans with these names ('all' profiles every span)"""
+    _profile['names'] = set(names)
+    _profile['dir'] = profile_dir
+
+def reset():
+    """Start a new run in a long-lived process"""
+    with _lock:
+        _run.update(started=datetime.now().isoformat(), clock=time.perf_counter(),
+                    spans=[], requests=[], totals={})
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def count(name, value=1):
+    """Add to a counter on every open span of this thread and on the run totals"""
+    for span in _stack():
+        span['counters'][name] = span['counters'].get(name, 0) + value
+    with _lock:
+        _run['totals'][name] = _run['totals'].get(name, 0) + value
+
+def record_request(url, seconds, size, source, retries=0, error=None):
+    """Record one HTTP request made through http_fetch; source is 'error' for failures"""
+    count('http_requests')
+    if error is not None:
+        count('http_errors')
+    count('http_seconds', seconds)
+    count('http_bytes', size)
+    if source in ('cache', 'revalidated'):
+        count('cache_hits')
+    if retries:
+        count('http_retries', retries)
+    stack = _stack()
+    with _lock:
+        _run['requests'].append({
+            'span': stack[-1]['name'] if stack else None,
+            'url': url,
+            'seconds': round(seconds, 4),
+            'bytes': size,
+            'source': source,
+            'retries': retries,
+            'error': error,
+        })
+
+def _start_profiler(name):
+    if 'all' not in _profile['names'] and name not in _profile['names']:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Only one profiler can be active at a time
+        print(f"⚠️ Not profiling {name}: another profile is running")
+        return None
+    return profiler
+
+def _dump_profile(profiler, name):
+    os.makedirs(_profile['dir'], exist_ok=True)
+    safe = name.replace(':', '_').replace('/', '_')
+    path = os.path.join(_profile['dir'], f"{safe}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    return path
+
+@contextmanager
+def span(name):
+    """Time a block; counters recorded inside it are attributed to it"""
+
+    stack = _stack()
+    record = {
+        'name': name,
+        'parent': stack[-1]['name'] if stack else None,
+        'thread': threading.current_thread().name,
+        'offset': round(time.perf_counter() - _run['clock'], 4),
+        'counters': {},
+    }
+    stack.append(record)
+    profiler = _start_profiler(name)
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record['seconds'] = round(time.perf_counter() - started, 6)
+        record['status'] = status
+        if profiler is not None:
+            profiler.disable()
+            record['profile'] = _dump_profile(profiler, name)
+        stack.pop()
+        with _lock:
+            _run['spans'].append(record)
+
+def instrumented(func):
+    """Decorator: run func inside a span named after it"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+def snapshot():
+    """The metrics collected so far in this run"""
+    with _lock:
+        return {
+            'started': _run['started'],
+            'finished': datetime.now().isoformat(),
+            'total_seconds': round(time.perf_counter() - _run['clock'], 4),
+            'totals': {k: round(v, 6) if isinstance(v, float) else v for k, v in _run['totals'].items()},
+            'spans': sorted(_run['spans'], key=lambda s: s['offset']),
+            'requests': list(_run['requests']),
+        }
+
+def write_run_metrics(path=None, metrics_dir=METRICS_DIR):
+    """Write this run's metrics as JSON; by default one timestamped file per run"""
+    if path is None:
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, f"run_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json")
+    with open(path + '.tmp', 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+# ----------------------------------------------------------------------
+# Reports
+# ----------------------------------------------------------------------
+
+def load_runs(metrics_dir=METRICS_DIR, last=30):
+    runs = []
+    for path in sorted(glob.glob(os.path.join(metrics_dir, 'run_*.json')))[-last:]:
+        with open(path, 'r') as f:
+            runs.append(json.load(f))
+    return runs
+
+def print_trend(runs):
+    """Per-span seconds across runs: first, median and latest, to spot degradation"""
+
+    series = {}
+    for run in runs:
+        for span_record in run['spans']:
+            series.setdefault(span_record['name'], []).append(span_record['seconds'])
+
+    print(f"📈 {len(runs)} run(s): {runs[0]['started'][:10]} to {runs[-1]['started'][:10]}")
+    print(f"  {'Span':<32}{'Runs':>6}{'First':>10}{'Median':>10}{'Latest':>10}")
+    for name, values in sorted(series.items()):
+        median = sorted(values)[len(values) // 2]
+        print(f"  {name:<32}{len(values):>6}{values[0]:>10.3f}{median:>10.3f}{values[-1]:>10.3f}")
+
+    totals = runs[-1]['totals']
+    if totals:
+        print("\n🔢 Latest run totals: " + ", ".join(
+            f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in sorted(totals.items())))
+
+def print_profile(path, limit=20):
+    import pstats
+    pstats.Stats(path).sort_stats('cumulative').print_stats(limit)
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Inspect run metrics and profiles")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    trend = sub.add_parser('trend', help="Show span timings across recent runs")
+    trend.add_argument('--dir', default=METRICS_DIR)
+    trend.add_argument('--last', type=int, default=30)
+
+    profile = sub.add_parser('profile', help="Print the top functions of a .prof dump")
+    profile.add_argument('path')
+    profile.add_argument('--limit', type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == 'profile':
+        print_profile(args.path, args.limit)
+        return 0
+
+    runs = load_runs(args.dir, args.last)
+    if not runs:
+        print(f"⚠️ No run metrics in {args.dir}")
+        return 1
+    print_trend(runs)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Monthly Series Loader
+Reads the monthly commodity and FAO food price records into plain
+{month: {series: value}} dictionaries for the query, export and analytics tools
+"""
+
+import csv
+import json
+import os
+import re
+
+from fao_food_index import INDICES
+from fetch_food_prices import FAO_INDEX_HEADER, INDEX_UNITS
+
+COMMODITY_DIR = "data/commodity_prices"
+FOOD_DIR = "data/food_prices"
+COMMODITY_HISTORY = "history.csv"
+FOOD_INDEX = "fao_index.csv"
+
+MONTH_FILE = re.compile(r'^(\d{4}-\d{2})\.json$')
+
+def _month_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    files = []
+    for name in os.listdir(directory):
+        match = MONTH_FILE.match(name)
+        if match:
+            files.append((match.group(1), os.path.join(directory, name)))
+    return sorted(files)
+
+def load_commodity_months(directory=COMMODITY_DIR):
+    """
+    Load monthly commodity records
+    Returns ({month: {commodity: price}}, {commodity: {'category', 'unit'}})
+    """
+    prices = {}
+    info = {}
+
+    # The Pink Sheet history gives the long series; month files override it
+    history_path = os.path.join(directory, COMMODITY_HISTORY)
+    if os.path.exists(history_path):
+        with open(history_path, 'r', newline='') as f:
+            for record in csv.DictReader(f):
+                commodity = record['Commodity']
+                info.setdefault(commodity, {'category': record['Category'], 'unit': record['Unit']})
+                prices.setdefault(record['Date'], {})[commodity] = float(record['Price'])
+
+    for month, path in _month_files(directory):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        row = prices.setdefault(month, {})
+        for category, commodities in data.get('commodities', {}).items():
+            for commodity, details in commodities.items():
+                info.setdefault(commodity, {'category': category, 'unit': details.get('unit')})
+                if details.get('price') is not None or commodity not in row:
+                    row[commodity] = details.get('price')
+    return prices, info
+
+def load_food_months(directory=FOOD_DIR):
+    """
+    Load monthly FAO Food Price Index records
+    Returns ({month: {index: value}}, {index: unit})
+    """
+    values = {}
+    units = {}
+
+    # fao_index.csv holds every extracted month; month files override it
+    index_path = os.path.join(directory, FOOD_INDEX)
+    if os.path.exists(index_path):
+        columns = dict(zip(FAO_INDEX_HEADER[2:], INDICES))
+        with open(index_path, 'r', newline='') as f:
+            for record in csv.DictReader(f):
+                row = values.setdefault(record['Date'], {})
+                for column, name in columns.items():
+                    value = record.get(column)
+                    row[name] = None if value in (None, '', 'UPDATE_ME') else float(value)
+        for name in INDICES:
+            units.setdefault(name, INDEX_UNITS.get(name))
+
+    for month, path in _month_files(directory):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        row = values.setdefault(month, {})
+        for name, details in data.get('indices', {}).items():
+            units[name] = details.get('unit') or units.get(name)
+            if details.get('value') is not None or name not in row:
+                row[name] = details.get('value')
+    return values, units
+
+def directory_version(*directories):
+    """Cheap change marker: the newest mtime across the directories and their month files"""
+    newest = 0
+    for directory in directories:
+        try:
+            newest = max(newest, os.stat(directory).st_mtime_ns)
+        except OSError:
+            continue
+        paths = [path for _, path in _month_files(directory)]
+        paths += [os.path.join(directory, COMMODITY_HISTORY), os.path.join(directory, FOOD_INDEX)]
+        for path in paths:
+            try:
+                newest = max(newest, os.stat(path).st_mtime_ns)
+            except OSError:
+                continue
+    return newest
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Daily Currency Partitions
+Git-friendly storage: each fetched day is one small JSON file under
+data/currency_rates/partitions/<year>/<date>.json, written once and never
+touched again (a same-day refetch only replaces that day's own file).
+
+history.csv, latest.csv, the commodity template.csv and the local state
+(history store, write manifest, quality and summary statistics) become derived
+views: they are rebuilt from the partitions on demand and kept out of git by
+data/.gitignore. A daily commit then adds the day's partition next to that
+day's new quality report and summary files; tracked files are only rewritten
+when a monthly release is fetched or retried (month files, fao_index.csv and
+data/release_manifest.json, which stays tracked so a fresh checkout does not
+download every release again).
+
+Partition mode is on once the partitions directory exists; `migrate` creates
+it from the current snapshots, archives and history.csv.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+
+from history_store import HISTORY_CSV, HISTORY_HEADER, SNAPSHOT_DIR, STORE_DIR, HistoryStore, load_history_csv
+from manifest import atomic_write, write_file
+
+PARTITION_DIR = "data/currency_rates/partitions"
+LATEST_CSV = "data/currency_rates/latest.csv"
+GITIGNORE = "data/.gitignore"
+COMMODITY_DIR = "data/commodity_prices"
+PARTITION_NAME = re.compile(r'^(\d{4}-\d{2}-\d{2})\.json$')
+MONTH_NAME = re.compile(r'^\d{4}-\d{2}\.json$')
+
+# Rebuilt from the partitions (or reseeded) when missing, relative to data/
+DERIVED_PATHS = [
+    'currency_rates/history.csv',
+    'currency_rates/latest.csv',
+    'currency_rates/store/',
+    'currency_rates/archive/',
+    'currency_rates/manifest.json*',
+    'currency_rates/backfill_state.json',
+    'commodity_prices/template.csv',
+    'summaries/summary_state.json',
+    'quality/state.json',
+    'cross_rates/',
+]
+
+def enabled(partition_dir=PARTITION_DIR):
+    return os.path.isdir(partition_dir)
+
+def partition_path(date, partition_dir=PARTITION_DIR):
+    return os.path.join(partition_dir, date[:4], f"{date}.json")
+
+def partition_files(partition_dir=PARTITION_DIR):
+    """{date: path} for every partition, in date order"""
+    files = {}
+    if not os.path.isdir(partition_dir):
+        return files
+    for year in sorted(os.listdir(partition_dir)):
+        year_dir = os.path.join(partition_dir, year)
+        if not os.path.isdir(year_dir):
+            continue
+        for name in sorted(os.listdir(year_dir)):
+            match = PARTITION_NAME.match(name)
+            if match:
+                files[match.group(1)] = os.path.join(year_dir, name)
+    return files
+
+def write_partition(data, txn=None, partition_dir=PARTITION_DIR):
+    """Write one day's partition; returns the path"""
+    path = partition_path(data['date'], partition_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with write_file(path, txn) as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return path
+
+def read_partition(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_partitions(partition_dir=PARTITION_DIR):
+    """Every partition as {date: snapshot}"""
+    return {date: read_partition(path) for date, path in partition_files(partition_dir).items()}
+
+def newest_mtime(partition_dir=PARTITION_DIR):
+    """Latest modification time across the partitions (0 when there are none)"""
+    newest = 0
+    for path in partition_files(partition_dir).values():
+        newest = max(newest, os.stat(path).st_mtime_ns)
+    return newest
+
+# ----------------------------------------------------------------------
+# Derived views
+# ----------------------------------------------------------------------
+
+def _is_fresh(path, newest):
+    return os.path.exists(path) and os.stat(path).st_mtime_ns >= newest
+
+def write_history_view(snapshots, path=HISTORY_CSV):
+    """history.csv from {date: snapshot}, one row per (date, currency)"""
+    with atomic_write(path, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_HEADER)
+        for date, snapshot in sorted(snapshots.items()):
+            for currency, rate in sorted(snapshot['rates'].items()):
+                writer.writerow([date, snapshot.get('timestamp'), currency, rate])
+
+def write_latest_view(snapshot, path=LATEST_CSV):
+    with atomic_write(path, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_HEADER)
+        for currency, rate in sorted(snapshot['rates'].items()):
+            writer.writerow([snapshot['date'], snapshot.get('timestamp'), currency, rate])
+
+def write_template_view(commodity_dir=COMMODITY_DIR, force=False):
+    """The manual-entry commodity template, when the newest month has no prices"""
+    from fetch_commodity_prices import TEMPLATE_CSV, has_prices, write_template_csv
+
+    months = sorted(name for name in os.listdir(commodity_dir) if MONTH_NAME.match(name)) \
+        if os.path.isdir(commodity_dir) else []
+    if not months:
+        return None
+    newest = os.path.join(commodity_dir, months[-1])
+    if not force and _is_fresh(TEMPLATE_CSV, os.stat(newest).st_mtime_ns):
+        return None
+    with open(newest, 'r') as f:
+        data = json.load(f)
+    if has_prices(data):
+        return None
+    return write_template_csv(data)
+
+def sync_store(snapshots, store_dir=STORE_DIR):
+    """Fold partitions the history store does not have yet (e.g. after a pull)"""
+    store = HistoryStore(store_dir)
+    if not store.exists():
+        store.write_all({d: s['rates'] for d, s in snapshots.items()})
+        return len(snapshots)
+    known = set(store.dates)
+    missing = {d: s['rates'] for d, s in snapshots.items() if d not in known}
+    if missing:
+        store.merge(missing)
+    return len(missing)
+
+def _store_written(store):
+    """Latest mtime across the store files (0 when there are none)"""
+    newest = 0
+    for path in (store.meta_path, store.dates_path, store.rates_path):
+        try:
+            newest = max(newest, os.stat(path).st_mtime_ns)
+        except OSError:
+            continue
+    return newest
+
+def pending_partitions(store, partition_dir=PARTITION_DIR):
+    """
+    {date: path} of partitions the store lacks or that changed after it was written
+    Only year directories modified since the store was written are listed, so
+    an up-to-date store costs one stat per year
+    """
+    written = _store_written(store)
+    known = None
+    pending = {}
+    if not os.path.isdir(partition_dir):
+        return pending
+    for year in sorted(os.listdir(partition_dir)):
+        year_dir = os.path.join(partition_dir, year)
+        if not os.path.isdir(year_dir) or os.stat(year_dir).st_mtime_ns <= written:
+            continue
+        if known is None:
+            known = set(store.dates)
+        for name in os.listdir(year_dir):
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            path = os.path.join(year_dir, name)
+            if match.group(1) not in known or os.stat(path).st_mtime_ns > written:
+                pending[match.group(1)] = path
+    return pending
+
+def sync_partitions(store, partition_dir=PARTITION_DIR):
+    """Fold new or changed partitions (e.g. from a pull) into the store; returns the days written"""
+    changed = {}
+    for date, path in sorted(pending_partitions(store, partition_dir).items()):
+        snapshot = read_partition(path)
+        if not store.is_unchanged(date, snapshot['rates']):
+            changed[date] = snapshot['rates']
+    if changed:
+        store.merge(changed, replace=True)
+    return len(changed)
+
+def build_views(force=False, partition_dir=PARTITION_DIR, history_csv=HISTORY_CSV,
+                latest_csv=LATEST_CSV, store_dir=STORE_DIR):
+    """
+    Rebuild history.csv, latest.csv, the history store and the commodity template
+    Views newer than every partition are left alone unless force is set.
+    Returns the list of views rebuilt.
+    """
+
+    newest = newest_mtime(partition_dir)
+    if newest == 0:
+        return []
+    stale = [path for path in (history_csv, latest_csv) if force or not _is_fresh(path, newest)]
+    snapshots = load_partitions(partition_dir)
+
+    rebuilt = []
+    if history_csv in stale:
+        write_history_view(snapshots, history_csv)
+        rebuilt.append(history_csv)
+    if latest_csv in stale:
+        write_latest_view(snapshots[max(snapshots)], latest_csv)
+        rebuilt.append(latest_csv)
+    if sync_store(snapshots, store_dir):
+        rebuilt.append(store_dir)
+    template = write_template_view(force=force)
+    if template:
+        rebuilt.append(template)
+    return rebuilt
+
+# ----------------------------------------------------------------------
+# Migration
+# ----------------------------------------------------------------------
+
+def legacy_snapshots(snapshot_dir=SNAPSHOT_DIR, history_csv=HISTORY_CSV):
+    """
+    Every day the legacy layout holds, as {date: snapshot}
+    Per-day JSON/CSV files win over packed archives; history.csv only fills
+    days that have no snapshot at all
+    """
+    from snapshot_archive import load_archives, load_snapshot_files
+
+    snapshots = load_archives(os.path.join(snapshot_dir, 'archive'))
+    snapshots.update(load_snapshot_files(snapshot_dir))
+
+    for date, snapshot in load_history_csv(history_csv).items():
+        snapshots.setdefault(date, snapshot)
+    return snapshots
+
+def write_gitignore(path=GITIGNORE):
+    """Add the derived paths to data/.gitignore, keeping any existing entries"""
+    existing = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            existing = f.read().splitlines()
+    missing = [entry for entry in DERIVED_PATHS if entry not in existing]
+    if missing:
+        lines = existing + (['# Derived views, rebuilt by scripts/partitions.py'] if not existing else []) + missing
+        with atomic_write(path) as f:
+            f.write('\n'.join(lines) + '\n')
+    return missing
+
+def migrate(remove=False, snapshot_dir=SNAPSHOT_DIR, partition_dir=PARTITION_DIR, history_csv=HISTORY_CSV):
+    """
+    Write one partition per day held by the legacy layout
+    Every partition is read back and compared before anything is removed;
+    with remove the per-day files, archives, history.csv and latest.csv go.
+    Returns (days, partitions_written, files_removed).
+    """
+
+    from snapshot_archive import ARCHIVE_NAME, SNAPSHOT_NAME
+
+    snapshots = legacy_snapshots(snapshot_dir, history_csv)
+    existing = partition_files(partition_dir)
+
+    def same_rates(snapshot, path):
+        stored = read_partition(path)['rates']
+        return {k: float(v) for k, v in stored.items()} == {k: float(v) for k, v in snapshot['rates'].items()}
+
+    written = 0
+    for date, snapshot in sorted(snapshots.items()):
+        if date in existing and same_rates(snapshot, existing[date]):
+            continue
+        write_partition(snapshot, partition_dir=partition_dir)
+        written += 1
+
+    for date, snapshot in snapshots.items():
+        path = partition_path(date, partition_dir)
+        if not os.path.exists(path) or not same_rates(snapshot, path):
+            raise ValueError(f"Partition verification failed for {date}; no files removed")
+
+    write_gitignore(os.path.join(os.path.dirname(snapshot_dir.rstrip('/')), '.gitignore'))
+
+    removed = 0
+    if remove:
+        archive_dir = os.path.join(snapshot_dir, 'archive')
+        doomed = [os.path.join(snapshot_dir, name) for name in os.listdir(snapshot_dir)
+                  if SNAPSHOT_NAME.match(name)]
+        if os.path.isdir(archive_dir):
+            doomed += [os.path.join(archive_dir, name) for name in os.listdir(archive_dir)
+                       if ARCHIVE_NAME.match(name)]
+        doomed += [p for p in (history_csv, os.path.join(snapshot_dir, 'latest.csv')) if os.path.exists(p)]
+        for path in doomed:
+            os.remove(path)
+            removed += 1
+    return len(snapshots), written, removed
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Git-friendly daily currency partitions")
+    sub = parser.add_subparsers(dest='command', required=True)
+    move = sub.add_parser('migrate', help="Write partitions from the current data/ tree")
+    move.add_argument('--remove', action='store_true',
+                      help="Delete per-day files, archives, history.csv and latest.csv once verified")
+    views = sub.add_parser('views', help="Rebuild history.csv, latest.csv, the store and template.csv")
+    views.add_argument('--force', action='store_true', help="Rebuild even if the views look current")
+    sub.add_parser('status', help="Show partition count and view freshness")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        days, written, removed = migrate(args.remove)
+        print(f"✅ {days} day(s) partitioned in {PARTITION_DIR} ({written} written, {removed} legacy file(s) removed)")
+        print(f"📝 Derived views listed in {GITIGNORE}")
+        if removed:
+            print("💡 Commit the switch once, untracking the derived views: "
+                  "git rm -r -q --cached data/ && git add data/")
+        return 0
+
+    if not enabled():
+        print(f"⚠️ No partitions at {PARTITION_DIR} - run `partitions.py migrate` first")
+        return 1
+
+    if args.command == 'views':
+        rebuilt = build_views(args.force)
+        for path in rebuilt:
+            print(f"🔄 Rebuilt {path}")
+        if not rebuilt:
+            print("✅ Views are current")
+        return 0
+
+    files = partition_files()
+    newest = newest_mtime()
+    print(f"🗂️ {len(files)} partition(s): {min(files, default='-')} to {max(files, default='-')}")
+    for path in (HISTORY_CSV, LATEST_CSV):
+        state = 'current' if _is_fresh(path, newest) else ('stale' if os.path.exists(path) else 'missing')
+        print(f"  {path}: {state}")
+    store = HistoryStore()
+    print(f"  {store.store_dir}: {len(store)} of {len(files)} day(s)")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
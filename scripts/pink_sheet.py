@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+World Bank Pink Sheet Parser
+Streams the CMO monthly historical Excel file row by row and maps its series
+onto the commodity keys used in data/commodity_prices
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import time
+
+from metrics import count
+
+PINK_SHEET_URL = ("https://thedocs.worldbank.org/en/doc/5d903e848db1d1b83e0ec8f744e55570-0350012021/"
+                  "related/CMO-Historical-Data-Monthly.xlsx")
+PRICES_SHEET = "Monthly Prices"
+HISTORY_CSV = "data/commodity_prices/history.csv"
+HISTORY_HEADER = ['Date', 'Category', 'Commodity', 'Unit', 'Price', 'Source']
+SOURCE_LABEL = 'World Bank Pink Sheet'
+
+# Re-use the downloaded workbook for a week; the file changes once a month
+DOWNLOAD_TTL = 7 * 24 * 3600
+
+# key: (category, Pink Sheet column header, unit we store, scale from sheet unit)
+SERIES = {
+    'crude_oil_brent': ('energy', 'Crude oil, Brent', '$/bbl', 1),
+    'crude_oil_wti': ('energy', 'Crude oil, WTI', '$/bbl', 1),
+    'crude_oil_dubai': ('energy', 'Crude oil, Dubai', '$/bbl', 1),
+    'natural_gas_us': ('energy', 'Natural gas, US', '$/mmbtu', 1),
+    'natural_gas_europe': ('energy', 'Natural gas, Europe', '$/mmbtu', 1),
+    'coal_australia': ('energy', 'Coal, Australian', '$/mt', 1),
+    'wheat_us': ('agriculture', 'Wheat, US HRW', '$/mt', 1),
+    'rice_thailand': ('agriculture', 'Rice, Thai 5%', '$/mt', 1),
+    'maize': ('agriculture', 'Maize', '$/mt', 1),
+    'soybeans': ('agriculture', 'Soybeans', '$/mt', 1),
+    'sugar': ('agriculture', 'Sugar, world', '¢/kg', 100),     # sheet reports $/kg
+    'coffee_arabica': ('agriculture', 'Coffee, Arabica', '$/kg', 1),
+    'coffee_robusta': ('agriculture', 'Coffee, Robusta', '$/kg', 1),
+    'tea_mombasa': ('agriculture', 'Tea, Mombasa', '$/kg', 1),
+    'cocoa': ('agriculture', 'Cocoa', '$/kg', 1),
+    'dap': ('fertilizers', 'DAP', '$/mt', 1),
+    'tsp': ('fertilizers', 'TSP', '$/mt', 1),
+    'urea': ('fertilizers', 'Urea', '$/mt', 1),
+    'aluminum': ('metals', 'Aluminum', '$/mt', 1),
+    'copper': ('metals', 'Copper', '$/mt', 1),
+    'iron_ore': ('metals', 'Iron ore, cfr spot', '$/dmt', 1),
+    'gold': ('metals', 'Gold', '$/toz', 1),
+}
+
+MONTH_LABEL = re.compile(r'^(\d{4})M(\d{2})$')
+
+def _normalize(header):
+    """Lower-case a column header and drop footnote markers like '**' or '(a)'"""
+    text = re.sub(r'\(.*?\)|\*', '', str(header or ''))
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def _open_workbook(source):
+    """Open a workbook read-only from a path, bytes or file object"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("openpyxl is required to parse the Pink Sheet: pip install openpyxl")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    # read_only streams rows from the XML instead of building the whole sheet
+    return load_workbook(source, read_only=True, data_only=True)
+
+def iter_pink_sheet(source, sheet=PRICES_SHEET):
+    """
+    Yield (YYYY-MM, {commodity_key: price}) for every month in the sheet
+    Rows are read one at a time; nothing but the column map is kept in memory
+    """
+
+    workbook = _open_workbook(source)
+    try:
+        worksheet = workbook[sheet] if sheet in workbook.sheetnames else workbook.worksheets[0]
+        wanted = {_normalize(header): key for key, (_, header, _, _) in SERIES.items()}
+        columns = None
+
+        for row in worksheet.iter_rows(values_only=True):
+            if columns is None:
+                # Title and note rows come first; the header is the row naming our series
+                found = {i: wanted[_normalize(cell)] for i, cell in enumerate(row)
+                         if _normalize(cell) in wanted}
+                if len(found) >= len(SERIES) // 2:
+                    columns = found
+                continue
+
+            match = MONTH_LABEL.match(str(row[0] or '').strip())
+            if not match:
+                continue
+
+            prices = {}
+            for i, key in columns.items():
+                value = row[i] if i < len(row) else None
+                if isinstance(value, (int, float)):
+                    prices[key] = round(value * SERIES[key][3], 4)
+            yield f"{match.group(1)}-{match.group(2)}", prices
+
+        if columns is None:
+            raise ValueError("Could not find the Pink Sheet header row")
+    finally:
+        workbook.close()
+
+def download_pink_sheet(url=PINK_SHEET_URL):
+    """Download the workbook through the shared HTTP cache and return its bytes"""
+    from http_fetch import fetch
+    response = fetch(url, ttl=DOWNLOAD_TTL, timeout=60)
+    print(f"📥 Pink Sheet workbook: {len(response.content):,} bytes ({response.source})")
+    return response.content
+
+def ingest_pink_sheet(source=None, history_csv=HISTORY_CSV):
+    """
+    Parse the full monthly history and write history.csv in one bulk pass
+    source is a local .xlsx path; by default the workbook is downloaded (cached).
+    Returns (latest_month, latest_prices, months_written).
+    """
+
+    started = time.perf_counter()
+    workbook = source if source else download_pink_sheet()
+
+    os.makedirs(os.path.dirname(history_csv), exist_ok=True)
+    tmp_path = history_csv + '.tmp'
+    latest_month, latest_prices, months, rows = None, {}, 0, 0
+
+    try:
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_HEADER)
+            for month, prices in iter_pink_sheet(workbook):
+                for key, price in prices.items():
+                    category, _, unit, _ = SERIES[key]
+                    writer.writerow([month, category, key, unit, price, SOURCE_LABEL])
+                rows += len(prices)
+                if prices:
+                    latest_month, latest_prices = month, prices
+                    months += 1
+        # An unreadable or empty workbook keeps the previous history
+        if months:
+            os.replace(tmp_path, history_csv)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    count('rows_written', rows)
+
+    print(f"📊 Parsed {months} months of Pink Sheet history in {time.perf_counter() - started:.2f}s")
+    return latest_month, latest_prices, months
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Ingest the World Bank Pink Sheet monthly history")
+    parser.add_argument('--excel', help="Local CMO-Historical-Data-Monthly.xlsx (default: download)")
+    parser.add_argument('--output', default=HISTORY_CSV)
+    args = parser.parse_args()
+
+    latest_month, latest_prices, months = ingest_pink_sheet(args.excel, args.output)
+    print(f"💾 Wrote {months} months to {args.output} (latest {latest_month}, {len(latest_prices)} series)")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Summary Rebuild
+Recomputes historical daily summaries in data/summaries for a date range, e.g.
+after an analytic definition changed. Work is partitioned by calendar month
+across a process pool and each worker reads only its month of the history store:
+
+  1. every month before the last target month is scanned into partial
+     aggregates (day counts, edge rates, Welford stats of in-month returns)
+  2. the partials are merged in order into the state at the start of each month
+  3. each target month is replayed day by day from that state and its
+     summaries are written atomically
+"""
+
+import argparse
+import bisect
+import calendar
+import copy
+import json
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_cls, datetime, timedelta
+
+from generate_summary import SNAPSHOT_NAME, empty_state, fold_currency_day, summary_record, welford_update
+from history_store import STORE_DIR, HistoryStore, open_store
+
+SUMMARY_DIR = "data/summaries"
+SUMMARY_NAME = "summary_{}.json"
+SUMMARY_FILE = re.compile(r'^summary_(\d{4}-\d{2}-\d{2})\.json$')
+
+def month_bounds(month):
+    """First and last ISO date of a YYYY-MM month"""
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{month}-01", f"{month}-{calendar.monthrange(year, mon)[1]:02d}"
+
+def read_month(store_dir, month):
+    """Yield (date, rates) for the stored days of one month"""
+    start, end = month_bounds(month)
+    dates, currencies, matrix = HistoryStore(store_dir).read_range(start, end)
+    for date, row in zip(dates, matrix):
+        yield date, {c: float(v) for c, v in zip(currencies, row) if not math.isnan(v)}
+
+def merge_welford(stats, other):
+    """Combine two {'n', 'mean', 'm2'} running states (Chan et al.)"""
+    n = stats['n'] + other['n']
+    if n == 0:
+        return
+    delta = other['mean'] - stats['mean']
+    stats.update(n=n,
+                 mean=stats['mean'] + delta * other['n'] / n,
+                 m2=stats['m2'] + other['m2'] + delta * delta * stats['n'] * other['n'] / n)
+
+# ----------------------------------------------------------------------
+# Workers (run in child processes)
+# ----------------------------------------------------------------------
+
+def scan_month(store_dir, month):
+    """Partial currency aggregates of one month, independent of earlier months"""
+
+    cstate = empty_state()['currency']
+    first_rates = {}
+    for date, rates in read_month(store_dir, month):
+        for code, rate in rates.items():
+            first_rates.setdefault(code, rate)
+        fold_currency_day(cstate, date, rates)
+    cstate['first_rates'] = first_rates
+    return cstate
+
+def write_month(store_dir, month, cstate, targets, counts, output_dir, generated):
+    """Replay one month from its starting state and write a summary per target date"""
+
+    days = list(read_month(store_dir, month))
+    commodity_periods, food_periods = counts
+    written = []
+    i = 0
+    for target in targets:
+        while i < len(days) and days[i][0] <= target:
+            fold_currency_day(cstate, *days[i])
+            i += 1
+        if cstate['days'] == 0:
+            continue
+        record = summary_record(cstate,
+                                bisect.bisect_right(commodity_periods, target),
+                                bisect.bisect_right(food_periods, target),
+                                generated)
+        path = os.path.join(output_dir, SUMMARY_NAME.format(target))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp, path)
+        written.append(target)
+    return written
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def merge_month(cstate, part):
+    """Fold a month's partial aggregates onto the state at the end of the previous month"""
+
+    for code, rate in part['first_rates'].items():
+        previous = cstate['last_rates'].get(code)
+        if previous and rate > 0:
+            stats = cstate['returns'].setdefault(code, {'n': 0, 'mean': 0.0, 'm2': 0.0})
+            welford_update(stats, math.log(rate / previous))
+    for code, other in part['returns'].items():
+        merge_welford(cstate['returns'].setdefault(code, {'n': 0, 'mean': 0.0, 'm2': 0.0}), other)
+
+    cstate['last_rates'].update(part['last_rates'])
+    cstate['days'] += part['days']
+    cstate['values'] += part['values']
+    cstate['first_date'] = cstate['first_date'] or part['first_date']
+    cstate['last_date'] = part['last_date'] or cstate['last_date']
+
+def existing_summary_dates(output_dir=SUMMARY_DIR):
+    if not os.path.isdir(output_dir):
+        return []
+    return sorted(m.group(1) for m in map(SUMMARY_FILE.match, os.listdir(output_dir)) if m)
+
+def calendar_days(start, end):
+    day, last = date_cls.fromisoformat(start), date_cls.fromisoformat(end)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+def list_periods(directory):
+    """Sorted period stems (YYYY-MM or YYYY-MM-DD) of the snapshot files in a directory"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len('.json')] for name in os.listdir(directory) if SNAPSHOT_NAME.match(name))
+
+def rebuild_summaries(start=None, end=None, all_days=False, workers=None,
+                      store_dir=STORE_DIR, output_dir=SUMMARY_DIR):
+    """
+    Recompute the summaries dated start..end (inclusive)
+    By default only dates that already have a summary file are rewritten;
+    all_days writes one for every calendar day. Returns the dates written.
+    """
+
+    store = open_store(store_dir=store_dir)
+    stored = store.dates
+    if not stored:
+        print("⚠️ No historical currency data available yet")
+        return []
+
+    if all_days:
+        targets = list(calendar_days(max(start or stored[0], stored[0]), end or stored[-1]))
+    else:
+        targets = [d for d in existing_summary_dates(output_dir)
+                   if (start is None or d >= start) and (end is None or d <= end)]
+    if not targets:
+        print("⚠️ No summary dates in range")
+        return []
+
+    by_month = {}
+    for target in targets:
+        by_month.setdefault(target[:7], []).append(target)
+    target_months = sorted(by_month)
+    scan_months = sorted({d[:7] for d in stored if d[:7] < target_months[-1]})
+
+    counts = (list_periods("data/commodity_prices"), list_periods("data/food_prices"))
+    generated = datetime.now().isoformat()
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"🔁 Rebuilding {len(targets)} summaries over {len(target_months)} month(s) "
+          f"({len(scan_months)} month(s) of history to aggregate)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = dict(zip(scan_months, pool.map(scan_month, [store_dir] * len(scan_months), scan_months)))
+
+        # Starting state of every target month, from the months before it
+        cstate = empty_state()['currency']
+        starts = {}
+        for month in sorted(set(scan_months) | set(target_months)):
+            if month in by_month:
+                starts[month] = copy.deepcopy(cstate)
+            if month in parts:
+                merge_month(cstate, parts[month])
+
+        futures = [pool.submit(write_month, store_dir, month, starts[month], by_month[month],
+                               counts, output_dir, generated)
+                   for month in target_months]
+        written = [date for future in futures for date in future.result()]
+
+    print(f"💾 Rewrote {len(written)} summaries in {output_dir}")
+    return written
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Recompute historical daily summaries in parallel")
+    parser.add_argument('--start', help="First summary date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last summary date (YYYY-MM-DD)")
+    parser.add_argument('--all-days', action='store_true',
+                        help="Write a summary for every calendar day, not only existing ones")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    written = rebuild_summaries(args.start, args.end, args.all_days, args.workers)
+    return 0 if written else 1
+
+if __name__ == "__main__":
+    exit(main())
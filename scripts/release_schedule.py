@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Release Schedule
+Knows when monthly sources publish and keeps a small manifest of what has
+already been fetched, so daily runs skip sources with no possible new release.
+Failed attempts at a release are recorded too and retried with a backoff of
+1, 2, 4 ... days (at most RETRY_MAX_DAYS).
+"""
+
+import argparse
+import json
+import os
+from datetime import date as date_cls, datetime, timedelta
+
+MANIFEST_FILE = "data/release_manifest.json"
+RETRY_MAX_DAYS = 7
+
+def first_weekday(year, month, weekday):
+    """First given weekday (Mon=0) of a month"""
+    day = date_cls(year, month, 1)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+def first_business_day(year, month):
+    """First Monday-Friday of a month"""
+    day = date_cls(year, month, 1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+FAO_FOOD_PRICE_INDEX = 'fao_food_price_index'
+PINK_SHEET = 'world_bank_pink_sheet'
+
+# source: (release date for a given (year, month), days after release before
+# the data can be relied on). Both publish during the European day, after the
+# 06:00 UTC cron, so new data is first picked up the following morning.
+SOURCES = {
+    FAO_FOOD_PRICE_INDEX: (lambda y, m: first_weekday(y, m, 3), 1),   # first Thursday
+    PINK_SHEET: (first_business_day, 1),                              # first business day
+}
+
+def latest_release(source, today=None):
+    """Date of the most recent release of a source that is available by today"""
+
+    release_for, lag = SOURCES[source]
+    today = today or date_cls.today()
+    year, month = today.year, today.month
+    release = release_for(year, month)
+    if release + timedelta(days=lag) > today:
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        release = release_for(year, month)
+    return release
+
+def next_release(source, today=None):
+    """Date the next release of a source becomes available"""
+
+    release_for, lag = SOURCES[source]
+    today = today or date_cls.today()
+    year, month = today.year, today.month
+    while True:
+        release = release_for(year, month)
+        if release + timedelta(days=lag) > today:
+            return release + timedelta(days=lag)
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def retry_after(source, release, path=MANIFEST_FILE):
+    """Date before which a failed release is not retried, or None"""
+    failed = load_manifest(path).get(source, {}).get('failed', {})
+    if failed.get('release') != release.isoformat():
+        return None
+    return date_cls.fromisoformat(failed['retry_after'])
+
+def is_due(source, today=None, path=MANIFEST_FILE):
+    """
+    Return (due, release_date)
+    A source is due when its latest available release has not been recorded yet
+    and is not waiting out the backoff after a failed attempt
+    """
+
+    today = today or date_cls.today()
+    release = latest_release(source, today)
+    entry = load_manifest(path).get(source, {})
+    done = entry.get('release')
+    if done is not None and done >= release.isoformat():
+        return False, release
+    retry = retry_after(source, release, path)
+    return retry is None or today >= retry, release
+
+def record_fetch(source, release, path=MANIFEST_FILE):
+    """Record that the given release of a source has been fetched and saved"""
+
+    manifest = load_manifest(path)
+    manifest[source] = {
+        'release': release.isoformat(),
+        'fetched_at': datetime.now().isoformat(),
+    }
+    save_manifest(manifest, path)
+
+def record_failure(source, release, today=None, path=MANIFEST_FILE):
+    """
+    Record a failed attempt at a release; returns the date of the next retry
+    The backoff doubles with each failure of the same release
+    """
+
+    today = today or date_cls.today()
+    manifest = load_manifest(path)
+    entry = manifest.setdefault(source, {})
+    failed = entry.get('failed', {})
+    attempts = failed.get('attempts', 0) + 1 if failed.get('release') == release.isoformat() else 1
+    retry = today + timedelta(days=min(2 ** (attempts - 1), RETRY_MAX_DAYS))
+    entry['failed'] = {
+        'release': release.isoformat(),
+        'attempts': attempts,
+        'last_attempt': datetime.now().isoformat(),
+        'retry_after': retry.isoformat(),
+    }
+    save_manifest(manifest, path)
+    return retry
+
+def skip_message(source, release, path=MANIFEST_FILE):
+    """Why a source that is not due is skipped"""
+    retry = retry_after(source, release, path)
+    if retry is not None:
+        return f"Release of {release} failed before - retrying from {retry}"
+    return f"Release of {release} already fetched"
+
+def main():
+    """Print the schedule status of every monthly source"""
+
+    parser = argparse.ArgumentParser(description="Show release schedule status")
+    parser.add_argument('--date', help="Evaluate as of this ISO date (default: today)")
+    args = parser.parse_args()
+
+    today = date_cls.fromisoformat(args.date) if args.date else date_cls.today()
+    manifest = load_manifest()
+
+    print(f"📅 Release schedule as of {today}")
+    for source in SOURCES:
+        due, release = is_due(source, today)
+        fetched = manifest.get(source, {}).get('release', 'never')
+        retry = retry_after(source, release)
+        state = "DUE" if due else (f"retry from {retry}" if retry else "up to date")
+        print(f"  {source:<24} latest {release}  fetched {fetched:<10}  next {next_release(source, today)}  [{state}]")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
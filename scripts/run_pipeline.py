@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Daily Pipeline Runner
+Runs the fetch, save and summary stages in one process as a dependency graph
+Independent fetchers run concurrently and stages hand data to each other in memory
+"""
+
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import metrics
+
+# ----------------------------------------------------------------------
+# Per-stage output capture
+# ----------------------------------------------------------------------
+
+class _StageOutput(io.TextIOBase):
+    """stdout proxy that buffers prints per worker thread so stage logs don't interleave"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def begin(self):
+        self._local.buffer = io.StringIO()
+
+    def end(self):
+        buffer = getattr(self._local, 'buffer', None)
+        self._local.buffer = None
+        return buffer.getvalue() if buffer else ''
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+
+def stage_fetch_currency(ctx):
+    """Fetch latest currency rates"""
+    from fetch_currency_rates import fetch_currency_rates
+    data = fetch_currency_rates(ctx.get('providers'))
+    if not data:
+        raise RuntimeError("Failed to fetch currency rates")
+    return data
+
+def stage_validate_currency(ctx):
+    """Check the fetched rates against recent statistics; None if quarantined"""
+    from data_quality import validate_snapshot
+    from history_store import open_store
+    ok, _ = validate_snapshot(ctx['fetch_currency'], store=open_store())
+    return ctx['fetch_currency'] if ok else None
+
+def stage_save_currency(ctx):
+    """Save currency rates and update the history store"""
+    from fetch_currency_rates import save_data
+    from history_store import open_store
+    store = open_store()
+    data = ctx['validate_currency']
+    if data is None:
+        # Quarantine is a data problem, not a run failure: the report and
+        # quarantined snapshot are committed for review
+        print("⏭️ Snapshot quarantined - history left unchanged")
+        return store
+    if not save_data(data, store):
+        raise RuntimeError("Failed to save currency rates")
+    return store
+
+def stage_commodity(ctx):
+    """Fetch and save World Bank commodity prices when a new release is due"""
+    from release_schedule import PINK_SHEET, is_due, record_failure, record_fetch, skip_message
+    due, release = is_due(PINK_SHEET)
+    if not due:
+        print(f"⏭️ Pink Sheet: {skip_message(PINK_SHEET, release)}")
+        return None
+    from fetch_commodity_prices import fetch_commodity_prices, has_prices, save_commodity_data
+    data = fetch_commodity_prices()
+    save_commodity_data(data)
+    # A failed download leaves placeholders; retry with a backoff
+    if has_prices(data):
+        record_fetch(PINK_SHEET, release)
+    else:
+        print(f"🔁 Pink Sheet retry from {record_failure(PINK_SHEET, release)}")
+    return data
+
+def stage_food(ctx):
+    """Fetch and save the FAO Food Price Index when a new release is due"""
+    from release_schedule import FAO_FOOD_PRICE_INDEX, is_due, record_failure, record_fetch, skip_message
+    due, release = is_due(FAO_FOOD_PRICE_INDEX)
+    if not due:
+        print(f"⏭️ FAO: {skip_message(FAO_FOOD_PRICE_INDEX, release)}")
+        return None
+    from fetch_food_prices import fetch_fao_food_price_index, has_values, save_fao_data
+    data = fetch_fao_food_price_index()
+    save_fao_data(data)
+    if has_values(data):
+        record_fetch(FAO_FOOD_PRICE_INDEX, release)
+    else:
+        print(f"🔁 FAO retry from {record_failure(FAO_FOOD_PRICE_INDEX, release)}")
+    return data
+
+def stage_summary(ctx):
+    """Generate the currency and overall summaries"""
+    from generate_summary import (generate_currency_summary, generate_overall_summary,
+                                  load_summary_state, save_summary_state)
+    state = load_summary_state()
+    generate_currency_summary(ctx.get('save_currency'), state)
+    generate_overall_summary(state)
+    save_summary_state(state)
+    return state
+
+def stage_analytics(ctx):
+    """Compute rolling currency volatility analytics"""
+    from currency_analytics import generate_currency_analytics
+    return generate_currency_analytics(ctx.get('save_currency'))
+
+# name: (function, dependencies, required, gated)
+# A required stage failing fails the run; optional stages mirror the
+# workflow's old continue-on-error steps. Gated stages need their
+# dependencies' results; ungated ones read data on disk and only wait for
+# their dependencies to finish, so they still run when a fetch fails.
+PIPELINE = {
+    'fetch_currency': (stage_fetch_currency, [], True, True),
+    'validate_currency': (stage_validate_currency, ['fetch_currency'], True, True),
+    'save_currency': (stage_save_currency, ['validate_currency'], True, True),
+    'commodity': (stage_commodity, [], False, True),
+    'food': (stage_food, [], False, True),
+    'summary': (stage_summary, ['save_currency', 'commodity', 'food'], False, False),
+    'analytics': (stage_analytics, ['save_currency'], False, False),
+}
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+def run_pipeline(stages=PIPELINE, workers=4, only=None, providers=None):
+    """
+    Execute stages as soon as their dependencies finish
+    A gated stage whose dependency failed is skipped, except that optional
+    dependencies only gate on having run; ungated stages always run.
+    providers overrides the currency providers. Returns (ok, timings).
+    """
+
+    if only:
+        wanted = set()
+        pending = list(only)
+        while pending:
+            name = pending.pop()
+            if name not in wanted:
+                wanted.add(name)
+                # An ungated stage can run alone on the data already on disk
+                if stages[name][3]:
+                    pending.extend(stages[name][1])
+        stages = {name: spec for name, spec in stages.items() if name in wanted}
+
+    ctx = {'providers': providers}
+    status = {}
+    timings = {}
+    output = _StageOutput(sys.stdout)
+    real_stdout, sys.stdout = sys.stdout, output
+
+    def run(name):
+        func = stages[name][0]
+        output.begin()
+        start = time.perf_counter()
+        try:
+            with metrics.span(f"stage:{name}"):
+                result, error = func(ctx), None
+        except Exception as e:
+            result, error = None, e
+        elapsed = time.perf_counter() - start
+        return result, error, elapsed, output.end()
+
+    def blocked(name):
+        if not stages[name][3]:
+            return False
+        for dep in stages[name][1]:
+            if status.get(dep) == 'failed' and stages[dep][2]:
+                return True
+            if status.get(dep) == 'skipped':
+                return True
+        return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while len(status) < len(stages):
+                for name, (_, deps, _, _) in stages.items():
+                    if name in status or name in running.values():
+                        continue
+                    if not all(dep in status for dep in deps if dep in stages):
+                        continue
+                    if blocked(name):
+                        status[name] = 'skipped'
+                        timings[name] = 0.0
+                        real_stdout.write(f"⏭️ Skipping {name}: a dependency failed\n")
+                        continue
+                    running[pool.submit(run, name)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, error, elapsed, log = future.result()
+                    real_stdout.write(f"\n{'-'*60}\n▶️ {name}\n{'-'*60}\n{log}")
+                    if error is None:
+                        ctx[name] = result
+                        status[name] = 'ok'
+                    else:
+                        status[name] = 'failed'
+                        real_stdout.write(f"❌ Stage {name} failed: {error}\n")
+                    timings[name] = elapsed
+    finally:
+        sys.stdout = real_stdout
+
+    ok = all(status[name] == 'ok' for name, spec in stages.items() if spec[2])
+    return ok, {name: {'status': status[name], 'seconds': round(timings[name], 4)}
+                for name in stages}
+
+def print_timings(timings, total):
+    """Print a per-stage timing table"""
+
+    print("\n" + "="*60)
+    print("⏱️ STAGE TIMINGS")
+    print("="*60)
+    for name, info in timings.items():
+        print(f"  {name:<16} {info['status']:<8} {info['seconds']:>8.3f}s")
+    print(f"  {'wall clock':<16} {'':<8} {total:>8.3f}s")
+
+def main():
+    """Main execution function"""
+
+    parser = argparse.ArgumentParser(description="Run the daily data pipeline in one process")
+    parser.add_argument('--only', nargs='+', choices=list(PIPELINE),
+                        help="Run only these stages (and the stages whose results they need)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--provider', action='append', metavar='NAME=URL',
+                        help="Override a currency provider's base URL, e.g. a local stub ('off' disables it)")
+    parser.add_argument('--timings-file', help="Write per-stage timings as JSON")
+    parser.add_argument('--metrics-dir', default=metrics.METRICS_DIR,
+                        help="Directory for the per-run metrics JSON (default: %(default)s)")
+    parser.add_argument('--no-metrics', action='store_true', help="Do not write a metrics file")
+    parser.add_argument('--profile', nargs='+', metavar='NAME',
+                        help="cProfile these stages or functions ('all' for everything)")
+    parser.add_argument('--profile-dir', default=metrics.PROFILE_DIR)
+    args = parser.parse_args()
+
+    if args.profile:
+        metrics.enable_profiling([f"stage:{name}" if name in PIPELINE else name for name in args.profile],
+                                 args.profile_dir)
+
+    print("="*60)
+    print("🚀 Daily Development Economics Pipeline")
+    print("="*60)
+
+    providers = None
+    if args.provider:
+        from currency_providers import make_providers, parse_provider_urls
+        from fetch_currency_rates import API_URL
+        urls = {'frankfurter': API_URL}
+        urls.update(parse_provider_urls(args.provider))
+        providers = make_providers(urls)
+
+    start = time.perf_counter()
+    ok, timings = run_pipeline(workers=args.workers, only=args.only, providers=providers)
+    total = time.perf_counter() - start
+
+    print_timings(timings, total)
+
+    if args.timings_file:
+        with open(args.timings_file, 'w') as f:
+            json.dump({'generated': datetime.now().isoformat(),
+                       'total_seconds': round(total, 4),
+                       'stages': timings}, f, indent=2)
+        print(f"\n💾 Timings saved: {args.timings_file}")
+
+    if not args.no_metrics:
+        metrics_file = metrics.write_run_metrics(metrics_dir=args.metrics_dir)
+        print(f"📈 Metrics saved: {metrics_file}")
+    for record in metrics.snapshot()['spans']:
+        if 'profile' in record:
+            print(f"🔬 Profile of {record['name']}: {record['profile']}")
+
+    print("\n✅ Pipeline completed!" if ok else "\n❌ Pipeline failed")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Local Data Query Service
+Loads currency, commodity and food data once into indexed in-memory structures
+and answers JSON queries over HTTP with ETags, gzip and hot reload
+
+Endpoints:
+  /health
+  /currency/latest?currencies=INR,ZAR
+  /currency/range?start=2026-01-01&end=2026-03-31&currencies=INR,ZAR
+  /currency/pair?base=INR&quote=BRL[&start=...&end=...]
+  /commodity?start=2025-11&end=2026-08&commodities=wheat_us,maize
+  /food?start=2025-11&end=2026-08
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from history_store import STORE_DIR, open_store
+from monthly_series import (COMMODITY_DIR, FOOD_DIR, directory_version,
+                            load_commodity_months, load_food_months)
+
+GZIP_MIN_BYTES = 1024
+
+class DataIndex:
+    """Immutable in-memory snapshot of all datasets; replaced wholesale on reload"""
+
+    def __init__(self, store_dir=STORE_DIR, commodity_dir=COMMODITY_DIR, food_dir=FOOD_DIR):
+        store = open_store(store_dir=store_dir)
+        dates, currencies, matrix = store.read_range()
+
+        self.base = store.meta.get('base_currency', 'USD')
+        self.dates = dates
+        self.date_keys = np.array(dates, dtype='U10')
+        self.currencies = currencies
+        self.column = {code: i for i, code in enumerate(currencies)}
+        self.matrix = matrix
+
+        self.commodity, self.commodity_info = load_commodity_months(commodity_dir)
+        self.food, self.food_units = load_food_months(food_dir)
+        self.months_commodity = sorted(self.commodity)
+        self.months_food = sorted(self.food)
+
+        self.version = data_version(store_dir, commodity_dir, food_dir)
+        self.loaded_at = datetime.now().isoformat()
+
+    def rows(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.date_keys, start, 'left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.date_keys, end, 'right'))
+        return lo, hi
+
+    def columns(self, currencies):
+        if not currencies:
+            return self.currencies
+        unknown = [c for c in currencies if c not in self.column and c != self.base]
+        if unknown:
+            raise ValueError(f"Unknown currencies: {', '.join(unknown)}")
+        return currencies
+
+    def series(self, code, lo, hi):
+        if code == self.base and code not in self.column:
+            return np.ones(hi - lo)
+        return self.matrix[lo:hi, self.column[code]]
+
+def data_version(store_dir=STORE_DIR, commodity_dir=COMMODITY_DIR, food_dir=FOOD_DIR):
+    """
+    Change marker for hot reload: newest mtime across the store, the currency
+    snapshots and the monthly files. New per-day snapshots or partitions show
+    up as directory mtimes, so no snapshot file is stat'ed on its own.
+    """
+    newest = directory_version(commodity_dir, food_dir)
+    snapshot_dir = os.path.dirname(os.path.normpath(store_dir))
+    partition_dir = os.path.join(snapshot_dir, 'partitions')
+    paths = [os.path.join(store_dir, name) for name in ('meta.json', 'dates.i4', 'rates.f8')]
+    paths += [snapshot_dir, os.path.join(snapshot_dir, 'history.csv'), partition_dir]
+    if os.path.isdir(partition_dir):
+        paths += [os.path.join(partition_dir, year) for year in os.listdir(partition_dir)]
+    for path in paths:
+        try:
+            newest = max(newest, os.stat(path).st_mtime_ns)
+        except OSError:
+            continue
+    return newest
+
+def _number(value):
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def _split(values):
+    return [v for v in values.split(',') if v] if values else []
+
+def _month_slice(months, start, end):
+    return [m for m in months if (not start or m >= start[:7]) and (not end or m <= end[:7])]
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+
+def query_currency_latest(index, params):
+    codes = index.columns(_split(params.get('currencies')))
+    if not index.dates:
+        return {'date': None, 'rates': {}}
+    row = len(index.dates) - 1
+    return {
+        'date': index.dates[row],
+        'base': index.base,
+        'rates': {c: _number(index.series(c, row, row + 1)[0]) for c in codes},
+    }
+
+def query_currency_range(index, params):
+    codes = index.columns(_split(params.get('currencies')))
+    lo, hi = index.rows(params.get('start'), params.get('end'))
+    return {
+        'base': index.base,
+        'dates': index.dates[lo:hi],
+        'rates': {c: [_number(v) for v in index.series(c, lo, hi)] for c in codes},
+    }
+
+def query_currency_pair(index, params):
+    base, quote = params.get('base'), params.get('quote')
+    if not base or not quote:
+        raise ValueError("base and quote are required")
+    index.columns([base, quote])
+    if params.get('start') or params.get('end'):
+        lo, hi = index.rows(params.get('start'), params.get('end'))
+    else:
+        lo, hi = max(0, len(index.dates) - 1), len(index.dates)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = index.series(quote, lo, hi) / index.series(base, lo, hi)
+    return {
+        'pair': f"{base}/{quote}",
+        'dates': index.dates[lo:hi],
+        'rates': [_number(v) for v in values],
+    }
+
+def query_commodity(index, params):
+    months = _month_slice(index.months_commodity, params.get('start'), params.get('end'))
+    wanted = _split(params.get('commodities')) or sorted(index.commodity_info)
+    return {
+        'months': months,
+        'info': {c: index.commodity_info.get(c) for c in wanted},
+        'prices': {c: [index.commodity[m].get(c) for m in months] for c in wanted},
+    }
+
+def query_food(index, params):
+    months = _month_slice(index.months_food, params.get('start'), params.get('end'))
+    wanted = _split(params.get('indices')) or sorted(index.food_units)
+    return {
+        'months': months,
+        'units': {i: index.food_units.get(i) for i in wanted},
+        'values': {i: [index.food[m].get(i) for m in months] for i in wanted},
+    }
+
+def query_health(index, params):
+    return {
+        'status': 'ok',
+        'loaded_at': index.loaded_at,
+        'currency_days': len(index.dates),
+        'currencies': len(index.currencies),
+        'commodity_months': len(index.months_commodity),
+        'food_months': len(index.months_food),
+    }
+
+ROUTES = {
+    '/health': query_health,
+    '/currency/latest': query_currency_latest,
+    '/currency/range': query_currency_range,
+    '/currency/pair': query_currency_pair,
+    '/commodity': query_commodity,
+    '/food': query_food,
+}
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+
+class DataService:
+    """Holds the current DataIndex and swaps in a new one when files change"""
+
+    def __init__(self, store_dir=STORE_DIR, commodity_dir=COMMODITY_DIR, food_dir=FOOD_DIR):
+        self.dirs = (store_dir, commodity_dir, food_dir)
+        self.index = DataIndex(*self.dirs)
+        self.verbose = False
+        self._stop = threading.Event()
+
+    def reload_if_changed(self):
+        if data_version(*self.dirs) != self.index.version:
+            self.index = DataIndex(*self.dirs)
+            print(f"🔄 Reloaded data ({len(self.index.dates)} currency days)")
+            return True
+        return False
+
+    def watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"⚠️ Reload failed, keeping previous data: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = ROUTES.get(url.path.rstrip('/') or '/health')
+            if route is None:
+                return self._send(404, {'error': f"Unknown endpoint {url.path}", 'endpoints': sorted(ROUTES)})
+
+            index = service.index
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+            # The ETag depends only on the data version and the query, so a
+            # repeat request is answered without running the query at all
+            etag = '"%s"' % hashlib.sha1(f"{index.version}:{url.path}?{url.query}".encode()).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            try:
+                payload = route(index, params)
+            except (ValueError, KeyError) as e:
+                return self._send(400, {'error': str(e)})
+            self._send(200, payload, etag)
+
+        def _send(self, status, payload, etag=None):
+            body = json.dumps(payload, separators=(',', ':')).encode()
+            gzip_ok = 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzip_ok and len(body) >= GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=5)
+                encoding = 'gzip'
+            else:
+                encoding = None
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Vary', 'Accept-Encoding')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if service.verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+def serve(host='127.0.0.1', port=8000, reload_interval=30, verbose=False):
+    """Load the data and serve it until interrupted"""
+
+    started = time.perf_counter()
+    service = DataService()
+    service.verbose = verbose
+    index = service.index
+    print(f"📦 Loaded {len(index.dates)} currency days x {len(index.currencies)} currencies, "
+          f"{len(index.months_commodity)} commodity months, {len(index.months_food)} food months "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    if reload_interval:
+        threading.Thread(target=service.watch, args=(reload_interval,), daemon=True).start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"🌐 Serving on http://{host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        service.stop()
+        server.server_close()
+    return 0
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Serve the collected data as a local JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--reload-interval', type=float, default=30,
+                        help="Seconds between checks for new data files (0 disables)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    return serve(args.host, args.port, args.reload_interval, args.verbose)
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Packed Currency Snapshot Archives
+Stores daily currency snapshots as one binary file per year (or month) instead
+of a JSON and a CSV file per day. A single day is read by seeking straight to
+its row; the rest of the file is never parsed.
+
+File layout (little-endian):
+  magic 'RATEARC1' | rows u32 | columns u32 | meta length u32
+  meta JSON        - base currency, column order, per-row fetch timestamps
+                     and per-row provenance ({provider: {date: [codes]}})
+  day index        - rows x int32 days since 1970-01-01, ascending
+  rates            - rows x columns float64, NaN where a rate is missing
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import struct
+
+import numpy as np
+
+from history_store import DATE_DTYPE, RATE_DTYPE, SNAPSHOT_DIR, date_to_day, day_to_date
+
+ARCHIVE_DIR = "data/currency_rates/archive"
+ARCHIVE_SUFFIX = ".rates"
+MAGIC = b'RATEARC1'
+HEADER = struct.Struct('<8sIII')
+
+PERIOD_FORMATS = {'year': 4, 'month': 7}
+ARCHIVE_NAME = re.compile(r'^(\d{4}(?:-\d{2})?)\.rates$')
+SNAPSHOT_NAME = re.compile(r'^(\d{4}-\d{2}-\d{2})\.(json|csv)$')
+
+class SnapshotArchive:
+    """One packed archive file; the header and day index are read on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self._meta = None
+        self._days = None
+        self._data_offset = None
+
+    def _load_index(self):
+        if self._days is not None:
+            return
+        with open(self.path, 'rb') as f:
+            magic, rows, columns, meta_len = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot archive")
+            self._meta = json.loads(f.read(meta_len))
+            self._days = np.frombuffer(f.read(rows * DATE_DTYPE.itemsize), dtype=DATE_DTYPE)
+        self._columns = columns
+        self._data_offset = HEADER.size + meta_len + rows * DATE_DTYPE.itemsize
+
+    @property
+    def meta(self):
+        self._load_index()
+        return self._meta
+
+    @property
+    def currencies(self):
+        return list(self.meta['currencies'])
+
+    @property
+    def dates(self):
+        self._load_index()
+        return [day_to_date(d) for d in self._days]
+
+    def __len__(self):
+        self._load_index()
+        return len(self._days)
+
+    def _snapshot(self, row, values):
+        rates = {code: float(v) for code, v in zip(self._meta['currencies'], values) if not np.isnan(v)}
+        snapshot = {
+            'date': day_to_date(self._days[row]),
+            'timestamp': self._meta['timestamps'][row],
+            'base_currency': self._meta['base_currency'],
+            'rates': rates,
+        }
+        provenance = self._meta.get('provenance', [None] * (row + 1))[row]
+        if provenance:
+            snapshot['provenance'] = unpack_provenance(provenance)
+        return snapshot
+
+    def read_day(self, date):
+        """Return one day's snapshot dict by seeking to its row, or None"""
+        self._load_index()
+        day = date_to_day(date)
+        row = int(np.searchsorted(self._days, day))
+        if row >= len(self._days) or self._days[row] != day:
+            return None
+        row_bytes = self._columns * RATE_DTYPE.itemsize
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_offset + row * row_bytes)
+            values = np.frombuffer(f.read(row_bytes), dtype=RATE_DTYPE)
+        return self._snapshot(row, values)
+
+    def read_all(self):
+        """Every snapshot in the file, in date order"""
+        self._load_index()
+        matrix = np.fromfile(self.path, dtype=RATE_DTYPE, offset=self._data_offset)
+        matrix = matrix.reshape(len(self._days), self._columns)
+        return [self._snapshot(row, matrix[row]) for row in range(len(self._days))]
+
+def pack_provenance(provenance):
+    """{code: {'provider', 'date'}} -> {provider: {date: [codes]}}, a few entries per day"""
+    packed = {}
+    for code, source in sorted((provenance or {}).items()):
+        packed.setdefault(source['provider'], {}).setdefault(source['date'], []).append(code)
+    return packed
+
+def unpack_provenance(packed):
+    return {code: {'provider': provider, 'date': date}
+            for provider, dates in packed.items() for date, codes in dates.items() for code in codes}
+
+def write_archive(path, snapshots):
+    """Write snapshot dicts to one archive file atomically; columns are the union of currencies"""
+
+    snapshots = sorted(snapshots, key=lambda s: s['date'])
+    currencies = sorted({code for s in snapshots for code in s['rates']})
+    column = {code: i for i, code in enumerate(currencies)}
+
+    matrix = np.full((len(snapshots), len(currencies)), np.nan, dtype=RATE_DTYPE)
+    for row, snapshot in enumerate(snapshots):
+        for code, rate in snapshot['rates'].items():
+            matrix[row, column[code]] = rate
+    days = np.array([date_to_day(s['date']) for s in snapshots], dtype=DATE_DTYPE)
+
+    meta = {
+        'base_currency': snapshots[0].get('base_currency', 'USD') if snapshots else 'USD',
+        'currencies': currencies,
+        'timestamps': [s.get('timestamp') for s in snapshots],
+    }
+    if any(s.get('provenance') for s in snapshots):
+        meta['provenance'] = [pack_provenance(s.get('provenance')) or None for s in snapshots]
+    meta = json.dumps(meta, separators=(',', ':')).encode()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(snapshots), len(currencies), len(meta)))
+        f.write(meta)
+        f.write(days.tobytes())
+        f.write(matrix.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+def archive_files(archive_dir=ARCHIVE_DIR):
+    """Archive paths keyed by period ('2025' or '2025-11'), sorted"""
+    if not os.path.isdir(archive_dir):
+        return {}
+    found = {}
+    for name in os.listdir(archive_dir):
+        match = ARCHIVE_NAME.match(name)
+        if match:
+            found[match.group(1)] = os.path.join(archive_dir, name)
+    return dict(sorted(found.items()))
+
+def archive_path(date, archive_dir=ARCHIVE_DIR, period='year'):
+    return os.path.join(archive_dir, date[:PERIOD_FORMATS[period]] + ARCHIVE_SUFFIX)
+
+def read_archived_day(date, archive_dir=ARCHIVE_DIR):
+    """Look up one day in whichever monthly or yearly archive covers it"""
+    files = archive_files(archive_dir)
+    for period in (date[:7], date[:4]):
+        if period in files:
+            snapshot = SnapshotArchive(files[period]).read_day(date)
+            if snapshot:
+                return snapshot
+    return None
+
+def load_archives(archive_dir=ARCHIVE_DIR):
+    """All archived snapshots as {date: snapshot}"""
+    snapshots = {}
+    for path in archive_files(archive_dir).values():
+        for snapshot in SnapshotArchive(path).read_all():
+            snapshots[snapshot['date']] = snapshot
+    return snapshots
+
+def upsert_archive(snapshots, archive_dir=ARCHIVE_DIR, period=None):
+    """
+    Add or replace snapshots, rewriting each touched archive file once
+    The period follows the existing files (yearly unless monthly files exist)
+    """
+
+    if period is None:
+        existing = archive_files(archive_dir)
+        period = 'month' if any(len(key) == 7 for key in existing) else 'year'
+
+    by_path = {}
+    for snapshot in snapshots:
+        by_path.setdefault(archive_path(snapshot['date'], archive_dir, period), []).append(snapshot)
+
+    for path, new in by_path.items():
+        merged = {}
+        if os.path.exists(path):
+            merged = {s['date']: s for s in SnapshotArchive(path).read_all()}
+        merged.update({s['date']: s for s in new})
+        write_archive(path, merged.values())
+    return sorted(by_path)
+
+def load_snapshot_files(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Read per-day JSON/CSV snapshot files into {date: snapshot}
+    JSON is preferred; a CSV is only used when no JSON exists for that day
+    """
+
+    snapshots = {}
+    csv_paths = {}
+    for name in sorted(os.listdir(snapshot_dir)) if os.path.isdir(snapshot_dir) else []:
+        match = SNAPSHOT_NAME.match(name)
+        if not match:
+            continue
+        path = os.path.join(snapshot_dir, name)
+        if match.group(2) == 'json':
+            with open(path, 'r') as f:
+                data = json.load(f)
+            data.setdefault('date', match.group(1))
+            snapshots[match.group(1)] = data
+        else:
+            csv_paths[match.group(1)] = path
+
+    for date, path in csv_paths.items():
+        if date in snapshots:
+            continue
+        with open(path, 'r') as f:
+            rows = list(csv.DictReader(f))
+        snapshots[date] = {
+            'date': date,
+            'timestamp': rows[0]['Timestamp'] if rows else None,
+            'base_currency': 'USD',
+            'rates': {row['Currency']: float(row['Rate_to_USD']) for row in rows},
+        }
+    return snapshots
+
+def convert_snapshots(snapshot_dir=SNAPSHOT_DIR, archive_dir=ARCHIVE_DIR, period='year', remove=False):
+    """
+    Migrate per-day JSON/CSV snapshots into packed archives
+    Every archived day is read back and compared before any file is removed.
+    """
+
+    snapshots = load_snapshot_files(snapshot_dir)
+    if not snapshots:
+        return 0, 0
+
+    upsert_archive(snapshots.values(), archive_dir, period)
+
+    for date, snapshot in snapshots.items():
+        archived = read_archived_day(date, archive_dir)
+        if archived is None or archived['rates'] != {k: float(v) for k, v in snapshot['rates'].items()}:
+            raise ValueError(f"Archive verification failed for {date}; no files removed")
+
+    removed = 0
+    if remove:
+        for path in glob.glob(os.path.join(snapshot_dir, '*')):
+            match = SNAPSHOT_NAME.match(os.path.basename(path))
+            if match and match.group(1) in snapshots:
+                os.remove(path)
+                removed += 1
+    return len(snapshots), removed
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Packed binary archives of daily currency snapshots")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert = sub.add_parser('convert', help="Migrate per-day JSON/CSV files into archives")
+    convert.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    convert.add_argument('--period', choices=sorted(PERIOD_FORMATS), default='year')
+    convert.add_argument('--remove', action='store_true',
+                         help="Delete the per-day files once the archives are verified")
+
+    show = sub.add_parser('show', help="Print one archived day as JSON")
+    show.add_argument('date')
+
+    sub.add_parser('list', help="List archive files")
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        days, removed = convert_snapshots(args.snapshot_dir, args.archive_dir, args.period, args.remove)
+        files = archive_files(args.archive_dir)
+        print(f"📦 Archived {days} days into {len(files)} file(s) in {args.archive_dir}")
+        if removed:
+            print(f"🧹 Removed {removed} per-day snapshot files")
+        return 0
+
+    if args.command == 'show':
+        snapshot = read_archived_day(args.date, args.archive_dir)
+        if snapshot is None:
+            print(f"❌ {args.date} is not archived")
+            return 1
+        print(json.dumps(snapshot, indent=2))
+        return 0
+
+    for period, path in archive_files(args.archive_dir).items():
+        archive = SnapshotArchive(path)
+        dates = archive.dates
+        print(f"{period}: {len(dates)} days x {len(archive.currencies)} currencies, "
+              f"{os.path.getsize(path):,} bytes ({dates[0] if dates else '-'} to {dates[-1] if dates else '-'})")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
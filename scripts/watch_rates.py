@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Currency Rate Watcher
+Long-running alternative to the daily cron for fresher intraday rates. One
+process keeps the providers, the pooled HTTP session and the history store
+open and polls on an adaptive schedule keyed to the ECB publication time
+(around 16:00 CET on business days):
+
+  awaiting today's rates - poll every MIN_INTERVAL seconds from the publication
+                           time, doubling while nothing changes, up to WINDOW_MAX_INTERVAL
+  up to date             - sleep until the next publication, at most MAX_INTERVAL
+  failing                - back off exponentially, up to MAX_INTERVAL
+
+A snapshot is validated and saved only when the payload's date or rates
+change. SIGTERM and SIGINT finish the current poll and exit cleanly.
+"""
+
+import argparse
+import contextlib
+import io
+import signal
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import metrics
+from currency_providers import make_providers, parse_provider_urls
+
+PUBLICATION_UTC = "14:00"
+# Fast polling lasts this long after the publication time
+WINDOW_MINUTES = 180
+MIN_INTERVAL = 60
+WINDOW_MAX_INTERVAL = 600
+MAX_INTERVAL = 3600
+
+def parse_hhmm(value):
+    hours, _, minutes = value.partition(':')
+    return int(hours), int(minutes or 0)
+
+def publication_time(day, publication_utc=PUBLICATION_UTC):
+    """UTC datetime the rates for a business day are expected"""
+    hours, minutes = parse_hhmm(publication_utc)
+    return datetime(day.year, day.month, day.day, hours, minutes, tzinfo=timezone.utc)
+
+def expected_date(now, publication_utc=PUBLICATION_UTC):
+    """The newest business day whose rates should be published by now"""
+    day = now.date()
+    if now < publication_time(day, publication_utc):
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+def next_publication(now, publication_utc=PUBLICATION_UTC):
+    day = now.date()
+    while True:
+        release = publication_time(day, publication_utc)
+        if day.weekday() < 5 and release > now:
+            return release
+        day += timedelta(days=1)
+
+def next_interval(now, latest_date, unchanged=0, errors=0, publication_utc=PUBLICATION_UTC,
+                  min_interval=MIN_INTERVAL, window_max=WINDOW_MAX_INTERVAL, max_interval=MAX_INTERVAL,
+                  window_minutes=WINDOW_MINUTES):
+    """
+    Seconds to sleep before the next poll
+    latest_date is the newest stored date (YYYY-MM-DD or None); unchanged and
+    errors count consecutive polls that brought nothing new or failed
+    """
+
+    if errors:
+        return min(min_interval * 2 ** errors, max_interval)
+
+    expected = expected_date(now, publication_utc)
+    if latest_date is not None and latest_date >= expected.isoformat():
+        until = (next_publication(now, publication_utc) - now).total_seconds()
+        return max(min_interval, min(until, max_interval))
+
+    window_end = publication_time(expected, publication_utc) + timedelta(minutes=window_minutes)
+    cap = window_max if now < window_end else max_interval
+    return min(min_interval * 2 ** unchanged, cap)
+
+class Watcher:
+    """Polls the providers and saves a snapshot whenever the payload changes"""
+
+    def __init__(self, providers, store=None, validate=True, write_metrics=True):
+        from history_store import open_store
+
+        self.providers = providers
+        self.store = store if store is not None else open_store()
+        self.validate = validate
+        self.write_metrics = write_metrics
+        self.last = None
+        self.unchanged = 0
+        self.errors = 0
+        self.saved = 0
+
+    def poll(self):
+        """One fetch; returns 'saved', 'unchanged', 'quarantined' or 'error'"""
+
+        from fetch_currency_rates import fetch_currency_rates, save_data
+
+        # A fresh metrics run per poll keeps the long-lived process from accumulating spans
+        metrics.reset()
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            data = fetch_currency_rates(self.providers)
+        if not data:
+            self.errors += 1
+            print(log.getvalue().rstrip())
+            return 'error'
+        self.errors = 0
+
+        payload = (data['date'], data['rates'])
+        if payload == self.last or self.store.is_unchanged(data['date'], data['rates']):
+            self.last = payload
+            self.unchanged += 1
+            return 'unchanged'
+        self.last = payload
+        self.unchanged = 0
+
+        if self.validate:
+            from data_quality import validate_snapshot
+            passed, _ = validate_snapshot(data, store=self.store)
+            if not passed:
+                return 'quarantined'
+        if not save_data(data, self.store):
+            self.errors += 1
+            return 'error'
+        self.saved += 1
+        if self.write_metrics:
+            metrics.write_run_metrics()
+        return 'saved'
+
+    def interval(self, now=None, **schedule):
+        now = now or datetime.now(timezone.utc)
+        return next_interval(now, self.store.latest_date, self.unchanged, self.errors, **schedule)
+
+def watch(watcher, stop, max_polls=None, **schedule):
+    """Poll until stop is set (or max_polls polls have run); returns the number of polls"""
+
+    polls = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        status = watcher.poll()
+        polls += 1
+        wait = watcher.interval(**schedule)
+        icon = {'saved': '💾', 'unchanged': '⏸️', 'quarantined': '🚫', 'error': '⚠️'}[status]
+        print(f"{icon} {datetime.now(timezone.utc):%Y-%m-%d %H:%M:%S}Z {status} "
+              f"(latest {watcher.store.latest_date}, {time.perf_counter() - started:.2f}s) - next poll in {wait:.0f}s",
+              flush=True)
+        if max_polls is not None and polls >= max_polls:
+            break
+        # Returns at once when a signal sets stop
+        stop.wait(wait)
+    return polls
+
+def main():
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Poll currency rates intraday and save them when they change")
+    parser.add_argument('--provider', action='append', metavar='NAME=URL',
+                        help="Override a provider's base URL, e.g. a local stub ('off' disables it)")
+    parser.add_argument('--publication-utc', default=PUBLICATION_UTC,
+                        help="Expected publication time, HH:MM UTC (default: %(default)s)")
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL)
+    parser.add_argument('--window-max-interval', type=float, default=WINDOW_MAX_INTERVAL)
+    parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL)
+    parser.add_argument('--window-minutes', type=int, default=WINDOW_MINUTES)
+    parser.add_argument('--max-polls', type=int, help="Stop after this many polls")
+    parser.add_argument('--no-validate', action='store_true', help="Save without data quality checks")
+    parser.add_argument('--no-metrics', action='store_true', help="Do not write a metrics file per save")
+    args = parser.parse_args()
+
+    from fetch_currency_rates import API_URL
+
+    urls = {'frankfurter': API_URL}
+    urls.update(parse_provider_urls(args.provider))
+    watcher = Watcher(make_providers(urls), validate=not args.no_validate, write_metrics=not args.no_metrics)
+
+    stop = threading.Event()
+
+    def shutdown(signum, frame):
+        print(f"🛑 {signal.Signals(signum).name} received - stopping after the current poll", flush=True)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"👀 Watching currency rates (publication ~{args.publication_utc} UTC, "
+          f"polls every {args.min_interval:g}-{args.max_interval:g}s)", flush=True)
+    polls = watch(watcher, stop, args.max_polls, publication_utc=args.publication_utc,
+                  min_interval=args.min_interval, window_max=args.window_max_interval,
+                  max_interval=args.max_interval, window_minutes=args.window_minutes)
+    print(f"✅ Stopped after {polls} poll(s), {watcher.saved} snapshot(s) saved")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
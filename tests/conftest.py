@@ -0,0 +1,69 @@
+"""Shared fixtures: scripts on sys.path, a scratch data/ tree and local HTTP stubs"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty directory, since the scripts use paths relative to the repo root"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def stub_server():
+    """
+    Start local http.server stubs
+    Call with respond(path, params) -> (status, payload); returns (base_url, requests)
+    where requests lists every (path, params) served. With headers=True respond
+    also gets the request headers and may return (status, payload, response_headers).
+    """
+
+    servers = []
+
+    def start(respond, headers=False):
+        seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                seen.append((url.path, params))
+                if headers:
+                    status, payload, *extra = respond(url.path, params, dict(self.headers))
+                else:
+                    status, payload, extra = *respond(url.path, params), []
+                body = json.dumps(payload).encode() if status != 304 else b''
+                self.send_response(status)
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/v1", seen
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def write_snapshot(date, rates, snapshot_dir='data/currency_rates'):
+    """Seed one per-day JSON snapshot"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, f"{date}.json"), 'w') as f:
+        json.dump({'date': date, 'timestamp': f"{date}T16:00:00", 'base_currency': 'USD', 'rates': rates}, f)
@@ -0,0 +1,48 @@
+import csv
+import json
+
+from conftest import write_snapshot
+
+import backfill_currency_rates
+from history_store import HistoryStore
+
+def rates_for(day):
+    return {'EUR': 0.9 + int(day[-2:]) / 1000, 'ZAR': 18.0}
+
+def test_backfill_fills_missing_business_days(stub_server):
+    write_snapshot('2026-03-02', rates_for('2026-03-02'))
+    write_snapshot('2026-03-09', rates_for('2026-03-09'))
+    # 2026-03-05 is served as a holiday: the API simply leaves it out
+    served = ['2026-03-03', '2026-03-04', '2026-03-06']
+
+    def respond(path, params):
+        start, end = path.rsplit('/', 1)[1].split('..')
+        days = [d for d in served if start <= d <= end]
+        return 200, {'base': 'USD', 'rates': {d: rates_for(d) for d in days}}
+
+    base_url, seen = stub_server(respond)
+    written = backfill_currency_rates.backfill('2026-03-02', '2026-03-09', base_url, workers=2)
+
+    assert written == 3
+    assert [path for path, _ in seen] == ['/v1/2026-03-03..2026-03-06']
+    store = HistoryStore()
+    assert list(store.dates) == ['2026-03-02', '2026-03-03', '2026-03-04', '2026-03-06', '2026-03-09']
+    assert store.read_day('2026-03-04') == rates_for('2026-03-04')
+    for day in served:
+        with open(f"data/currency_rates/{day}.json") as f:
+            assert json.load(f)['rates'] == rates_for(day)
+    with open('data/currency_rates/history.csv', newline='') as f:
+        assert {row['Date'] for row in csv.DictReader(f)} >= set(served)
+
+    # The holiday is remembered, so a rerun asks for nothing
+    assert backfill_currency_rates.load_closed_dates() == {'2026-03-05'}
+    assert backfill_currency_rates.backfill('2026-03-02', '2026-03-09', base_url) == 0
+    assert len(seen) == 1
+
+def test_backfill_keeps_failed_ranges_open(stub_server):
+    write_snapshot('2026-03-02', rates_for('2026-03-02'))
+    base_url, _ = stub_server(lambda path, params: (404, {'message': 'not found'}))
+
+    assert backfill_currency_rates.backfill('2026-03-02', '2026-03-04', base_url) == 0
+    assert backfill_currency_rates.load_closed_dates() == set()
+    assert list(HistoryStore().dates) == ['2026-03-02']
@@ -0,0 +1,38 @@
+import numpy as np
+
+from comovement import correlation_matrices, rolling_correlations
+
+LABELS = ['INR', 'ZAR', 'commodity:gold']
+
+def month_axis(count):
+    return [str(m) for m in np.arange(np.datetime64('2024-01'), np.datetime64('2024-01') + count)]
+
+def test_an_appended_month_only_computes_the_new_window():
+    returns = np.random.default_rng(1).normal(size=(20, len(LABELS)))
+    end_months, first, computed = rolling_correlations(LABELS, month_axis(20), returns[:19], window=12,
+                                                       cache_dir='cache')
+    assert computed == len(end_months) == 8
+
+    end_months, again, computed = rolling_correlations(LABELS, month_axis(21), returns, window=12,
+                                                       cache_dir='cache')
+    assert computed == 1
+    assert len(end_months) == 9
+    assert np.allclose(again[:-1], first)
+
+    # A revised month only recomputes the windows that contain it
+    revised = returns.copy()
+    revised[-2] += 0.5
+    _, _, computed = rolling_correlations(LABELS, month_axis(21), revised, window=12, cache_dir='cache')
+    assert computed == 2
+
+def test_correlations_match_numpy_on_complete_windows():
+    window = np.random.default_rng(2).normal(size=(12, 4))
+    corr = correlation_matrices(window[None])[0]
+    assert np.allclose(corr, np.corrcoef(window, rowvar=False))
+
+def test_pairs_use_only_months_both_series_have():
+    window = np.random.default_rng(3).normal(size=(12, 3))
+    window[:8, 2] = np.nan
+    corr = correlation_matrices(window[None], min_periods=4)[0]
+    assert np.isclose(corr[0, 2], np.corrcoef(window[8:, 0], window[8:, 2])[0, 1])
+    assert np.isnan(correlation_matrices(window[None], min_periods=5)[0][0, 2])
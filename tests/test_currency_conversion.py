@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from currency_conversion import Converter, monthly_local_series, to_days
+from history_store import HistoryStore
+
+def converter(**options):
+    store = HistoryStore()
+    store.write_all({'2026-03-02': {'EUR': 0.90}, '2026-03-04': {'EUR': 0.92},
+                     '2026-03-20': {'EUR': 1.00}})
+    return Converter(store, fill='interpolate', **options)
+
+def test_interpolation_bridges_short_gaps_only():
+    conv = converter(max_gap_days=7)
+    rates = conv.rates_at(to_days(['2026-03-03', '2026-03-06', '2026-03-12']), conv.positions('EUR'))
+    # Inside the two-day gap: interpolated
+    assert np.isclose(rates[0], 0.91)
+    # Across the 16-day gap: the previous rate while it is recent enough, then nothing
+    assert np.isclose(rates[1], 0.92)
+    assert np.isnan(rates[2])
+
+def test_without_a_limit_every_gap_is_interpolated():
+    conv = converter(max_gap_days=None)
+    rate = conv.rates_at(to_days(['2026-03-12']), conv.positions('EUR'))[0]
+    assert np.isclose(rate, 0.96)
+
+def monthly_store():
+    store = HistoryStore()
+    store.write_all({'2026-02-02': {'EUR': 0.90}, '2026-02-25': {'EUR': 0.92},
+                     '2026-03-02': {'EUR': 0.94, 'NGN': 1500.0}, '2026-03-31': {'EUR': 0.96, 'NGN': 1520.0},
+                     '2026-04-15': {'EUR': 0.97, 'NGN': 1661.0}})
+    return store
+
+def test_batch_conversion_mixes_pairs_and_broadcasts():
+    conv = Converter(monthly_store())
+    values = conv.convert(['2026-02-02', '2026-02-25'], [100.0, 100.0], ['EUR', 'USD'], ['USD', 'EUR'])
+    assert np.allclose(values, [100 / 0.90, 92.0])
+
+    # One date and one source for every row
+    values = conv.convert('2026-03-02', [1.0, 2.0], 'EUR', ['NGN', 'EUR'])
+    assert np.allclose(values, [1500 / 0.94, 2.0])
+
+    with pytest.raises(KeyError):
+        conv.convert('2026-03-02', 1.0, 'XXX', 'USD')
+
+def test_exact_fill_only_returns_stored_days():
+    conv = Converter(monthly_store(), fill='exact')
+    rates = conv.rates_at(to_days(['2026-02-02', '2026-02-03']), conv.positions('EUR'))
+    assert rates[0] == 0.90
+    assert np.isnan(rates[1])
+
+def test_monthly_rates_average_and_month_end():
+    conv = Converter(monthly_store())
+    months = ['2026-01', '2026-02', '2026-03']
+    average = conv.monthly_rates(months, 'EUR')
+    assert np.isnan(average[0])
+    assert np.allclose(average[1:], [0.91, 0.95])
+    # Month end: 28 February falls back to the 25th; 31 March is stored
+    assert np.allclose(conv.monthly_rates(months, 'EUR', 'end')[1:], [0.92, 0.96])
+
+def write_month(directory, month, body):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{month}.json"), 'w') as f:
+        json.dump(body, f)
+
+def test_local_series_scale_cents_and_rebase_food_indices():
+    for month, sugar in (('2026-02', 40.0), ('2026-03', 42.0), ('2026-04', 42.0)):
+        write_month('data/commodity_prices', month, {'commodities': {'agriculture': {
+            'sugar': {'price': sugar, 'unit': '¢/kg'}, 'wheat_us': {'price': 250.0, 'unit': '$/mt'}}}})
+        write_month('data/food_prices', month, {'indices': {'overall_index': {'value': 120.0, 'unit': 'points'}}})
+
+    records = monthly_local_series(['NGN'], Converter(monthly_store()))
+    by_key = {(r['month'], r['series']): r for r in records}
+
+    sugar = by_key[('2026-03', 'commodity_sugar')]
+    assert sugar['unit'] == 'NGN/kg'
+    assert np.isclose(sugar['local_value'], 0.42 * 1510.0)
+    assert by_key[('2026-03', 'commodity_wheat_us')]['unit'] == 'NGN/mt'
+
+    # NGN has no February rate: that month is missing, and the index is rebased on March
+    assert np.isnan(by_key[('2026-02', 'food_overall_index')]['local_value'])
+    assert by_key[('2026-03', 'food_overall_index')]['local_value'] == 120.0
+    # ...and moves with the naira after: 1661 / 1510 = 1.1
+    assert np.isclose(by_key[('2026-04', 'food_overall_index')]['local_value'], 132.0)
+
+def test_local_food_index_without_any_rate_is_missing():
+    write_month('data/food_prices', '2026-01', {'indices': {'overall_index': {'value': 118.0, 'unit': 'points'}}})
+    records = monthly_local_series(['NGN'], Converter(monthly_store()))
+    assert len(records) == 1 and np.isnan(records[0]['local_value'])
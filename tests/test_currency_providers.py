@@ -0,0 +1,117 @@
+import pytest
+
+from currency_providers import fetch_all, make_providers
+from snapshot_archive import SnapshotArchive, write_archive
+
+FRIDAY = '2026-03-06'
+SATURDAY = '2026-03-07'
+MONDAY = '2026-03-09'
+
+def frankfurter(date, rates):
+    def respond(path, params):
+        if path.endswith('/currencies'):
+            return 200, {code: code for code in ('EUR', 'GBP', 'JPY')}
+        if path.endswith('/latest'):
+            wanted = params['symbols'].split(',')
+            return 200, {'base': 'USD', 'date': date, 'rates': {c: r for c, r in rates.items() if c in wanted}}
+        return 404, {}
+    return respond
+
+def currency_api(date, rates):
+    def respond(path, params):
+        if path.endswith('/currencies.json'):
+            return 200, {code.lower(): code for code in rates}
+        if path.endswith('/currencies/usd.json'):
+            return 200, {'date': date, 'usd': {c.lower(): r for c, r in rates.items()}}
+        return 404, {}
+    return respond
+
+@pytest.fixture
+def providers(stub_server):
+    def start(primary, fallback):
+        primary_url, _ = stub_server(primary)
+        fallback_url, _ = stub_server(fallback)
+        return make_providers({'frankfurter': primary_url, 'open_er_api': 'off', 'currency_api': fallback_url})
+    return start
+
+def test_fallback_fills_only_missing_currencies(providers):
+    date, rates, provenance, report = fetch_all(['EUR', 'GBP', 'NGN'], providers(
+        frankfurter(FRIDAY, {'EUR': 0.9, 'GBP': 0.8}),
+        currency_api(FRIDAY, {'EUR': 0.95, 'NGN': 1500.0})))
+
+    assert date == FRIDAY
+    assert rates == {'EUR': 0.9, 'GBP': 0.8, 'NGN': 1500.0}
+    assert provenance['EUR'] == {'provider': 'frankfurter', 'date': FRIDAY}
+    assert provenance['NGN'] == {'provider': 'currency_api', 'date': FRIDAY}
+    # Only the currencies Frankfurter carries are asked of it
+    assert report['frankfurter']['requested'] == 2
+
+def test_fallback_dated_one_day_later_fills_missing_currencies(providers):
+    date, rates, provenance, report = fetch_all(['EUR', 'NGN'], providers(
+        frankfurter(FRIDAY, {'EUR': 0.9}),
+        currency_api(SATURDAY, {'EUR': 0.95, 'NGN': 1500.0})))
+
+    assert date == FRIDAY
+    assert rates == {'EUR': 0.9, 'NGN': 1500.0}
+    assert provenance['NGN'] == {'provider': 'currency_api', 'date': SATURDAY}
+    assert 'newer' not in report['currency_api']
+
+def test_fallback_further_ahead_is_not_used(providers):
+    date, rates, _, report = fetch_all(['EUR', 'NGN'], providers(
+        frankfurter(FRIDAY, {'EUR': 0.9}),
+        currency_api(MONDAY, {'EUR': 0.95, 'NGN': 1500.0})))
+
+    assert date == FRIDAY
+    assert rates == {'EUR': 0.9}
+    assert report['currency_api']['newer']
+
+def test_dated_fallback_is_asked_for_the_snapshot_date(stub_server):
+    def respond(path, params):
+        if path.endswith('/currencies.json'):
+            return 200, {'eur': 'Euro', 'ngn': 'Naira'}
+        if path == f"/{FRIDAY}/v1/currencies/usd.json":
+            return 200, {'date': FRIDAY, 'usd': {'ngn': 1490.0}}
+        if path == '/latest/v1/currencies/usd.json':
+            return 200, {'date': MONDAY, 'usd': {'ngn': 1500.0}}
+        return 404, {}
+
+    primary_url, _ = stub_server(frankfurter(FRIDAY, {'EUR': 0.9}))
+    fallback_url, seen = stub_server(respond)
+    date, rates, provenance, _ = fetch_all(['EUR', 'NGN'], make_providers({
+        'frankfurter': primary_url, 'open_er_api': 'off',
+        'currency_api': fallback_url.replace('/v1', '/{version}/v1')}))
+
+    assert date == FRIDAY
+    assert rates == {'EUR': 0.9, 'NGN': 1490.0}
+    assert provenance['NGN'] == {'provider': 'currency_api', 'date': FRIDAY}
+    assert (f"/{FRIDAY}/v1/currencies/usd.json", {}) in seen
+
+def test_older_fallback_rates_keep_their_own_date(providers):
+    date, rates, provenance, _ = fetch_all(['EUR', 'NGN'], providers(
+        frankfurter(FRIDAY, {'EUR': 0.9}),
+        currency_api('2026-03-05', {'NGN': 1490.0})))
+
+    assert date == FRIDAY
+    assert provenance['NGN'] == {'provider': 'currency_api', 'date': '2026-03-05'}
+
+def test_fallback_sets_the_date_when_the_primary_fails(providers):
+    date, rates, provenance, report = fetch_all(['EUR', 'NGN'], providers(
+        lambda path, params: (404, {}),
+        currency_api(FRIDAY, {'EUR': 0.95, 'NGN': 1500.0})))
+
+    assert date == FRIDAY
+    assert rates == {'EUR': 0.95, 'NGN': 1500.0}
+    assert 'error' in report['frankfurter']
+
+def test_archives_keep_provenance():
+    provenance = {'EUR': {'provider': 'frankfurter', 'date': FRIDAY},
+                  'NGN': {'provider': 'currency_api', 'date': '2026-03-05'}}
+    write_archive('2026.rates', [
+        {'date': FRIDAY, 'timestamp': 't', 'base_currency': 'USD',
+         'rates': {'EUR': 0.9, 'NGN': 1490.0}, 'provenance': provenance},
+        {'date': '2026-03-09', 'timestamp': 't', 'base_currency': 'USD', 'rates': {'EUR': 0.91}},
+    ])
+    archive = SnapshotArchive('2026.rates')
+
+    assert archive.read_day(FRIDAY)['provenance'] == provenance
+    assert 'provenance' not in archive.read_day('2026-03-09')
@@ -0,0 +1,46 @@
+import os
+
+from data_quality import STATE_FILE, load_state, release, validate_snapshot
+from fetch_currency_rates import save_data
+from history_store import HistoryStore
+
+def snapshot(date, eur):
+    return {'date': date, 'timestamp': f"{date}T16:00:00", 'base_currency': 'USD',
+            'rates': {'EUR': eur, 'JPY': 150.0}}
+
+def seeded_store(days=12):
+    store = HistoryStore()
+    store.write_all({f"2026-03-{day:02d}": {'EUR': 0.9 + day * 1e-4, 'JPY': 150.0 + day * 0.1}
+                     for day in range(1, days + 1)})
+    return store
+
+def test_an_unchanged_day_writes_no_report_or_state():
+    store = seeded_store()
+    day = store.dates[-1]
+    ok, report = validate_snapshot({'date': day, 'rates': store.read_day(day)}, store=store)
+    assert ok and report['status'] == 'unchanged'
+    assert not os.path.exists('data/quality')
+
+def test_statistics_move_only_after_a_save():
+    store = seeded_store()
+    data = snapshot('2026-03-13', 0.9013)
+    ok, report = validate_snapshot(data, store=store)
+    assert ok and os.path.exists(report['report_file'])
+    assert not os.path.exists(STATE_FILE)
+
+    assert save_data(data, store)
+    assert load_state(store=store)['last_date'] == '2026-03-13'
+
+def test_a_quarantined_snapshot_leaves_the_statistics_alone():
+    store = seeded_store()
+    save_data(snapshot('2026-03-13', 0.9013), store)
+    before = os.path.getmtime(STATE_FILE)
+
+    ok, report = validate_snapshot(snapshot('2026-03-14', 9.013), store=store)
+    assert not ok and os.path.exists(report['quarantine_file'])
+    assert os.path.getmtime(STATE_FILE) == before
+    assert load_state(store=store)['last_date'] == '2026-03-13'
+
+    # Releasing it after review saves it, and saving folds it in
+    assert release('2026-03-14')
+    assert load_state()['last_date'] == '2026-03-14'
@@ -0,0 +1,42 @@
+import os
+
+from generate_summary import (count_snapshots, empty_state, generate_overall_summary, load_file_counts,
+                              load_summary_state, save_summary_state, update_currency_state)
+from history_store import HistoryStore
+
+def test_a_corrected_last_day_is_refolded():
+    store = HistoryStore()
+    store.write_all({'2026-03-02': {'EUR': 0.90}, '2026-03-03': {'EUR': 0.91}})
+    state = empty_state()
+    assert update_currency_state(state, store) == 2
+    assert update_currency_state(state, store) == 0
+
+    # Same row count and last date, different rates
+    assert store.upsert('2026-03-03', {'EUR': 0.95}) == 'updated'
+    assert update_currency_state(state, store) == 2
+    assert state['currency']['last_rates'] == {'EUR': 0.95}
+    assert state['currency']['days'] == 2
+
+def test_appended_days_fold_incrementally():
+    store = HistoryStore()
+    store.write_all({'2026-03-02': {'EUR': 0.90}})
+    state = empty_state()
+    update_currency_state(state, store)
+    store.append('2026-03-03', {'EUR': 0.92})
+
+    assert update_currency_state(state, store) == 1
+    assert state['currency']['returns']['EUR']['n'] == 1
+
+def test_directory_counts_stay_out_of_the_committed_state():
+    os.makedirs('data/commodity_prices')
+    for month in ('2026-01', '2026-02'):
+        open(f"data/commodity_prices/{month}.json", 'w').close()
+    state = load_summary_state()
+    state['file_counts'] = {'data/commodity_prices': {'mtime_ns': 1, 'count': 9}}
+
+    generate_overall_summary(state)
+    save_summary_state(state)
+
+    assert 'file_counts' not in load_summary_state()
+    assert load_file_counts()['data/commodity_prices']['count'] == 2
+    assert count_snapshots('data/commodity_prices', load_file_counts()) == 2
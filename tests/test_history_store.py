@@ -0,0 +1,35 @@
+import csv
+
+from history_store import HISTORY_HEADER, load_history_csv, merge_history_csv, upsert_history_csv
+
+PATH = 'history.csv'
+
+def rows():
+    with open(PATH, newline='') as f:
+        reader = csv.reader(f)
+        assert next(reader) == HISTORY_HEADER
+        return [row for row in reader]
+
+def test_replacing_a_day_leaves_no_duplicates():
+    upsert_history_csv('2026-03-02', '2026-03-02T06:00:00', {'EUR': 0.9, 'JPY': 150.0}, path=PATH)
+    upsert_history_csv('2026-03-03', '2026-03-03T06:00:00', {'EUR': 0.91}, path=PATH)
+    upsert_history_csv('2026-03-02', '2026-03-02T18:00:00', {'EUR': 0.92}, replace=True, path=PATH)
+
+    assert [(row[0], row[2]) for row in rows()].count(('2026-03-02', 'EUR')) == 1
+    history = load_history_csv(PATH)
+    # The whole day is replaced: JPY is gone, not kept from the earlier fetch
+    assert history['2026-03-02']['rates'] == {'EUR': 0.92}
+    assert history['2026-03-03']['rates'] == {'EUR': 0.91}
+
+def test_merging_out_of_order_days_sorts_and_overrides():
+    upsert_history_csv('2026-03-05', '2026-03-05T06:00:00', {'EUR': 0.95}, path=PATH)
+    merge_history_csv([
+        {'date': '2026-03-04', 'timestamp': 't', 'rates': {'EUR': 0.94, 'JPY': 151.0}},
+        {'date': '2026-03-02', 'timestamp': 't', 'rates': {'EUR': 0.92}},
+        {'date': '2026-03-05', 'timestamp': 't', 'rates': {'EUR': 0.96}},
+    ], path=PATH)
+
+    keys = [(row[0], row[2]) for row in rows()]
+    assert keys == sorted(set(keys))
+    assert [row[3] for row in rows() if row[0] == '2026-03-05'] == ['0.96']
+    assert sorted(load_history_csv(PATH)) == ['2026-03-02', '2026-03-04', '2026-03-05']
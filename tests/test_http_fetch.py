@@ -0,0 +1,44 @@
+import os
+
+from http_fetch import _paths, cache_key, fetch
+
+CACHE = 'http-cache'
+PAYLOAD = {'rates': {'EUR': 0.9}}
+
+def test_revalidation_serves_the_cached_body_on_304(stub_server):
+    received = []
+
+    def respond(path, params, headers):
+        received.append(headers.get('If-None-Match'))
+        if headers.get('If-None-Match') == '"v1"':
+            return 304, None, {'ETag': '"v1"'}
+        return 200, PAYLOAD, {'ETag': '"v1"'}
+
+    url, seen = stub_server(respond, headers=True)
+    first = fetch(f"{url}/latest", ttl=0, cache_dir=CACHE)
+    second = fetch(f"{url}/latest", ttl=0, cache_dir=CACHE)
+
+    assert first.source == 'network'
+    assert second.source == 'revalidated'
+    assert received == [None, '"v1"']
+    assert second.json() == PAYLOAD
+
+    # Inside the TTL no request is made at all
+    assert fetch(f"{url}/latest", ttl=3600, cache_dir=CACHE).source == 'cache'
+    assert len(seen) == 2
+
+def test_least_recently_used_entries_are_evicted_past_the_limit(stub_server):
+    url, _ = stub_server(lambda path, params: (200, PAYLOAD))
+
+    def entry(name):
+        return _paths(cache_key(f"{url}/{name}"), CACHE)
+
+    fetch(f"{url}/a", cache_dir=CACHE)
+    fetch(f"{url}/b", cache_dir=CACHE)
+    size = sum(os.path.getsize(path) for path in entry('a'))
+    # /a was used longest ago
+    os.utime(entry('a')[0], (1, 1))
+
+    fetch(f"{url}/c", cache_dir=CACHE, max_bytes=2 * size + 10)
+    assert not any(os.path.exists(path) for path in entry('a'))
+    assert all(os.path.exists(path) for path in entry('b') + entry('c'))
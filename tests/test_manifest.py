@@ -0,0 +1,94 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from history_store import HistoryStore
+from manifest import LOCAL_SUFFIX, MANIFEST_FILE, STAGE_SUFFIX, Transaction, load_local, load_manifest, verify
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+def test_recover_waits_for_a_live_transaction():
+    os.makedirs('data/currency_rates')
+    target = 'data/currency_rates/latest.csv'
+    with Transaction('writer') as txn:
+        with txn.open(target) as f:
+            f.write('staged\n')
+        # Another process starting a write must not clear the staged file
+        other = subprocess.Popen([sys.executable, '-c', 'import manifest; manifest.recover()'],
+                                 cwd=os.getcwd(), env={**os.environ, 'PYTHONPATH': SCRIPTS})
+        try:
+            other.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        assert other.returncode is None
+        assert os.path.exists(target + STAGE_SUFFIX)
+    assert other.wait(timeout=10) == 0
+    with open(target) as f:
+        assert f.read() == 'staged\n'
+
+def test_store_writes_are_committed_and_recorded():
+    store = HistoryStore()
+    store.write_all({'2026-03-02': {'EUR': 0.9}})
+    store.append('2026-03-03', {'EUR': 0.91})
+    store.upsert('2026-03-03', {'EUR': 0.92})
+
+    assert list(store.dates) == ['2026-03-02', '2026-03-03']
+    assert np.allclose(store.read_range()[2][:, 0], [0.9, 0.92])
+    # The store is gitignored: its records live in the untracked side manifest
+    store_files = {store.meta_path, store.dates_path, store.rates_path}
+    assert store_files <= set(load_local()['files'])
+    assert not store_files & set(load_manifest()['files'])
+    assert verify(full=True) == {}
+    assert not [name for name in os.listdir(store.store_dir) if name.endswith((STAGE_SUFFIX, '.tmp'))]
+
+def test_an_aborted_transaction_leaves_the_store_untouched():
+    store = HistoryStore()
+    store.write_all({'2026-03-02': {'EUR': 0.9}})
+    try:
+        with Transaction('aborted') as txn:
+            store.append('2026-03-03', {'EUR': 0.91}, txn=txn)
+            raise RuntimeError("crash before commit")
+    except RuntimeError:
+        pass
+    assert list(store.dates) == ['2026-03-02']
+
+def test_a_fresh_clone_verifies_against_the_committed_manifest():
+    os.makedirs('data/currency_rates')
+    with Transaction('snapshot') as txn:
+        with txn.open('data/currency_rates/latest.csv') as f:
+            f.write('rates\n')
+    HistoryStore().write_all({'2026-03-02': {'EUR': 0.9}})
+
+    # Nothing checkout-specific is committed
+    assert 'mtime_ns' not in load_manifest()['files']['data/currency_rates/latest.csv']
+
+    # A clone has the tracked files and manifest.json, but no store or side manifest
+    shutil.rmtree('data/currency_rates/store')
+    os.remove(MANIFEST_FILE + LOCAL_SUFFIX)
+    assert verify() == {}
+    assert verify(full=True) == {}
+
+def test_appends_to_one_path_in_a_transaction_are_combined():
+    os.makedirs('data')
+    with open('data/log.txt', 'w') as f:
+        f.write('a\n')
+    with Transaction('appends', 'data/manifest.json') as txn:
+        with txn.append('data/log.txt') as f:
+            f.write('b\n')
+        with txn.append('data/log.txt') as f:
+            f.write('c\n')
+    with open('data/log.txt') as f:
+        assert f.read() == 'a\nb\nc\n'
+
+    with pytest.raises(ValueError):
+        with Transaction('mixed', 'data/manifest.json') as txn:
+            with txn.open('data/log.txt') as f:
+                f.write('replaced\n')
+            with txn.append('data/log.txt') as f:
+                f.write('d\n')
+    with open('data/log.txt') as f:
+        assert f.read() == 'a\nb\nc\n'
@@ -0,0 +1,29 @@
+import csv
+import json
+import os
+
+from fetch_food_prices import FAO_INDEX_HEADER, fao_index_row
+from monthly_series import load_food_months
+
+def test_food_months_come_from_fao_index_csv():
+    os.makedirs('data/food_prices')
+    with open('data/food_prices/fao_index.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FAO_INDEX_HEADER)
+        writer.writerow(fao_index_row('2026-01', 't', {'overall_index': 124.9, 'cereals': 105.1}))
+        writer.writerow(fao_index_row('2026-02', 't', {'overall_index': 126.3}))
+    # A placeholder month file does not hide the extracted values
+    with open('data/food_prices/2026-02.json', 'w') as f:
+        json.dump({'indices': {'overall_index': {'value': None, 'unit': 'points'}}}, f)
+    with open('data/food_prices/2026-03.json', 'w') as f:
+        json.dump({'indices': {'overall_index': {'value': 127.0, 'unit': 'points'}}}, f)
+
+    values, units = load_food_months()
+
+    assert sorted(values) == ['2026-01', '2026-02', '2026-03']
+    assert values['2026-01']['overall_index'] == 124.9
+    assert values['2026-01']['cereals'] == 105.1
+    assert values['2026-01']['dairy'] is None
+    assert values['2026-02']['overall_index'] == 126.3
+    assert values['2026-03']['overall_index'] == 127.0
+    assert units['overall_index'] == 'points'
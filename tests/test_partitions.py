@@ -0,0 +1,51 @@
+import fnmatch
+import json
+import os
+import time
+
+from fetch_currency_rates import save_data
+from history_store import open_store
+from partitions import DERIVED_PATHS, PARTITION_DIR, partition_path
+
+def ignored(path):
+    relative = os.path.relpath(path, 'data')
+    return any(fnmatch.fnmatch(relative, entry) or (entry.endswith('/') and relative.startswith(entry))
+               for entry in DERIVED_PATHS)
+
+def test_a_daily_save_adds_only_the_partition_to_git():
+    os.makedirs(PARTITION_DIR)
+    data = {'date': '2026-03-02', 'timestamp': '2026-03-02T16:00:00', 'base_currency': 'USD',
+            'rates': {'EUR': 0.9, 'JPY': 150.0}}
+    assert save_data(data)
+
+    written = [os.path.join(root, name) for root, _, names in os.walk('data') for name in names]
+    tracked = [path for path in written if not ignored(path)]
+    assert tracked == [partition_path('2026-03-02')]
+
+def pull_partition(date, eur):
+    """Write a partition the way a checkout does: a new file behind the store's back"""
+    time.sleep(0.02)
+    path = partition_path(date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.new', 'w') as f:
+        json.dump({'date': date, 'timestamp': f"{date}T16:00:00", 'base_currency': 'USD',
+                   'rates': {'EUR': eur}}, f)
+    os.replace(path + '.new', path)
+
+def test_open_store_picks_up_pulled_partitions():
+    pull_partition('2026-03-02', 0.90)
+    assert open_store().dates == ['2026-03-02']
+
+    pull_partition('2026-03-03', 0.91)
+    pull_partition('2027-01-04', 0.95)
+    assert open_store().dates == ['2026-03-02', '2026-03-03', '2027-01-04']
+
+    # A corrected day from another machine replaces the stored one
+    pull_partition('2026-03-02', 0.89)
+    store = open_store()
+    assert store.read_day('2026-03-02') == {'EUR': 0.89}
+
+    # Nothing new: the store is left alone
+    before = os.stat(store.rates_path).st_mtime_ns
+    assert open_store().dates == ['2026-03-02', '2026-03-03', '2027-01-04']
+    assert os.stat(store.rates_path).st_mtime_ns == before
@@ -0,0 +1,57 @@
+import csv
+import os
+
+import pytest
+
+import pink_sheet
+
+def test_unparseable_workbook_leaves_no_temp_file():
+    os.makedirs('data/commodity_prices')
+    history_csv = 'data/commodity_prices/history.csv'
+    with open(history_csv, 'w') as f:
+        f.write('previous\n')
+
+    with pytest.raises(Exception):
+        pink_sheet.ingest_pink_sheet(b'not a workbook', history_csv)
+
+    assert sorted(os.listdir('data/commodity_prices')) == ['history.csv']
+    with open(history_csv) as f:
+        assert f.read() == 'previous\n'
+
+def make_workbook(path):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = pink_sheet.PRICES_SHEET
+    headers = [header for _, header, _, _ in pink_sheet.SERIES.values()]
+    sheet.append(['World Bank Commodity Price Data (The Pink Sheet)'])
+    sheet.append(['Monthly prices in nominal US dollars'])
+    # Footnote markers on the header, then the units row the sheet carries
+    sheet.append([None] + [f"{header} (a) **" if header == 'Crude oil, WTI' else header for header in headers])
+    sheet.append([None] + ['($/unit)'] * len(headers))
+    sheet.append(['2026M01', 75.5, 72.0] + [None] * (len(headers) - 2))
+    sheet.append(['Notes: see the Description sheet'])
+    row = ['2026M02'] + [1.0] * len(headers)
+    row[1 + headers.index('Sugar, world')] = 0.42
+    row[1 + headers.index('Gold')] = '…'
+    sheet.append(row)
+    workbook.save(path)
+
+def test_header_units_and_months_are_parsed(workdir):
+    make_workbook('cmo.xlsx')
+
+    months = dict(pink_sheet.iter_pink_sheet('cmo.xlsx'))
+    assert list(months) == ['2026-01', '2026-02']
+    assert months['2026-01'] == {'crude_oil_brent': 75.5, 'crude_oil_wti': 72.0}
+    # Sugar is stored in ¢/kg; non-numeric cells are skipped
+    assert months['2026-02']['sugar'] == 42.0
+    assert 'gold' not in months['2026-02']
+
+    history_csv = 'data/commodity_prices/history.csv'
+    latest_month, latest_prices, written = pink_sheet.ingest_pink_sheet('cmo.xlsx', history_csv)
+    assert (latest_month, written) == ('2026-02', 2)
+    with open(history_csv, newline='') as f:
+        rows = list(csv.DictReader(f))
+    sugar = next(row for row in rows if row['Commodity'] == 'sugar')
+    assert (sugar['Date'], sugar['Category'], sugar['Unit'], sugar['Price']) == ('2026-02', 'agriculture', '¢/kg', '42.0')
@@ -0,0 +1,49 @@
+import json
+import os
+from datetime import date
+
+import release_schedule
+from release_schedule import PINK_SHEET, is_due, record_failure, record_fetch
+
+def test_failed_release_backs_off_and_recovers():
+    today = date(2026, 10, 5)
+    due, release = is_due(PINK_SHEET, today)
+    assert due and release == date(2026, 10, 1)
+
+    assert record_failure(PINK_SHEET, release, today) == date(2026, 10, 6)
+    assert not is_due(PINK_SHEET, today)[0]
+    assert is_due(PINK_SHEET, date(2026, 10, 6))[0]
+
+    assert record_failure(PINK_SHEET, release, date(2026, 10, 6)) == date(2026, 10, 8)
+    assert record_failure(PINK_SHEET, release, date(2026, 10, 8)) == date(2026, 10, 12)
+    assert record_failure(PINK_SHEET, release, date(2026, 10, 12)) == date(2026, 10, 19)
+    assert record_failure(PINK_SHEET, release, date(2026, 10, 19)) == date(2026, 10, 26)
+    assert not is_due(PINK_SHEET, date(2026, 10, 20))[0]
+
+    record_fetch(PINK_SHEET, release)
+    assert 'failed' not in release_schedule.load_manifest()[PINK_SHEET]
+    assert not is_due(PINK_SHEET, date(2026, 10, 30))[0]
+
+def test_a_new_release_resets_the_backoff():
+    record_failure(PINK_SHEET, date(2026, 9, 1), date(2026, 9, 30))
+    assert is_due(PINK_SHEET, date(2026, 10, 2))[0]
+
+def test_failed_fetch_keeps_the_month_file_and_template(monkeypatch):
+    import fetch_commodity_prices
+
+    def offline(path):
+        raise OSError("offline")
+
+    os.makedirs('data/commodity_prices')
+    monkeypatch.setattr(fetch_commodity_prices, 'ingest_pink_sheet', offline)
+    data = fetch_commodity_prices.fetch_commodity_prices()
+    assert fetch_commodity_prices.save_commodity_data(data)
+    month_file = f"data/commodity_prices/{data['date']}.json"
+    before = {path: os.stat(path).st_mtime_ns for path in (month_file, fetch_commodity_prices.TEMPLATE_CSV)}
+
+    again = fetch_commodity_prices.fetch_commodity_prices()
+    again['timestamp'] = 'later'
+    assert not fetch_commodity_prices.save_commodity_data(again)
+    assert {path: os.stat(path).st_mtime_ns for path in before} == before
+    with open(month_file) as f:
+        assert json.load(f)['timestamp'] == data['timestamp']
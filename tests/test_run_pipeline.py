@@ -0,0 +1,41 @@
+import run_pipeline
+
+def stage(name, calls, fail=False):
+    def func(ctx):
+        calls.append(name)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        return name
+    return func
+
+def test_summary_runs_when_the_fetch_fails():
+    calls = []
+    stages = {
+        'fetch': (stage('fetch', calls, fail=True), [], True, True),
+        'save': (stage('save', calls), ['fetch'], True, True),
+        'summary': (stage('summary', calls), ['save'], False, False),
+    }
+    ok, timings = run_pipeline.run_pipeline(stages)
+
+    assert not ok
+    assert calls == ['fetch', 'summary']
+    assert {name: info['status'] for name, info in timings.items()} == \
+        {'fetch': 'failed', 'save': 'skipped', 'summary': 'ok'}
+
+def test_only_an_ungated_stage_does_not_fetch():
+    calls = []
+    stages = {
+        'fetch': (stage('fetch', calls), [], True, True),
+        'summary': (stage('summary', calls), ['fetch'], False, False),
+    }
+    ok, timings = run_pipeline.run_pipeline(stages, only=['summary'])
+
+    assert ok
+    assert calls == ['summary']
+    assert list(timings) == ['summary']
+
+def test_providers_reach_the_fetch_stage():
+    seen = []
+    stages = {'fetch': (lambda ctx: seen.append(ctx['providers']), [], True, True)}
+    run_pipeline.run_pipeline(stages, providers=['stub'])
+    assert seen == [['stub']]
@@ -0,0 +1,29 @@
+import json
+import os
+import time
+
+from history_store import HistoryStore
+from serve_data import data_version
+
+def add_partition(date):
+    path = f"data/currency_rates/partitions/{date[:4]}/{date}.json"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'date': date, 'timestamp': f"{date}T16:00:00", 'base_currency': 'USD',
+                   'rates': {'EUR': 0.9}}, f)
+    # Keep consecutive writes apart on coarse filesystem clocks
+    time.sleep(0.02)
+
+def test_new_partitions_and_history_change_the_version():
+    HistoryStore().write_all({'2026-03-02': {'EUR': 0.9}})
+    add_partition('2026-03-02')
+    before = data_version()
+
+    add_partition('2026-03-03')
+    after_partition = data_version()
+    assert after_partition != before
+
+    time.sleep(0.02)
+    with open('data/currency_rates/history.csv', 'a') as f:
+        f.write('2026-03-04,t,EUR,0.9\n')
+    assert data_version() != after_partition
@@ -0,0 +1,35 @@
+import os
+
+from conftest import write_snapshot
+from currency_providers import make_providers
+from watch_rates import Watcher
+
+RATES = {'EUR': 0.9, 'GBP': 0.8, 'JPY': 150.0}
+
+def frankfurter(path, params):
+    if path.endswith('/currencies'):
+        return 200, {code: code for code in RATES}
+    if path.endswith('/latest'):
+        return 200, {'base': 'USD', 'date': '2026-03-03', 'rates': RATES}
+    return 404, {}
+
+def data_files():
+    return {os.path.join(root, name): os.stat(os.path.join(root, name)).st_mtime_ns
+            for root, _, names in os.walk('data') for name in names}
+
+def test_an_unchanged_payload_writes_nothing(stub_server):
+    write_snapshot('2026-03-02', {'EUR': 0.91, 'GBP': 0.79, 'JPY': 149.0})
+    url, seen = stub_server(frankfurter)
+    providers = make_providers({'frankfurter': url, 'open_er_api': 'off', 'currency_api': 'off'})
+
+    watcher = Watcher(providers, write_metrics=False)
+    assert watcher.poll() == 'saved'
+    assert watcher.store.latest_date == '2026-03-03'
+    before = data_files()
+    assert 'data/currency_rates/manifest.json' in before
+
+    # Same payload again, from the running watcher and from a freshly started one
+    assert watcher.poll() == 'unchanged'
+    assert Watcher(providers, write_metrics=False).poll() == 'unchanged'
+    assert data_files() == before
+    assert len([path for path, _ in seen if path.endswith('/latest')]) == 3